@@ -3,25 +3,111 @@ Class describing the play board.
 There are 40 fields on the board. The player starting fields are 10 fields apart
 Counting starts on a player starting field with index 0.
 Tokens in target have a position attribute of -1...-4.
+Other geometries and house rules are described by a Rules.RuleSpec, the
+board then uses the tables compiled from it instead of the default ones.
+
+Internally the position of every token is stored as a small integer code in
+the state array of the board, four consecutive entries per player:
+0...39 are the fields on the board, TARGET_CODE...TARGET_CODE+3 are the four
+target positions and HOME_CODE is the home. Tokens handed out by the board are
+views on that array, so moving a token only changes one array entry and the
+occupancy list of the board.
 """
 
+from array import array
+from Transitions import NUM_FIELDS, TARGET_CODE, HOME_CODE, ILLEGAL
+from Hashing import zobrist_table, full_hash, HASH_BITS, HASH_MASK
+from Rules import ON_BOARD, IN_TARGET, IN_HOME, DEFAULT_RULES, compile_rules
+from utils import get_logger, MOVE
+
+log = get_logger("Board")
+
+
+def is_capture(new_code, home_code=HOME_CODE):
+    """
+    Return if a token that changes its position code to new_code is captured.
+    Tokens only go back home when they are captured, so this holds for the
+    position changes reported to recorders and made by moves of the board.
+    :param new_code: Position code the token changes to
+    :type new_code: int
+    :param home_code: Home code of the board, see Board.home_code
+    :type home_code: int
+    :rtype: bool
+    """
+    return new_code == home_code
+
+
 class Board:
 
-    def __init__(self, player_list):
+    recorder = None     # EventLog.EventRecorder that is told about every token move, if set
+
+    def __init__(self, player_list, rules=None):
+        """
+        :param player_list: Players of the game, at most one per seat
+        :type player_list: list of Player
+        :param rules: Geometry and house rules of the board, the default board if None
+        :type rules: Rules.RuleSpec
+        """
+        compiled = compile_rules(rules if rules is not None else DEFAULT_RULES)
+        self.rules = compiled.spec
         self.players = player_list
-        self.board = [None] * 56
         self.num_players = len(player_list)
-        self.start_fields = [0, 10, 20, 30]     # fields in front of the players home
-        self.target_fields = [39, 9, 19, 29]    # fields in front of the players target
+        if self.num_players > compiled.seats:
+            raise ValueError("Board has {} seats but {} players".format(compiled.seats, self.num_players))
+        self.num_fields = compiled.num_fields
+        self.target_code = compiled.target_code
+        self.home_code = compiled.home_code
+        # occupancy index, token on every position or None
+        self.board = [None] * (self.num_fields + 4 * compiled.seats)
+        self.start_fields = list(compiled.start_fields)     # fields in front of the players home
+        self.target_fields = list(compiled.target_fields)   # fields in front of the players target
         self.tokens = [list() for _ in range(self.num_players)]
         self._home_pos = 'h'
+        self.state = array('b', [self.home_code] * (4 * self.num_players))   # position code of every token
+        # destination code for every player, position code and dice roll
+        self._transitions = compiled.transitions
+        self._category = compiled.category
+        # checked once per board, so moves without output don't pay for the level check
+        self._log_moves = log.isEnabledFor(MOVE)
+
+        # Zobrist keys for every state slot and position code, the hash of the board is kept up to date by _place
+        self._zobrist = zobrist_table(compiled.start_fields[:self.num_players], self.num_fields, compiled.seats)
+        self._hash = 0  # all tokens in the home
+
+        # translation between position codes and the positions of the public api, per player
+        self._decode = [tuple(self._code_to_position(code, player_id) for code in range(self.home_code + 1))
+                        for player_id in range(self.num_players)]
+        self._encode = [{position: code for code, position in enumerate(decode)} for decode in self._decode]
 
         # initialize homes with 4 player tokens each
         for p in self.players:
             for i in range(4):
-                t = Token(self.home_pos, p.id)
+                t = BoardToken(self, 4 * p.id + i, p.id)
                 self.tokens[p.id].append(t)
 
+        self._slot_tokens = [t for player_tokens in self.tokens for t in player_tokens]  # token of every state slot
+        # Bit masks of the tokens of every player that are on the board, in the target and in the home,
+        # indexed by ON_BOARD, IN_TARGET and IN_HOME. Bit i stands for the i-th token of the player.
+        self._masks = [[0, 0, 0b1111] for _ in range(self.num_players)]
+        # tuple of tokens for every possible mask, per player
+        self._mask_tokens = [tuple(tuple(t for i, t in enumerate(player_tokens) if mask >> i & 1)
+                                   for mask in range(16))
+                             for player_tokens in self.tokens]
+        # number of steps a token has taken from its start field for every position code, per player
+        self._progress = compiled.progress[:self.num_players]
+
+        if compiled.spec.mandatory_capture:
+            # chosen once here, so boards without the rule don't check it on every move
+            self.legal_moves = self._capturing_moves
+
+    def _code_to_position(self, code, player_id):
+        """Return the public position (field, target position or home) for a position code"""
+        if code < self.target_code:
+            return code
+        if code == self.home_code:
+            return self.home_pos
+        return -(code - self.target_code + 1) * (player_id + 1)
+
     def __str__(self):
         """
         Return current board configuration as a line. The left most symbol is at
@@ -49,7 +135,7 @@ class Board:
         :type player_id: int
         :raises InvalidMoveException: When the players start field is blocked by one of his own tokens
         """
-        home_tokens = self.get_home_tokens(player_id)
+        home_tokens = self._mask_tokens[player_id][self._masks[player_id][IN_HOME]]
         if not home_tokens:
             raise InvalidMoveException("Cant move token from empty home")
         self.move_token(home_tokens[0])
@@ -80,33 +166,144 @@ class Board:
         return self.target_fields[player_id]
 
     def get_home_tokens(self, player_id):
-        """return list of tokens that are in a players home. List is empty if
+        """return tuple of tokens that are in a players home. Tuple is empty if
         there are no tokens in the players home"""
-        return [t for t in self.tokens[player_id] if t.position == self.home_pos]
+        return self._mask_tokens[player_id][self._masks[player_id][IN_HOME]]
 
     def get_player_tokens(self, player_id):
         """return a list of all tokens of a player"""
         return self.tokens[player_id]
 
     def get_player_tokens_on_board(self, player_id):
-        """Return a list of all tokens that are currently on the board, meaning
+        """Return a tuple of all tokens that are currently on the board, meaning
         no home tokens are included."""
-        return [t for t in self.tokens[player_id] if t.position != self.home_pos]
+        masks = self._masks[player_id]
+        return self._mask_tokens[player_id][masks[ON_BOARD] | masks[IN_TARGET]]
+
+    def get_target_tokens(self, player_id):
+        """Return a tuple of all tokens of a player that are in the target"""
+        return self._mask_tokens[player_id][self._masks[player_id][IN_TARGET]]
 
     def home_token_number(self, player_id):
         """get number of tokes that are in the players home"""
         return len(self.get_home_tokens(player_id))
 
+    def has_won(self, player_id):
+        """
+        Check if all tokens of a player are in the target
+        :type player_id: int
+        :rtype: bool
+        """
+        return self._masks[player_id][IN_TARGET] == 0b1111
+
+    def has_tokens_on_fields(self, player_id):
+        """
+        Check if a player has a token on the fields of the board, not counting
+        the home and the target
+        :type player_id: int
+        :rtype: bool
+        """
+        return self._masks[player_id][ON_BOARD] != 0
+
+    def state_hash(self):
+        """
+        Return a 64 bit Zobrist hash of the positions of all tokens. Tokens of a
+        player are interchangeable, so boards with the same position codes per
+        player have the same hash.
+        :rtype: int
+        """
+        return self._hash & HASH_MASK
+
+    def canonical_hash(self, player_id):
+        """
+        Return the hash of the board seen from a player: seats and fields are
+        counted from the players seat and start field. Positions that are
+        rotations of each other by a multiple of 10 fields have the same hash
+        from the corresponding seats.
+        :type player_id: int
+        :rtype: int
+        """
+        return self._hash >> (HASH_BITS * player_id) & HASH_MASK
+
+    def get_progress(self, token):
+        """
+        Return how far a token has come. -1 for tokens in the home, the number
+        of fields moved from the start field for tokens on the board and 40...43
+        (the target codes of the board) for tokens in the target.
+        :type token: Token
+        :rtype: int
+        """
+        return self._progress[token.id][self.state[token.slot]]
+
+    def legal_moves(self, player_id, dice_roll):
+        """
+        Return the tokens the player is allowed to move with the dice roll,
+        without raising exceptions. Every returned token can be passed to
+        move_token together with the dice roll.
+        Leaving the home with a 6 is mandatory: if it is possible, only the home
+        tokens are returned.
+        :param player_id: Player to move
+        :type player_id: int
+        :param dice_roll: Number of places to move, 1...6
+        :type dice_roll: int
+        :return: Tokens that can be moved, empty if the player can't move
+        :rtype: list of Token
+        """
+        masks = self._masks[player_id]
+        mask_tokens = self._mask_tokens[player_id]
+        if dice_roll == 6 and masks[IN_HOME]:
+            start_content = self.board[self.start_fields[player_id]]
+            if start_content is None or start_content.id != player_id:
+                return list(mask_tokens[masks[IN_HOME]])
+        state = self.state
+        board = self.board
+        moves = self._transitions[player_id]
+        target_tokens = mask_tokens[masks[IN_TARGET]]
+        target_code = self.target_code
+        legal = []
+        for token in mask_tokens[masks[ON_BOARD]]:
+            new_code = moves[state[token.slot]][dice_roll]
+            if new_code == ILLEGAL:
+                continue
+            if new_code >= target_code:
+                if any(state[t.slot] == new_code for t in target_tokens):
+                    continue
+            else:
+                content = board[new_code]
+                if content is not None and content.id == player_id:
+                    continue
+            legal.append(token)
+        return legal
+
+    def _capturing_moves(self, player_id, dice_roll):
+        """
+        legal_moves of boards with mandatory capture: if a move captures a
+        token, only the capturing moves are returned.
+        """
+        legal = Board.legal_moves(self, player_id, dice_roll)
+        if len(legal) < 2:
+            return legal
+        board = self.board
+        state = self.state
+        moves = self._transitions[player_id]
+        target_code = self.target_code
+        capturing = []
+        for token in legal:
+            new_code = moves[state[token.slot]][dice_roll]
+            if new_code < target_code and board[new_code] is not None:
+                # legal_moves already excluded fields with own tokens
+                capturing.append(token)
+        return capturing or legal
+
     def get_field_content(self, position):
         """get content of the board at position"""
-        if 0 <= position <= 39:
+        if 0 <= position < self.num_fields:
             return self.board[position]
 
     def throw(self, token):
-        if token.position == self.home_pos or self.board[token.position] != token:
+        if token.position == self.home_pos or self.board[token.position] is not token:
             raise InvalidMoveException("Trying to throw token that is not on the board")
-        self.board[token.position] = None
-        token.position = self.home_pos
+        self._move(token, self.home_pos)
 
     def move_token(self, token, places=None):
         """
@@ -118,48 +315,146 @@ class Board:
         :type places: int
         :rtype: None
         """
+        self.apply(token, places)
+
+    def apply(self, token, places=None):
+        """
+        Move given token by places like move_token and return what is needed to
+        take the move back with undo.
+        :param token: Which token to move
+        :type token: Token
+        :param places: how many spaces to move token. Not required for token in home.
+        :type places: int
+        :return: State slot and old position code of the token, state slot and position
+        code of the captured token before the move or -1 for both if nothing was captured
+        :rtype: tuple of int
+        :raises InvalidMoveException: When the move isn't allowed, the board is unchanged
+        """
         id = token.id # token id is equal to id of the player to which the token belongs
-        if token.position == self.home_pos:
+        state = self.state
+        slot = token.slot
+        code = state[slot]
+        home_code = self.home_code
+        if code == home_code:
             # is the players start field free?
-            start_content = self.get_start_content(id)
-            if start_content is None:
-                # start is empty
-                self._move(token, self.start_fields[token.id])
-            elif start_content.id is id:
-                # own token blocking start
+            new_pos = self.start_fields[id]
+        elif code >= self.target_code:
+            # token is in target, tokens can't move any further once they reached it
+            raise InvalidMoveException("Token in target can't be moved")
+        else:
+            # token is on normal board, look up where it ends up
+            new_pos = self._transitions[id][code][places]
+            if new_pos == ILLEGAL:
+                # This move would place token outside of the boundary of the target, which is only 4 fields long
+                raise InvalidMoveException("Move would overshoot the target")
+            if new_pos >= self.target_code:
+                # the token moves into the target
+                for own_slot in range(4 * id, 4 * id + 4):
+                    if state[own_slot] == new_pos:
+                        raise InvalidMoveException("Target position blocked by own token")
+                self._place(token, new_pos)
+                return slot, code, -1, -1
+        target_content = self.board[new_pos]
+        if target_content is None:
+            self._place(token, new_pos)
+            return slot, code, -1, -1
+        if target_content.id == id:
+            if code == home_code:
                 raise InvalidMoveException("Start field blocked by own token")
-            else:
-                # other players token blocks start, throw him
-                start_content.position = self.home_pos
-                self._move(token, self.start_fields[token.id])
-        elif token.position < 0:
-            # token is in target
-            raise NotImplementedError
-        elif token.position >= 0:
-            # token is on normal board
-            new_pos = (token.position + places) % 40
-            if token.position <= self.get_target_position(id) < token.position+places:
-                # this move would move the token past the home, instead try to move it in the home
-                rest_places = self.get_target_position(id) - token.position - places # places the token would move in the target
-                if rest_places < -4:
-                    # This move would place token outside of the boundary of the target, which is only 4 fields long
-                    raise InvalidMoveException
-                rest_places *= id + 1  # the last 16 fields of the board are the target fields
-                self._move(token, rest_places)
-                return
-            target_content = self.get_field_content(new_pos)
-            if target_content is not None and target_content.id != token.id:
-                # kick other players token
-                self.throw(target_content)
-            self._move(token, new_pos)
+            raise InvalidMoveException("Field blocked by own token")
+        # kick other players token
+        if self._log_moves:
+            log.log(MOVE, "Player %d captures a token of player %d on field %d", id, target_content.id, new_pos)
+        captured_slot = target_content.slot
+        if captured_slot is None:
+            # token not owned by this board, can't be restored by undo
+            self.throw(target_content)
+            captured_slot = -1
+        else:
+            self._place(target_content, home_code)
+        self._place(token, new_pos)
+        return slot, code, captured_slot, new_pos
+
+    def undo(self, record):
+        """
+        Take back a move made with apply. Moves have to be taken back in reverse order.
+        :param record: Return value of apply
+        :type record: tuple of int
+        """
+        slot, code, captured_slot, captured_code = record
+        tokens = self._slot_tokens
+        self._place(tokens[slot], code)
+        if captured_slot >= 0:
+            self._place(tokens[captured_slot], captured_code)
+
+    def snapshot(self):
+        """
+        Return the positions of all tokens in a compact form that can be passed
+        to restore. Tokens of a player are interchangeable, so only the position
+        codes are stored.
+        :rtype: bytes
+        """
+        return self.state.tobytes()
+
+    def restore(self, snapshot):
+        """
+        Set all tokens to the positions of a snapshot taken from a board with the
+        same players. Tokens keep their identity, only their positions change.
+        :param snapshot: Return value of snapshot
+        :type snapshot: bytes
+        """
+        if len(snapshot) != len(self.state):
+            raise ValueError("Snapshot doesn't fit this board")
+        board = self.board
+        for i in range(len(board)):
+            board[i] = None
+        memoryview(self.state).cast('B')[:] = snapshot
+        state = self.state
+        category = self._category
+        for player_tokens, masks, decode in zip(self.tokens, self._masks, self._decode):
+            masks[ON_BOARD] = masks[IN_TARGET] = masks[IN_HOME] = 0
+            for token in player_tokens:
+                code = state[token.slot]
+                masks[category[code]] |= 1 << (token.slot & 3)
+                if code != self.home_code:
+                    board[decode[code]] = token
+        self._hash = full_hash(self._zobrist, state)
+
+    def _place(self, token, new_code):
+        """
+        Set position code of a token owned by this board and update the occupancy index
+        """
+        board = self.board
+        decode = self._decode[token.id]
+        slot = token.slot
+        old_code = self.state[slot]
+        home_code = self.home_code
+        if old_code != home_code and board[decode[old_code]] is token:
+            board[decode[old_code]] = None
+        self.state[slot] = new_code
+        keys = self._zobrist[slot]
+        self._hash ^= keys[old_code] ^ keys[new_code]
+        if new_code != home_code:
+            board[decode[new_code]] = token
+        masks = self._masks[token.id]
+        category = self._category
+        bit = 1 << (slot & 3)
+        masks[category[old_code]] ^= bit
+        masks[category[new_code]] ^= bit
+        if self.recorder is not None:
+            self.recorder.token_moved(token, old_code, new_code)
 
     def _move(self, token, new_pos):
         """
         Change token position attribute and update board
         """
+        if token.slot is not None:
+            self._place(token, self._encode[token.id][new_pos])
+            return
+        # token not owned by this board
         old_pos = token.position
         token.position = new_pos
-        self.board[new_pos] = token
+        if new_pos != self.home_pos: self.board[new_pos] = token
         if old_pos != self.home_pos: self.board[old_pos] = None
 
 
@@ -174,6 +469,9 @@ class Token:
     Token with a player id to which it belongs. Position marks the position on
     the board.
     """
+    __slots__ = ('_position', 'id')
+    slot = None     # index in the state array of a board, only set for tokens owned by a board
+
     def __init__(self, position, id):
         """
 
@@ -195,3 +493,33 @@ class Token:
     @position.setter
     def position(self, new):
         self._position = new
+
+
+class BoardToken(Token):
+    """
+    Token owned by a board. It doesn't store its position itself but reads it
+    from the state array of the board.
+    """
+    __slots__ = ('_board', 'slot')
+
+    def __init__(self, board, slot, id):
+        """
+        :param board: Board that owns the token
+        :type board: Board
+        :param slot: Index of the token in the state array of the board
+        :type slot: int
+        :param id: Player id of token
+        :type id: int
+        """
+        self._board = board
+        self.slot = slot
+        self.id = id
+
+    @property
+    def position(self):
+        board = self._board
+        return board._decode[self.id][board.state[self.slot]]
+
+    @position.setter
+    def position(self, new):
+        self._board._move(self, new)
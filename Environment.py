@@ -0,0 +1,274 @@
+"""
+Batched environment for training strategies with reinforcement learning.
+
+VectorEnv plays K games at once. One seat of every game is controlled by the
+learner through reset and step, the other seats are played by registered
+strategies (see Registry). The games keep running until the learner has a
+legal move, so every step asks for a real decision.
+
+Observations are int8 arrays of shape (K, 4 * num_players + 1). The first
+4 * num_players columns are the token positions, the players ordered by seat
+starting with the observing player, four tokens each in state slot order. As
+in VectorEngine the positions are relative to the start field of the observing
+player: -1 for tokens in the home, 0...39 for fields counted from the start
+field of the observer and 40...43 for the target positions of the owner. So an
+observation looks the same from every seat. The last column is the dice roll.
+
+Actions are the index 0...3 of the token to move, masks of shape (K, 4) tell
+which tokens may be moved. Rewards are 1 when the learner wins, -1 when an
+opponent wins and 0 otherwise. Finished games are reset right away, the
+returned observation is then the first one of the next game.
+
+    env = VectorEnv(64, ("random", "first", "last"), seed=1)
+    obs, masks = env.reset()
+    while training:
+        obs, rewards, dones, masks = env.step(policy(obs, masks))
+
+A trained policy is used in normal games through PolicyPlayer:
+
+    Registry.register("learned", PolicyPlayer.bind(policy))
+    Game("learned", "random", "random", "random").run()
+"""
+
+import random
+from functools import lru_cache
+
+import numpy as np
+
+import Registry
+from Board import Board, InvalidMoveException
+from Player import Player
+from Rules import DEFAULT_RULES, compile_rules
+
+NUM_ACTIONS = 4
+HOME = -1
+
+
+@lru_cache(maxsize=None)
+def _observation_tables(rules, num_players, observer):
+    """
+    Order of the state slots and translation of position codes for the
+    observations of a player
+    :return: Slot index array and lookup array code -> relative position
+    :rtype: tuple of numpy.ndarray
+    """
+    compiled = compile_rules(rules)
+    slots = np.array([4 * ((observer + seat) % num_players) + i for seat in range(num_players) for i in range(4)],
+                     dtype=np.intp)
+    start = compiled.start_fields[observer]
+    lut = np.array([(code - start) % compiled.num_fields if code < compiled.target_code
+                    else code if code < compiled.home_code else HOME
+                    for code in range(compiled.home_code + 1)], dtype=np.int8)
+    return slots, lut
+
+
+def observe(board, player_id, dice_roll):
+    """
+    Return the observation of a single board, as seen by a player
+    :type board: Board
+    :type player_id: int
+    :type dice_roll: int
+    :return: Observation of shape (4 * num_players + 1,)
+    :rtype: numpy.ndarray
+    """
+    slots, lut = _observation_tables(board.rules, board.num_players, player_id)
+    obs = np.empty(len(slots) + 1, dtype=np.int8)
+    obs[:-1] = lut[np.frombuffer(board.state, dtype=np.int8)[slots]]
+    obs[-1] = dice_roll
+    return obs
+
+
+def action_mask(board, player_id, dice_roll):
+    """
+    Return which tokens of a player may be moved
+    :rtype: numpy.ndarray of bool, shape (4,)
+    """
+    mask = np.zeros(NUM_ACTIONS, dtype=bool)
+    for token in board.legal_moves(player_id, dice_roll):
+        mask[token.slot & 3] = True
+    return mask
+
+
+class VectorEnv:
+    """
+    K games with one learner seat each, stepped together.
+    """
+
+    def __init__(self, n_envs, opponents=("random", "random", "random"), seat=0, seed=None, max_turns=1000,
+                 rules=None):
+        """
+        :param n_envs: Number of parallel games K
+        :type n_envs: int
+        :param opponents: Player type of every other seat, in seat order
+        :type opponents: sequence of str
+        :param seat: Seat of the learner
+        :type seat: int
+        :param seed: Seed of the random number generators of the games
+        :type seed: int or None
+        :param max_turns: Games are stopped without a winner and a reward of 0 after this many turns
+        :type max_turns: int
+        :param rules: Board geometry and house rules, see Rules.RuleSpec. Only
+        the geometry and mandatory capture are used, every player rolls once per turn.
+        :type rules: Rules.RuleSpec
+        """
+        self.n_envs = n_envs
+        self.num_players = len(opponents) + 1
+        if not 0 <= seat < self.num_players:
+            raise ValueError("Seat {} doesn't exist in a game with {} players".format(seat, self.num_players))
+        if max_turns < 1:
+            raise ValueError("Games need at least one turn")
+        self.seat = seat
+        self.max_turns = max_turns
+        self.rules = rules if rules is not None else DEFAULT_RULES
+        self.observation_size = 4 * self.num_players + 1
+        master = random.Random(seed)
+        self._rngs = [random.Random(master.getrandbits(64)) for _ in range(n_envs)]
+        self._players = []
+        self.boards = []
+        for rng in self._rngs:
+            types = list(opponents)
+            types.insert(seat, None)
+            players = [Player(i, rng) if t is None else Registry.create_player(t, i, rng) for i, t in enumerate(types)]
+            self._players.append(players)
+            self.boards.append(Board(players, self.rules))
+        self._initial = self.boards[0].snapshot()
+        self._slots, self._lut = _observation_tables(self.rules, self.num_players, seat)
+        self.rolls = np.zeros(n_envs, dtype=np.int8)    # dice roll the learner has to move with
+        self.turns = np.zeros(n_envs, dtype=np.int64)   # turns of the running games
+        self.masks = np.zeros((n_envs, NUM_ACTIONS), dtype=bool)
+
+    def reset(self):
+        """
+        Start new games on all boards
+        :return: Observations and action masks
+        :rtype: tuple of numpy.ndarray
+        """
+        for k in range(self.n_envs):
+            self._reset(k)
+        return self._observe(), self.masks.copy()
+
+    def step(self, actions):
+        """
+        Move the chosen token in every game and let the opponents play until
+        the learner has to decide again.
+        :param actions: Token index for every game
+        :type actions: sequence of int
+        :return: Observations, rewards, done flags and action masks
+        :rtype: tuple of numpy.ndarray
+        :raises InvalidMoveException: If an action isn't allowed by the mask, no game is changed
+        """
+        actions = np.asarray(actions)
+        if actions.shape != (self.n_envs,):
+            raise ValueError("Expected {} actions, got shape {}".format(self.n_envs, actions.shape))
+        if not self.masks[np.arange(self.n_envs), actions].all():
+            raise InvalidMoveException("Actions {} are not legal".format(
+                np.flatnonzero(~self.masks[np.arange(self.n_envs), actions]).tolist()))
+        rewards = np.zeros(self.n_envs, dtype=np.float32)
+        dones = np.zeros(self.n_envs, dtype=bool)
+        seat = self.seat
+        for k, action in enumerate(actions.tolist()):
+            board = self.boards[k]
+            board.move_token(board.tokens[seat][action], int(self.rolls[k]))
+            if board.has_won(seat):
+                reward, done = 1., True
+            else:
+                reward, done = self._advance(k, seat + 1)
+            if done:
+                rewards[k] = reward
+                dones[k] = True
+                self._reset(k)
+        return self._observe(), rewards, dones, self.masks.copy()
+
+    def _reset(self, k):
+        """Start a new game on board k"""
+        done = True
+        while done:
+            # games that end before the learner could move don't need a decision, they are skipped
+            self.boards[k].restore(self._initial)
+            self.turns[k] = 0
+            _, done = self._advance(k, 0)
+
+    def _advance(self, k, first):
+        """
+        Play the seats from first on until the learner has a legal move.
+        :return: Reward and done flag
+        :rtype: tuple
+        """
+        board = self.boards[k]
+        players = self._players[k]
+        randint = self._rngs[k].randint
+        seat = self.seat
+        n = self.num_players
+        p = first
+        while True:
+            if p == n:
+                p = 0
+            if p == 0:
+                if self.turns[k] >= self.max_turns:
+                    return 0., True
+                self.turns[k] += 1
+            dice_roll = randint(1, 6)
+            if p == seat:
+                legal = board.legal_moves(seat, dice_roll)
+                if legal:
+                    self.rolls[k] = dice_roll
+                    self._reset_mask(k, legal)
+                    return 0., False
+            else:
+                players[p].turn(board, dice_roll)
+                if board.has_won(p):
+                    return -1., True
+            p += 1
+
+    def _reset_mask(self, k, legal):
+        mask = self.masks[k]
+        mask[:] = False
+        for token in legal:
+            mask[token.slot & 3] = True
+
+    def _observe(self):
+        """Observations of all games"""
+        states = np.frombuffer(b"".join([board.state.tobytes() for board in self.boards]),
+                               dtype=np.int8).reshape(self.n_envs, -1)
+        obs = np.empty((self.n_envs, self.observation_size), dtype=np.int8)
+        obs[:, :-1] = self._lut[states[:, self._slots]]
+        obs[:, -1] = self.rolls
+        return obs
+
+
+class PolicyPlayer(Player):
+    """
+    Player that moves with a policy as trained with VectorEnv. The policy is
+    called with a batch of one observation and mask and returns the token
+    index, or an array with one token index.
+    """
+
+    policy = None
+
+    def __init__(self, id, rng=None, policy=None):
+        super().__init__(id, rng)
+        if policy is not None:
+            self.policy = policy
+        if self.policy is None:
+            raise ValueError("PolicyPlayer needs a policy")
+
+    @classmethod
+    def bind(cls, policy, name="PolicyPlayer"):
+        """
+        Return a subclass that plays with the given policy, e.g. to register it
+        in Registry and use it by name.
+        :param policy: Function (observations, masks) -> actions
+        :param name: Class name of the strategy, used e.g. by Profiling
+        :type name: str
+        :rtype: type
+        """
+        return type(name, (cls,), {"policy": staticmethod(policy)})
+
+    def turn(self, board, dice_roll):
+        mask = action_mask(board, self.id, dice_roll)
+        if not mask.any():
+            return
+        action = np.asarray(self.policy(observe(board, self.id, dice_roll)[None], mask[None])).reshape(-1)[0]
+        if not mask[action]:
+            raise InvalidMoveException("Policy chose token {} which can't be moved".format(action))
+        board.move_token(board.tokens[self.id][int(action)], dice_roll)
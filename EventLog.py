@@ -0,0 +1,162 @@
+"""
+Compact binary log of game events.
+
+Every record has a fixed width of RECORD_SIZE bytes:
+game id (uint32), turn (uint32), kind (uint8), player (int8), dice roll (int8),
+from and to position code (int8) and the state slot of a captured token (int8).
+A MOVE record is written for every player turn, from, to and captured are -1 if
+the player didn't move or didn't capture anything. A WIN record follows the
+move that decided the game. Position codes and slots are the ones of Board.state.
+A recorder numbers the games in the order they are played, so the records of
+a log are sorted by game id.
+
+The file starts with the MAGIC header, followed by the records in little endian
+byte order.
+"""
+
+import struct
+from collections import namedtuple
+from Board import is_capture
+
+MAGIC = b"MADNEV01"
+RECORD = struct.Struct("<IIBbbbbb")
+RECORD_SIZE = RECORD.size
+
+MOVE, WIN = 0, 1
+
+Event = namedtuple("Event", "game turn kind player roll from_code to_code captured")
+
+
+def event_dtype():
+    """Return the NumPy structured dtype matching a record"""
+    import numpy as np
+    return np.dtype([('game', '<u4'), ('turn', '<u4'), ('kind', 'u1'), ('player', 'i1'),
+                     ('roll', 'i1'), ('from_code', 'i1'), ('to_code', 'i1'), ('captured', 'i1')])
+
+
+class EventRecorder:
+    """
+    Collects the events of one or more games and writes them to a binary file
+    through a preallocated buffer. Game passes it to its board, which reports
+    every token move.
+    """
+
+    def __init__(self, file, buffer_records=8192):
+        """
+        :param file: Path of the log file or a binary file object opened for writing
+        :type file: str or file
+        :param buffer_records: Number of records that are collected before they are written
+        :type buffer_records: int
+        """
+        if isinstance(file, (str, bytes)) or hasattr(file, "__fspath__"):
+            self._file = open(file, "wb")
+            self._owns_file = True
+        else:
+            self._file = file
+            self._owns_file = False
+        self._file.write(MAGIC)
+        self._buffer = bytearray(buffer_records * RECORD_SIZE)
+        self._offset = 0
+        self._written = 0   # number of records already written to the file
+        self._pack_into = RECORD.pack_into
+        self.game = -1      # id of the current game, counted up by new_game
+        self._turn = 0      # turn and dice roll of the last recorded move
+        self._roll = 0
+        self._from = self._to = self._captured = -1
+
+    @property
+    def records(self):
+        """Number of records recorded so far"""
+        return self._written + self._offset // RECORD_SIZE
+
+    def new_game(self):
+        """Start recording a new game, returns its id"""
+        self.game += 1
+        return self.game
+
+    def token_moved(self, token, old_code, new_code):
+        """Called by the board whenever a token changes its position code"""
+        if is_capture(new_code):
+            self._captured = token.slot
+        else:
+            self._from = old_code
+            self._to = new_code
+
+    def record_turn(self, turn, player_id, dice_roll):
+        """Called by Game after the player made his move, writes the move record"""
+        if self._offset == len(self._buffer):
+            self.flush()
+        self._pack_into(self._buffer, self._offset, self.game, turn, MOVE, player_id,
+                        dice_roll, self._from, self._to, self._captured)
+        self._offset += RECORD_SIZE
+        self._turn = turn
+        self._roll = dice_roll
+        self._from = self._to = self._captured = -1
+
+    def win(self, player_id):
+        """Called by Game when a player has won"""
+        if self._offset == len(self._buffer):
+            self.flush()
+        self._pack_into(self._buffer, self._offset, self.game, self._turn, WIN, player_id,
+                        self._roll, -1, -1, -1)
+        self._offset += RECORD_SIZE
+
+    def flush(self):
+        """Write buffered records to the file"""
+        if self._offset:
+            self._file.write(memoryview(self._buffer)[:self._offset])
+            self._written += self._offset // RECORD_SIZE
+            self._offset = 0
+        self._file.flush()
+
+    def close(self):
+        """Flush and close the file if it was opened by the recorder"""
+        self.flush()
+        if self._owns_file:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _check_header(header):
+    if header != MAGIC:
+        raise ValueError("Not a game event log")
+
+
+def iter_events(path, chunk_records=8192):
+    """
+    Iterate lazily over the records of a log file.
+    :param path: Path of the log file
+    :type path: str
+    :rtype: iterator of Event
+    """
+    with open(path, "rb") as f:
+        _check_header(f.read(len(MAGIC)))
+        while True:
+            chunk = f.read(chunk_records * RECORD_SIZE)
+            if not chunk:
+                return
+            if len(chunk) % RECORD_SIZE:
+                raise ValueError("Truncated record at the end of the event log")
+            for record in RECORD.iter_unpack(chunk):
+                yield Event(*record)
+
+
+def load_events(path):
+    """
+    Memory map a log file as NumPy structured array, see event_dtype.
+    :param path: Path of the log file
+    :type path: str
+    :rtype: numpy.memmap
+    """
+    import numpy as np
+    with open(path, "rb") as f:
+        _check_header(f.read(len(MAGIC)))
+        if not f.read(1):
+            # numpy can't map an empty range
+            return np.empty(0, dtype=event_dtype())
+    return np.memmap(path, dtype=event_dtype(), mode="r", offset=len(MAGIC))
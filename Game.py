@@ -1,20 +1,25 @@
-import Player
+import random
+from time import perf_counter_ns
+import Registry
 import Board
-from random import randint
-from utils import mprint
+from utils import get_logger, GAME, TURN
 from Board import Board
+from Rules import compile_rules
+
+log = get_logger("Game")
 
 class Game:
 
-    def __init__(self, p1=None, p2=None, p3=None, p4=None):
+    def __init__(self, p1=None, p2=None, p3=None, p4=None, p5=None, p6=None, rng=None, recorder=None, profiler=None,
+                 rules=None):
         """
         Initialize a game with given player types.
-        Possible player types: 
+        Built in player types:
         'first': always moves first token
         'last': always moves last token
         'random': moves random token
-        'firstbeat': Beats other player if it can, otherwise moves first token
-        'lastbeat': Beats other player if it can, otherwise moves last token
+        'montecarlo': moves the token that wins most random games played from the position after the move
+        More types can be registered, see Registry.
         :param p1: String describing player type
         :type p1: str
         :param p2: String describing player type
@@ -23,54 +28,194 @@ class Game:
         :type p3: str
         :param p4: String describing player type
         :type p4: str
+        :param p5: String describing player type, only for boards with more than 4 seats
+        :type p5: str
+        :param p6: String describing player type, only for boards with more than 4 seats
+        :type p6: str
+        :param rng: Random number generator used for the dice and passed on to the
+        players. Defaults to the module level functions of random.
+        :type rng: random.Random
+        :param recorder: Records every roll, move, capture and win of the game
+        :type recorder: EventLog.EventRecorder
+        :param profiler: Measures the time spent in the phases of every turn
+        :type profiler: Profiling.PhaseProfiler
+        :param rules: Board geometry and house rules, the default game if None
+        :type rules: Rules.RuleSpec
+        :raises ValueError: If there are more players than seats or a recorder is
+        used on a board with other than the default geometry
         """
-        self.players = [self.create_player(p, i) for i, p in enumerate((p1, p2, p3, p4)) if p is not None]
+        self.rng = rng if rng is not None else random
+        self.players = [self.create_player(p, i) for i, p in enumerate((p1, p2, p3, p4, p5, p6)) if p is not None]
         self.game_running = True
-        self.p1, self.p2, self.p3, self.p4 = self.players
-        self.board = Board(self.players)
+        for i, player in enumerate(self.players):
+            setattr(self, "p{}".format(i + 1), player)
+        self.board = Board(self.players, rules)
+        compiled = compile_rules(self.board.rules)
+        if recorder is not None and not compiled.default_geometry:
+            raise ValueError("Recorders only support the default board geometry")
+        if not compiled.standard_turns:
+            # the roll rules of the variant are chosen once, the default turn stays free of rule checks
+            self._rolls_when_all_home = compiled.spec.rolls_when_all_home
+            self._extra_roll_on_six = compiled.spec.extra_roll_on_six
+            self.turn_steps = self._house_steps
+        # checked once per game, so games without output don't pay for building messages
+        self._log_game = log.isEnabledFor(GAME)
+        self._log_turns = log.isEnabledFor(TURN)
+        self.turns = 0  # number of rounds played so far
+        self.winner = None
+        self.recorder = recorder
+        self.profiler = None
+        if profiler is not None:
+            profiler.attach(self)
+        if recorder is not None:
+            self.game_id = recorder.new_game()
+            self.board.recorder = recorder
 
-        mprint("Starting game with {} players.".format(len(self.players)))
-        for player in self.players:
-            mprint("Player {index} is a {type}".format(index=player.id, type=type(player).__name__))
+        if self._log_game:
+            log.log(GAME, "Starting game with %d players.", len(self.players))
+            for player in self.players:
+                log.log(GAME, "Player %d is a %s", player.id, type(player).__name__)
 
     def create_player(self, player_type, player_id):
         """
         Create  a new player of type
-        :param player_type: Which type of player to create: first, last random
-        :type player_type: str 
+        :param player_type: Which type of player to create, a name registered in Registry
+        :type player_type: str
         :return: created player
+        :raises TypeError: If the player type is not registered
         """
-        if player_type == 'first':
-            player = Player.FirstPlayer(player_id)
-        elif player_type == 'last':
-            player = Player.LastPlayer(player_id)
-        elif player_type == 'random':
-            player = Player.RandomPlayer(player_id)
-        else:
-            raise TypeError("Player type {} not known".format(player_type))
-        return player
+        return Registry.create_player(player_type, player_id, self.rng)
 
     def play(self):
         while self.game_running:
             self.turn()
             input()
 
+    def run(self, max_turns=None):
+        """
+        Play the game until one player has won, without any terminal interaction.
+        :param max_turns: Stop after this many turns even if nobody has won yet. None means no limit.
+        :type max_turns: int or None
+        :return: The winning player or None if the game was stopped by max_turns
+        :rtype: Player or None
+        """
+        turn = self.turn
+        while self.game_running:
+            if max_turns is not None and self.turns >= max_turns:
+                break
+            turn()
+        return self.winner
+
     def turn(self):
-        """play one turn for all players"""
+        """play one turn for all players. Return the winning player if the game
+        was decided during this turn."""
+        if self.profiler is not None:
+            return self._profiled_turn()
+        board = self.board
+        for player, dice_roll in self.turn_steps():
+            player.turn(board, dice_roll)
+        return self.winner
 
+    def turn_steps(self):
+        """
+        Play one turn step by step, for callers that let the players move
+        themselves, e.g. Server.GameHost. Yields the player to move and its
+        dice roll, the move has to be made before the next step is requested.
+        Counts the turn, records the moves and ends the game when a player has won.
+        """
+        self.turns += 1
+        board = self.board
+        randint = self.rng.randint
+        recorder = self.recorder
+        has_won = board.has_won
         for player in self.players:
             dice_roll = randint(1, 6)
-            print("Player {} has rolled a {}".format(player.id, dice_roll))
-            player.turn(self.board, dice_roll)
-            if player.has_won:
-                self.game_running = False
-                return player
+            if self._log_turns:
+                log.log(TURN, "Player %d has rolled a %d", player.id, dice_roll)
+            yield player, dice_roll
+            if recorder is not None:
+                recorder.record_turn(self.turns, player.id, dice_roll)
+            if has_won(player.id):
+                self._finish(player)
+                return
 
         # print out board
-        self.print_board_simple()
+        if self._log_turns:
+            self.print_board_simple()
+
+    def _profiled_turn(self):
+        """turn on turn_steps, timing every phase with the profiler of the game"""
+        board = self.board
+        profiler = self.profiler
+        dice = self.rng     # Profiling.TimedDice, measures the time of the last roll
+        start, stop, add = profiler.start, profiler.stop, profiler.add
+        steps = self.turn_steps()
+        last = None
+        while True:
+            # resuming the steps checks if the last player has won, then rolls for the next player
+            begin = perf_counter_ns()
+            step = next(steps, None)
+            elapsed = perf_counter_ns() - begin
+            if step is None:
+                if last is not None:
+                    add((last, "win_check"), elapsed)
+                return self.winner
+            player, dice_roll = step
+            name = type(player).__name__
+            if last is not None:
+                add((last, "win_check"), elapsed - dice.elapsed)
+            add((name, "roll"), dice.elapsed)
+            start(name)
+            start("decide")
+            player.turn(board, dice_roll)
+            stop()
+            stop()
+            last = name
+
+    def _house_steps(self):
+        """turn_steps with the roll rules of a variant: several tries to roll a 6
+        for players without tokens on the fields and another roll after a 6"""
+        self.turns += 1
+        board = self.board
+        randint = self.rng.randint
+        recorder = self.recorder
+        has_won = board.has_won
+        on_fields = board.has_tokens_on_fields
+        rolls_when_all_home = self._rolls_when_all_home
+        extra_roll_on_six = self._extra_roll_on_six
+        for player in self.players:
+            tries = 1 if on_fields(player.id) else rolls_when_all_home
+            while True:
+                dice_roll = randint(1, 6)
+                if self._log_turns:
+                    log.log(TURN, "Player %d has rolled a %d", player.id, dice_roll)
+                yield player, dice_roll
+                if recorder is not None:
+                    recorder.record_turn(self.turns, player.id, dice_roll)
+                if has_won(player.id):
+                    self._finish(player)
+                    return
+                if dice_roll == 6 and extra_roll_on_six:
+                    tries = 1 if on_fields(player.id) else rolls_when_all_home
+                    continue
+                tries -= 1
+                if not tries or on_fields(player.id):
+                    break
+
+        if self._log_turns:
+            self.print_board_simple()
+
+    def _finish(self, player):
+        """End the game with player as winner"""
+        self.game_running = False
+        self.winner = player
+        if self.recorder is not None:
+            self.recorder.win(player.id)
+        if self._log_game:
+            log.log(GAME, "Player %d has won after %d turns", player.id, self.turns)
+        return player
 
     def print_board_simple(self):
-        print(self.board)
-        input()
+        log.log(TURN, "%s", self.board)
 
 
@@ -0,0 +1,126 @@
+"""
+Zobrist hashing of board states and a bounded cache keyed by it.
+
+Every player position code gets a random 64 bit key, the hash of a board is
+the XOR of the keys of all its tokens. Home has the key 0, so the hash doesn't
+depend on which tokens of a player are in the home and tokens of the same
+player are interchangeable. Moving a token changes the hash by two XORs.
+
+The board is symmetric under rotation by the fields between two start
+fields (10 on the default board). The hash seen from a player (canonical_hash) uses seats and fields
+relative to that players seat, so the position of player 2 with a token 5
+fields in front of its start is the same key as player 0 with a token on
+field 5. The hashes of all rotations are kept together in one integer, 64
+bits per rotation, so they are updated with the same two XORs.
+"""
+
+import random
+from collections import OrderedDict
+from functools import lru_cache
+
+from Transitions import NUM_FIELDS
+
+HASH_BITS = 64
+HASH_MASK = (1 << HASH_BITS) - 1
+SEATS = 4
+SEED = 0x5EED
+
+
+@lru_cache(maxsize=None)
+def _relative_keys(seats=SEATS, num_fields=NUM_FIELDS):
+    """Random key for every relative seat and relative position code, home keys are 0"""
+    rng = random.Random(SEED)
+    home_code = num_fields + 4
+    return tuple(tuple(0 if code == home_code else rng.getrandbits(HASH_BITS) for code in range(home_code + 1))
+                 for _ in range(seats))
+
+
+@lru_cache(maxsize=None)
+def zobrist_table(start_fields, num_fields=NUM_FIELDS, seats=SEATS):
+    """
+    Build the keys for a board layout, shared by all boards with that layout.
+    :param start_fields: Start field of every player, evenly spaced
+    :type start_fields: tuple of int
+    :param num_fields: Number of fields of the board
+    :type num_fields: int
+    :param seats: Number of seats of the board, the players may use only some of them
+    :type seats: int
+    :return: table[slot][code] is the key of the token in state slot slot on
+    position code code, with the key of rotation r in bits 64*r...64*r+63
+    :rtype: tuple of tuple of int
+    """
+    keys = _relative_keys(seats, num_fields)
+    num_players = len(start_fields)
+    table = []
+    for slot in range(4 * num_players):
+        player = slot >> 2
+        slot_keys = []
+        for code in range(num_fields + 5):
+            packed = 0
+            for rotation in range(num_players):
+                seat = (player - rotation) % seats
+                relative = (code - start_fields[rotation]) % num_fields if code < num_fields else code
+                packed |= keys[seat][relative] << (HASH_BITS * rotation)
+            slot_keys.append(packed)
+        table.append(tuple(slot_keys))
+    return tuple(table)
+
+
+def full_hash(table, state):
+    """
+    Compute the packed hash of a state from scratch
+    :param table: Return value of zobrist_table
+    :param state: Position codes of all tokens
+    :type state: sequence of int
+    :rtype: int
+    """
+    value = 0
+    for slot, code in enumerate(state):
+        value ^= table[slot][code]
+    return value
+
+
+class StateCache:
+    """
+    Mapping with a maximum size that drops the least recently used entries,
+    e.g. for evaluations keyed by (Board.canonical_hash(player_id), dice_roll).
+    """
+
+    def __init__(self, maxsize=100000):
+        """
+        :param maxsize: Maximum number of entries
+        :type maxsize: int
+        """
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """Return the value of key and mark it as recently used, default if it is missing"""
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Store a value, dropping the least recently used entry if the cache is full"""
+        data = self._data
+        data[key] = value
+        data.move_to_end(key)
+        if len(data) > self.maxsize:
+            data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+        self.hits = self.misses = 0
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
@@ -1,13 +1,30 @@
 """abstract class Player, derive from it and implement players with different 
 strategies"""
 
-from random import randint, choice
-from Board import InvalidMoveException
+import json
+import random
+import time
+import Registry
+from Rules import compile_rules
+from Solver import state_key, key_to_string
+from utils import get_logger, MOVE
+
+log = get_logger("Player")
 
 class Player:
 
-    def __init__(self, id):
+    cpu_heavy = False   # decisions take long enough to be run outside of an event loop, see Server.GameHost
+
+    def __init__(self, id, rng=None):
+        """
+        :param id: Player id, equal to the seat index in the game
+        :type id: int
+        :param rng: Random number generator for strategies that make random
+        decisions. Defaults to the module level functions of random.
+        :type rng: random.Random
+        """
         self.id = id
+        self.rng = rng if rng is not None else random
 
     def turn(self, board, dice_roll):
         raise NotImplementedError
@@ -20,8 +37,7 @@ class Player:
         :return:
         :rtype: bool
         """
-        player_tokens = board.get_player_tokens(self.id)
-        return all((t.position != board.home_pos and t.position < 0 for t in player_tokens))
+        return board.has_won(self.id)
 
 
 class FirstPlayer(Player):
@@ -29,11 +45,13 @@ class FirstPlayer(Player):
     This player only moves his furthest figure
     """
 
-    def __init__(self, id):
-        super().__init__(id)
+    def __init__(self, id, rng=None):
+        super().__init__(id, rng)
 
     def turn(self, board, dice_roll):
-        pass
+        moves = board.legal_moves(self.id, dice_roll)
+        if moves:
+            board.move_token(max(moves, key=board.get_progress), dice_roll)
 
 
 class LastPlayer(Player):
@@ -41,11 +59,13 @@ class LastPlayer(Player):
     This player always moves the figure in the back
     """
 
-    def __init__(self, id):
-        super().__init__(id)
+    def __init__(self, id, rng=None):
+        super().__init__(id, rng)
 
     def turn(self, board, dice_roll):
-        pass
+        moves = board.legal_moves(self.id, dice_roll)
+        if moves:
+            board.move_token(min(moves, key=board.get_progress), dice_roll)
 
 
 class RandomPlayer(Player):
@@ -53,26 +73,280 @@ class RandomPlayer(Player):
     This player selects a figure to move randomly
     """
 
-    def __init__(self, id):
-        super().__init__(id)
+    def __init__(self, id, rng=None):
+        super().__init__(id, rng)
 
     def turn(self, board, dice_roll):
-        home_tokens = board.get_home_tokens(self.id)
-        available_tokens = board.get_player_tokens_on_board(self.id)
-        if dice_roll == 6 and home_tokens:
-            # need to get out of the home if start field is free
-            try:
-                board.move_out_of_home(self.id)
-            except InvalidMoveException as ive:
-                # start field blocked by own token, skip this 6
-                pass
-
-        elif available_tokens:
-            picked = self.select_random_token(available_tokens)
-            board.move_token(picked, dice_roll)
+        moves = board.legal_moves(self.id, dice_roll)
+        if moves:
+            board.move_token(self.select_random_token(moves), dice_roll)
 
     def select_random_token(self, token_list):
         """Return one random token from token_list"""
-        #print(len(token_list))
-        return choice(token_list)
-        #return token_list[randint(0, len(token_list))]
\ No newline at end of file
+        return self.rng.choice(token_list)
+
+
+class MonteCarloPlayer(Player):
+    """
+    This player plays random games from the position after every possible
+    move and picks the move that won most of them. Rollouts run in batches,
+    sampling stops early as soon as the confidence interval of the best move
+    doesn't overlap the interval of any other move, or when the rollout or
+    time budget of the decision is used up.
+    The rollouts are played on the game board itself, which is restored from
+    a snapshot afterwards, so no board or token is ever copied. They follow the
+    roll rules of the board, e.g. another roll after a 6.
+    Rollouts draw from their own random number generator, seeded once from the
+    one of the game, so the dice of the game don't depend on the number of
+    rollouts and games are reproducible from their seed. That doesn't hold
+    with a time_limit, which makes the number of rollouts depend on the speed
+    of the machine.
+    """
+
+    cpu_heavy = True
+
+    def __init__(self, id, rng=None, max_rollouts=400, time_limit=None, batch_size=8, z=2.,
+                 max_rollout_turns=None, cache=None):
+        """
+        :param max_rollouts: Maximum number of rollouts per decision, over all moves
+        :type max_rollouts: int
+        :param time_limit: Maximum seconds per decision, None means no limit. With a
+        limit the decisions depend on timing and games can't be reproduced from their seed.
+        :type time_limit: float or None
+        :param batch_size: Rollouts per move between two checks of the confidence intervals
+        :type batch_size: int
+        :param z: Width of the confidence intervals in standard errors
+        :type z: float
+        :param max_rollout_turns: Stop rollouts after this many turns and count them as lost,
+        None plays until a player has won
+        :type max_rollout_turns: int or None
+        :param cache: Decisions by position seen from the player and dice roll, can be
+        shared by players on all seats. The keys include the number of players, the
+        rules and the parameters of the player, so the cache can also be shared by
+        players with different settings.
+        :type cache: Hashing.StateCache
+        """
+        super().__init__(id, rng)
+        self.rollout_rng = random.Random(self.rng.getrandbits(64))
+        self.max_rollouts = max_rollouts
+        self.time_limit = time_limit
+        self.batch_size = batch_size
+        self.z = z
+        self.max_rollout_turns = max_rollout_turns
+        self.cache = cache
+        self.last_rollouts = 0  # number of rollouts of the last decision
+        self._log_moves = log.isEnabledFor(MOVE)
+
+    def turn(self, board, dice_roll):
+        moves = board.legal_moves(self.id, dice_roll)
+        # tokens on the same position are interchangeable, e.g. all home tokens
+        candidates = list({board.state[t.slot]: t for t in moves}.values())
+        self.last_rollouts = 0
+        if len(candidates) < 2:
+            if candidates:
+                board.move_token(candidates[0], dice_roll)
+            return
+        key = None
+        if self.cache is not None:
+            # the progress of a token is the same from every seat, unlike its position
+            key = (board.num_players, board.rules, self.max_rollouts, self.time_limit, self.batch_size, self.z,
+                   self.max_rollout_turns, board.canonical_hash(self.id), dice_roll)
+            progress = self.cache.get(key)
+            for token in candidates:
+                if board.get_progress(token) == progress:
+                    board.move_token(token, dice_roll)
+                    return
+        recorder = board.recorder
+        board.recorder = None   # rollouts are not part of the game
+        try:
+            token = self.select_token(board, candidates, dice_roll)
+        finally:
+            board.recorder = recorder
+        if key is not None:
+            self.cache.put(key, board.get_progress(token))
+        board.move_token(token, dice_roll)
+
+    def select_token(self, board, candidates, dice_roll):
+        """
+        Run rollouts for every candidate token and return the best one. The board
+        is left in its original state.
+        """
+        deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        if compile_rules(board.rules).standard_turns:
+            rollout = self.rollout
+        else:
+            def rollout(board):
+                return self._house_rollout(board, dice_roll)
+        root = board.snapshot()
+        n = len(candidates)
+        wins = [0] * n
+        counts = [0] * n
+        active = list(range(n))     # candidates that can still be the best one
+        total = 0
+        while len(active) > 1 and total < self.max_rollouts:
+            for i in active:
+                # the budget is checked before every batch, the last batch is cut to what is left
+                batch = min(self.batch_size, self.max_rollouts - total)
+                if batch <= 0:
+                    break
+                for _ in range(batch):
+                    board.restore(root)
+                    board.apply(candidates[i], dice_roll)
+                    wins[i] += rollout(board)
+                counts[i] += batch
+                total += batch
+            if total >= self.max_rollouts or deadline is not None and time.perf_counter() > deadline:
+                break
+            active = self._contenders(active, wins, counts)
+        board.restore(root)
+        self.last_rollouts = total
+        best = max(active, key=lambda i: wins[i] / counts[i] if counts[i] else 0.)
+        if self._log_moves:
+            log.log(MOVE, "Player %d picks token on %s after %d rollouts, won %d of %d",
+                    self.id, candidates[best].position, total, wins[best], counts[best])
+        return candidates[best]
+
+    def _contenders(self, active, wins, counts):
+        """Return the candidates whose confidence interval overlaps the one of the best candidate"""
+        bounds = {}
+        for i in active:
+            n = counts[i]
+            # add one win and one loss, so intervals of candidates that always or never won have a width
+            p = (wins[i] + 1) / (n + 2)
+            half = self.z * (p * (1 - p) / n) ** .5
+            bounds[i] = (wins[i] / n - half, wins[i] / n + half)
+        best_lower = max(lower for lower, _ in bounds.values())
+        return [i for i in active if bounds[i][1] >= best_lower]
+
+    def rollout(self, board):
+        """
+        Play random moves for all players, starting with the next player, until
+        somebody has won.
+        :return: 1 if this player has won, otherwise 0
+        :rtype: int
+        """
+        num_players = board.num_players
+        if board.has_won(self.id):
+            return 1
+        randint = self.rollout_rng.randint
+        choice = self.rollout_rng.choice
+        apply = board.apply     # not move_token, rollout moves aren't moves of the game
+        player = self.id
+        turns = 0
+        while self.max_rollout_turns is None or turns < self.max_rollout_turns:
+            player += 1
+            if player == num_players:
+                player = 0
+                turns += 1
+            dice_roll = randint(1, 6)
+            moves = board.legal_moves(player, dice_roll)
+            if moves:
+                apply(choice(moves), dice_roll)
+                if board.has_won(player):
+                    return 1 if player == self.id else 0
+        return 0
+
+    def _house_rollout(self, board, dice_roll):
+        """
+        rollout with the roll rules of a variant, like Game turn_steps: several
+        tries to roll a 6 for players without tokens on the fields and another
+        roll after a 6, also for this player after its move with dice_roll.
+        :return: 1 if this player has won, otherwise 0
+        :rtype: int
+        """
+        num_players = board.num_players
+        if board.has_won(self.id):
+            return 1
+        rules = board.rules
+        rolls_when_all_home = rules.rolls_when_all_home
+        extra_roll_on_six = rules.extra_roll_on_six
+        on_fields = board.has_tokens_on_fields
+        randint = self.rollout_rng.randint
+        choice = self.rollout_rng.choice
+        apply = board.apply
+        player = self.id
+        turns = 0
+        again = dice_roll == 6 and extra_roll_on_six
+        while self.max_rollout_turns is None or turns < self.max_rollout_turns:
+            if not again:
+                player += 1
+                if player == num_players:
+                    player = 0
+                    turns += 1
+            again = False
+            tries = 1 if on_fields(player) else rolls_when_all_home
+            while True:
+                roll = randint(1, 6)
+                moves = board.legal_moves(player, roll)
+                if moves:
+                    apply(choice(moves), roll)
+                    if board.has_won(player):
+                        return 1 if player == self.id else 0
+                if roll == 6 and extra_roll_on_six:
+                    tries = 1 if on_fields(player) else rolls_when_all_home
+                    continue
+                tries -= 1
+                if not tries or on_fields(player):
+                    break
+        return 0
+
+
+class TablePlayer(Player):
+    """
+    This player looks up the best move in a table written by Solver.Solver.
+    Tables only cover reduced two player games (see Solver.new_board), in
+    states missing from the table the player moves his furthest figure and
+    logs a warning the first time. The player isn't a built in type, register
+    it with the table to play:
+
+        Registry.register("table", TablePlayer.bind("table.json"))
+    """
+
+    table_path = None
+
+    def __init__(self, id, rng=None, table_path=None):
+        super().__init__(id, rng)
+        if table_path is not None:
+            self.table_path = table_path
+        if self.table_path is None:
+            raise ValueError("TablePlayer needs the path of a table written by Solver")
+        # states of the lookup table, loaded once and shared by all players of the process
+        self.table = Registry.shared_data(("table", self.table_path), self._load_table)
+        self.hits = 0       # decisions taken from the table
+        self.misses = 0     # decisions in states missing from the table
+
+    @classmethod
+    def bind(cls, table_path, name="TablePlayer"):
+        """
+        Return a subclass that plays with the given table, e.g. to register it
+        in Registry and use it by name.
+        :type table_path: str
+        :param name: Class name of the strategy, used e.g. by Profiling
+        :type name: str
+        :rtype: type
+        """
+        return type(name, (cls,), {"table_path": table_path})
+
+    def _load_table(self):
+        with open(self.table_path) as f:
+            return json.load(f)['states']
+
+    def turn(self, board, dice_roll):
+        entry = self.table.get(key_to_string(state_key(board.state, self.id)))
+        if entry is None:
+            if not self.misses:
+                log.warning("Player %d: position not in table %s, moving the furthest token instead",
+                            self.id, self.table_path)
+            self.misses += 1
+            moves = board.legal_moves(self.id, dice_roll)
+            if moves:
+                board.move_token(max(moves, key=board.get_progress), dice_roll)
+            return
+        self.hits += 1
+        code = entry[dice_roll]
+        if code < 0:
+            return
+        for token in board.get_player_tokens(self.id):
+            if board.state[token.slot] == code:
+                board.move_token(token, dice_roll)
+                return
@@ -0,0 +1,189 @@
+"""
+Per phase profiling of games.
+
+A PhaseProfiler measures call counts and cumulative perf_counter_ns time of
+the phases of a player turn: roll, decide, move, capture and win_check. The
+phases are nested (moves happen while a player decides, captures during a
+move) and recorded below the class name of the player, so the results are
+aggregated per strategy. Only the move the game makes counts as move, moves a
+player tries while it decides, like the rollouts of MonteCarloPlayer, which
+use Board.apply, are part of the decision.
+
+Nothing is instrumented unless a profiler is attached to a game: Game only
+checks once per turn whether it has a profiler, and the board methods and the
+dice are wrapped on the board and game instance by attach, so other games keep
+the plain methods.
+
+    profiler = PhaseProfiler()
+    game = Game("first", "last", "random", "random", profiler=profiler)
+    game.run()
+    profiler.write_collapsed("game.folded")     # input for flamegraph.pl or speedscope
+"""
+
+import json
+from time import perf_counter_ns
+
+from Board import is_capture
+
+PHASES = ("roll", "decide", "move", "capture", "win_check")
+
+
+class TimedDice:
+    """
+    Random number generator of a profiled game, measures the time of the last
+    dice roll. Everything else is passed on to the generator of the game.
+    """
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.elapsed = 0    # nanoseconds of the last roll
+
+    def randint(self, a, b):
+        begin = perf_counter_ns()
+        roll = self.rng.randint(a, b)
+        self.elapsed = perf_counter_ns() - begin
+        return roll
+
+    def __getattr__(self, name):
+        return getattr(self.rng, name)
+
+
+class PhaseProfiler:
+    """
+    Collects the time spent in nested phases.
+    """
+
+    def __init__(self):
+        self.stats = {}     # stack of phase names -> [calls, total nanoseconds]
+        self._names = []    # names of the currently open phases
+        self._starts = []   # start times of the currently open phases
+
+    def start(self, phase):
+        """Open a phase below the currently open one"""
+        self._names.append(phase)
+        self._starts.append(perf_counter_ns())
+
+    def stop(self):
+        """Close the innermost open phase"""
+        elapsed = perf_counter_ns() - self._starts.pop()
+        key = tuple(self._names)
+        self._names.pop()
+        entry = self.stats.get(key)
+        if entry is None:
+            self.stats[key] = [1, elapsed]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+
+    def add(self, key, elapsed):
+        """
+        Record a phase timed by the caller. The enclosing phases of the stack get
+        the time as well, but no call.
+        :param key: Stack of phase names, from the outermost to the phase itself
+        :type key: tuple of str
+        :param elapsed: Nanoseconds
+        :type elapsed: int
+        """
+        stats = self.stats
+        for depth in range(1, len(key) + 1):
+            entry = stats.get(key[:depth])
+            if entry is None:
+                entry = stats[key[:depth]] = [0, 0]
+            entry[1] += elapsed
+        entry[0] += 1
+
+    def attach(self, game):
+        """
+        Profile a game: set the profiler of the game, time its dice and the
+        moves and captures of the game on its board.
+        :type game: Game
+        """
+        game.profiler = self
+        game.rng = TimedDice(game.rng)
+        board = game.board
+        move_token = board.move_token
+        place = board._place
+        home_code = board.home_code
+        start, stop = self.start, self.stop
+        moving = [False]    # captures are only timed during a move of the game
+
+        def timed_move_token(token, places=None):
+            start("move")
+            moving[0] = True
+            try:
+                move_token(token, places)
+            finally:
+                moving[0] = False
+                stop()
+
+        def timed_place(token, new_code):
+            if not moving[0] or not is_capture(new_code, home_code):
+                place(token, new_code)
+                return
+            start("capture")
+            try:
+                place(token, new_code)
+            finally:
+                stop()
+
+        board.move_token = timed_move_token
+        board._place = timed_place
+
+    def detach(self, game):
+        """Stop profiling a game and restore the plain board methods"""
+        game.profiler = None
+        if isinstance(game.rng, TimedDice):
+            game.rng = game.rng.rng
+        for name in ("move_token", "_place"):
+            game.board.__dict__.pop(name, None)
+
+    def self_time(self, key):
+        """Time of a phase without the time of the phases nested in it"""
+        children = sum(entry[1] for k, entry in self.stats.items()
+                       if len(k) == len(key) + 1 and k[:len(key)] == key)
+        return self.stats[key][1] - children
+
+    def by_strategy(self):
+        """
+        Return calls and total time of every phase per strategy, summed over
+        all places the phase occurs in.
+        :rtype: dict of str -> dict of str -> dict
+        """
+        result = {}
+        for key, (calls, total) in self.stats.items():
+            if len(key) < 2:
+                continue
+            phases = result.setdefault(key[0], {})
+            entry = phases.setdefault(key[-1], {"calls": 0, "total_ns": 0})
+            entry["calls"] += calls
+            # nested occurrences of the same phase would be counted twice
+            if key[-1] not in key[1:-1]:
+                entry["total_ns"] += total
+        return result
+
+    def as_dict(self):
+        """Return the results as json compatible dict"""
+        return {
+            "stacks": [{"stack": list(key), "calls": calls, "total_ns": total, "self_ns": self.self_time(key)}
+                       for key, (calls, total) in sorted(self.stats.items())],
+            "strategies": self.by_strategy(),
+        }
+
+    def write_json(self, path):
+        """Write the results as json file"""
+        with open(path, "w") as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+    def collapsed(self):
+        """
+        Return the results in the collapsed stack format of flame graph tools,
+        one line per stack with its self time in nanoseconds.
+        :rtype: list of str
+        """
+        return ["{} {}".format(";".join(key), self.self_time(key)) for key in sorted(self.stats)]
+
+    def write_collapsed(self, path):
+        """Write the results in the collapsed stack format"""
+        with open(path, "w") as f:
+            for line in self.collapsed():
+                f.write(line + "\n")
@@ -0,0 +1,150 @@
+"""
+Registry of the player strategies that can be used by name, e.g. in
+Game("first", "random", ...).
+
+Strategies are registered as "module:Class" strings and only imported when a
+player of that type is created for the first time, so a process only pays for
+the imports of the strategies it actually plays. Besides the built in players
+strategies are found in
+- the entry point group ENTRY_POINT_GROUP of installed packages,
+- the environment variable ENV_VAR, a comma separated list of name=module:Class,
+- json config files passed to load_config, {"strategies": {"name": "module:Class"}},
+- calls of register.
+
+Data that is expensive to build and the same for all games, like lookup
+tables, can be kept with shared_data for the lifetime of the process.
+"""
+
+import importlib
+import json
+import os
+
+ENTRY_POINT_GROUP = "mensch.strategies"
+ENV_VAR = "MENSCH_STRATEGIES"
+
+_BUILTIN = {
+    'first': 'Player:FirstPlayer',
+    'last': 'Player:LastPlayer',
+    'random': 'Player:RandomPlayer',
+    'montecarlo': 'Player:MonteCarloPlayer',
+    'human': 'Server:HumanPlayer',
+}
+
+_specs = dict(_BUILTIN)     # strategy name -> "module:Class" or class
+_classes = {}               # strategy name -> imported class
+_data = {}                  # key -> shared data
+_discovered = False
+
+
+def register(name, target):
+    """
+    Register a strategy.
+    :param name: Player type string of the strategy
+    :type name: str
+    :param target: Player subclass or "module:Class" path, the module is imported on first use
+    :type target: str or type
+    """
+    if isinstance(target, str) and ":" not in target:
+        raise ValueError("Strategy path must look like module:Class, got {}".format(target))
+    _specs[name] = target
+    _classes.pop(name, None)
+
+
+def load_config(path):
+    """
+    Register the strategies of a json config file
+    :param path: Path of the config file
+    :type path: str
+    """
+    with open(path) as f:
+        config = json.load(f)
+    for name, target in config.get("strategies", {}).items():
+        register(name, target)
+
+
+def discover():
+    """
+    Register the strategies of installed entry points and of the environment
+    variable. Called automatically before a strategy is looked up for the first
+    time, call it again to pick up changes.
+    """
+    global _discovered
+    _discovered = True
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        entry_points = None
+    if entry_points is not None:
+        eps = entry_points()
+        group = eps.select(group=ENTRY_POINT_GROUP) if hasattr(eps, "select") else eps.get(ENTRY_POINT_GROUP, ())
+        for ep in group:
+            register(ep.name, ep.value)
+    for item in os.environ.get(ENV_VAR, "").split(","):
+        if item.strip():
+            name, _, target = item.partition("=")
+            register(name.strip(), target.strip())
+
+
+def available():
+    """Return the names of all registered strategies"""
+    if not _discovered:
+        discover()
+    return sorted(_specs)
+
+
+def get_strategy(name):
+    """
+    Return the player class of a strategy, importing its module if necessary.
+    :param name: Player type string
+    :type name: str
+    :raises TypeError: If no strategy with this name is registered
+    :rtype: type
+    """
+    cls = _classes.get(name)
+    if cls is not None:
+        return cls
+    if name not in _specs and not _discovered:
+        discover()
+    target = _specs.get(name)
+    if target is None:
+        raise TypeError("Player type {} not known".format(name))
+    if isinstance(target, str):
+        module_name, _, class_name = target.partition(":")
+        cls = getattr(importlib.import_module(module_name), class_name)
+    else:
+        cls = target
+    _classes[name] = cls
+    return cls
+
+
+def create_player(name, player_id, rng=None):
+    """
+    Create a player of a registered strategy
+    :param name: Player type string
+    :type name: str
+    :param player_id: Seat of the player
+    :type player_id: int
+    :param rng: Random number generator passed to the player
+    :type rng: random.Random
+    :rtype: Player
+    """
+    return get_strategy(name)(player_id, rng)
+
+
+def shared_data(key, factory):
+    """
+    Return data that is shared by all players of the process, building it with
+    factory on first use.
+    :param key: Hashable key of the data, e.g. (strategy name, file path)
+    :param factory: Function without arguments that builds the data
+    """
+    try:
+        return _data[key]
+    except KeyError:
+        value = _data[key] = factory()
+        return value
+
+
+def clear_shared_data():
+    """Drop all shared data, e.g. after a lookup table file changed"""
+    _data.clear()
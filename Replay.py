@@ -0,0 +1,167 @@
+"""
+Deterministic replay of single games.
+
+A game is reproduced either by playing it again from the seed of its random
+number generator (see Simulation.game_seed) or from its recorded moves, e.g.
+from an event log. Replaying recorded moves applies them directly to a board
+without asking the strategies. While the moves are applied once, a board
+snapshot is stored every snapshot_interval moves, so jumping to any turn
+restores the closest snapshot and applies at most snapshot_interval moves.
+"""
+
+import random
+from bisect import bisect_left
+from collections import namedtuple
+
+from Board import Board, HOME_CODE
+from Game import Game
+from Player import Player
+import EventLog
+
+# one player turn, from_code is the position code of the moved token or -1 if the player didn't move
+Move = namedtuple("Move", "turn player roll from_code")
+
+
+class MoveListRecorder:
+    """
+    Recorder for Game that keeps the moves of a single game in memory instead
+    of writing them to a file, see EventLog.EventRecorder.
+    """
+
+    def __init__(self):
+        self.moves = []
+        self.winner = None
+        self._from = -1
+
+    def new_game(self):
+        self.moves = []
+        self.winner = None
+        return 0
+
+    def token_moved(self, token, old_code, new_code):
+        if new_code != HOME_CODE:
+            # tokens moving home are captured ones, they are restored by replaying the capturing move
+            self._from = old_code
+
+    def record_turn(self, turn, player_id, dice_roll):
+        self.moves.append(Move(turn, player_id, dice_roll, self._from))
+        self._from = -1
+
+    def win(self, player_id):
+        self.winner = player_id
+
+
+class Replay:
+    """
+    Recorded moves of one game that can be applied to a board up to any turn.
+    """
+
+    def __init__(self, moves, num_players=4, snapshot_interval=32):
+        """
+        :param moves: Moves of the game in the order they were played
+        :type moves: iterable of Move
+        :param num_players: Number of players in the game
+        :type num_players: int
+        :param snapshot_interval: Number of moves between two snapshots
+        :type snapshot_interval: int
+        """
+        self.moves = list(moves)
+        self.snapshot_interval = snapshot_interval
+        self.board = Board([Player(i) for i in range(num_players)])
+        self.game = None    # the Game that was played again, only set by from_seed
+        self._turns = [move.turn for move in self.moves]
+        # snapshots[i] is the board before the move with index i * snapshot_interval
+        self.snapshots = []
+        for index, move in enumerate(self.moves):
+            if index % snapshot_interval == 0:
+                self.snapshots.append(self.board.snapshot())
+            self._apply(move)
+        if not self.snapshots:
+            self.snapshots.append(self.board.snapshot())
+        self.position = len(self.moves)     # number of moves applied to the board
+
+    @classmethod
+    def from_seed(cls, player_types, seed, max_turns=1000, snapshot_interval=32):
+        """
+        Play a game again with the random number generator seeded with seed and
+        record its moves.
+        :param player_types: Player type string for every seat
+        :type player_types: sequence of str
+        :param seed: Seed of the game, e.g. from Simulation.game_seed
+        :type seed: int
+        :rtype: Replay
+        """
+        recorder = MoveListRecorder()
+        game = Game(*player_types, rng=random.Random(seed), recorder=recorder)
+        game.run(max_turns)
+        replay = cls(recorder.moves, len(game.players), snapshot_interval)
+        replay.game = game
+        return replay
+
+    @classmethod
+    def from_event_log(cls, path, game_id, num_players=4, snapshot_interval=32):
+        """
+        Read the moves of one game from an event log written by EventLog.EventRecorder.
+        The log is memory mapped and the game looked up by binary search, requires NumPy.
+        :param path: Path of the event log
+        :type path: str
+        :param game_id: Id of the game in the log
+        :type game_id: int
+        :rtype: Replay
+        """
+        events = EventLog.load_events(path)
+        games = events['game']
+        # a recorder numbers the games in the order they are played, so the records
+        # are sorted by game id and the game is found without reading the whole log
+        start = games.searchsorted(game_id, 'left') if game_id >= 0 else 0
+        stop = games.searchsorted(game_id, 'right') if game_id >= 0 else 0
+        records = events[start:stop]
+        records = records[records['kind'] == EventLog.MOVE]
+        moves = [Move(*move) for move in zip(records['turn'].tolist(), records['player'].tolist(),
+                                             records['roll'].tolist(), records['from_code'].tolist())]
+        if not moves:
+            raise ValueError("No moves of game {} in {}".format(game_id, path))
+        return cls(moves, num_players, snapshot_interval)
+
+    def _apply(self, move):
+        """Apply a recorded move to the board"""
+        if move.from_code < 0:
+            return
+        board = self.board
+        for token in board.get_player_tokens(move.player):
+            if board.state[token.slot] == move.from_code:
+                board.move_token(token, move.roll)
+                return
+        raise ValueError("Recorded move {} doesn't fit the board".format(move))
+
+    def seek_move(self, index):
+        """
+        Set the board to the state before the move with the given index, or to
+        the final state if index is the number of moves.
+        :type index: int
+        :rtype: Board
+        """
+        if not 0 <= index <= len(self.moves):
+            raise IndexError("Move index out of range")
+        snapshot_index = min(index // self.snapshot_interval, len(self.snapshots) - 1)
+        start = snapshot_index * self.snapshot_interval
+        if not start <= self.position <= index:
+            # can't get there by moving forward from the current position
+            self.board.restore(self.snapshots[snapshot_index])
+            self.position = start
+        for move in self.moves[self.position:index]:
+            self._apply(move)
+        self.position = index
+        return self.board
+
+    def seek(self, turn):
+        """
+        Set the board to the state at the start of a turn. Turns are counted
+        from 1, like Game.turns.
+        :type turn: int
+        :rtype: Board
+        """
+        return self.seek_move(bisect_left(self._turns, turn))
+
+    def __len__(self):
+        return len(self.moves)
@@ -0,0 +1,86 @@
+"""
+Board geometry and rule variants.
+
+A RuleSpec describes a variant of the game: the number of seats, the number
+of fields between two start fields and the house rules. Boards and games don't
+look at the spec itself but at its compiled form, which holds the tables the
+board works with (start and target fields, position codes, transition table,
+token categories and progress). Specs are compiled once per process, all
+boards with the same spec share the compiled tables, so a variant board runs
+the same code as the default board and pays nothing for rule flags.
+
+    rules = RuleSpec(seats=6, mandatory_capture=True)
+    game = Game("first", "random", "random", "last", "random", "random", rules=rules)
+
+House rules:
+- mandatory_capture: if a move captures a token, only capturing moves are legal
+- rolls_when_all_home: number of rolls a player gets to roll a 6 while none of
+  its tokens is on a field of the board
+- extra_roll_on_six: a player rolls again after rolling a 6
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+from Transitions import transition_table
+
+# token categories, index into the per player token masks of the board
+ON_BOARD, IN_TARGET, IN_HOME = 0, 1, 2
+
+RuleSpec = namedtuple("RuleSpec", "seats fields_per_seat mandatory_capture rolls_when_all_home extra_roll_on_six",
+                      defaults=(4, 10, False, 1, False))
+DEFAULT_RULES = RuleSpec()
+
+
+class CompiledRules:
+    """
+    Lookup tables of a RuleSpec, built by compile_rules.
+    """
+
+    def __init__(self, spec):
+        """
+        :type spec: RuleSpec
+        """
+        self.spec = spec
+        self.seats = spec.seats
+        self.num_fields = spec.seats * spec.fields_per_seat
+        self.target_code = self.num_fields          # code of the first target position
+        self.home_code = self.num_fields + 4        # code of a token in its home
+        self.start_fields = tuple(seat * spec.fields_per_seat for seat in range(spec.seats))
+        self.target_fields = tuple((start - 1) % self.num_fields for start in self.start_fields)
+        # destination code for every seat, position code and dice roll
+        self.transitions = transition_table(self.start_fields, self.target_fields, self.num_fields)
+        # category of every position code
+        self.category = tuple(ON_BOARD if code < self.target_code else IN_TARGET if code < self.home_code
+                              else IN_HOME for code in range(self.home_code + 1))
+        # number of steps a token has taken from its start field for every position code, per seat
+        self.progress = tuple(
+            tuple(-1 if code == self.home_code else code if code >= self.target_code
+                  else (code - start) % self.num_fields for code in range(self.home_code + 1))
+            for start in self.start_fields)
+        # the default rules are a single roll per turn
+        self.standard_turns = spec.rolls_when_all_home == 1 and not spec.extra_roll_on_six
+        # recorders, replays and statistics only know the position codes of the default board
+        self.default_geometry = (spec.seats, spec.fields_per_seat) == (DEFAULT_RULES.seats,
+                                                                       DEFAULT_RULES.fields_per_seat)
+
+
+@lru_cache(maxsize=None)
+def compile_rules(spec=DEFAULT_RULES):
+    """
+    Compile a rule spec into the tables used by Board and Game. Compiled
+    rules are cached, compiling the same spec again returns the same object.
+    :type spec: RuleSpec
+    :rtype: CompiledRules
+    :raises ValueError: If the spec doesn't describe a playable board
+    """
+    if spec.seats < 1:
+        raise ValueError("A board needs at least one seat")
+    if spec.fields_per_seat < 1:
+        raise ValueError("A board needs at least one field per seat")
+    if spec.seats * spec.fields_per_seat + 4 > 127:
+        # position codes are stored in a signed byte array
+        raise ValueError("Board with {} fields is too large".format(spec.seats * spec.fields_per_seat))
+    if spec.rolls_when_all_home < 1:
+        raise ValueError("Players need at least one roll per turn")
+    return CompiledRules(spec)
@@ -0,0 +1,303 @@
+"""
+Host for many concurrent games with human and bot seats.
+
+GameHost runs every game as a coroutine in one asyncio event loop. Bots
+decide right away, bots marked cpu_heavy (e.g. MonteCarloPlayer) decide in an
+executor so the loop keeps serving the other games, and human seats are asked
+for their move through a message queue and awaited without blocking anything.
+
+Clients talk to the host with json messages, one object per line over TCP
+(serve) or directly in the same process (LocalClient):
+
+    client -> host  {"type": "new_game", "seats": ["human", "random", "first", "random"]}
+    host -> client  {"type": "game", "game": 0, "seats": [0]}
+    host -> client  {"type": "your_turn", "game": 0, "seat": 0, "roll": 6, "state": [...], "moves": [0, 1, 2, 3]}
+    client -> host  {"type": "move", "game": 0, "seat": 0, "slot": 1}
+    host -> client  {"type": "end", "game": 0, "winner": 2, "turns": 41}
+
+state holds the position codes of all tokens (see Board.state), moves the
+state slots of the tokens the player may move. A seat can only be moved by
+the client it belongs to and only while it has an open "your_turn" prompt.
+Invalid messages are answered with {"type": "error", "message": ...}.
+
+When a client disconnects, the games it has a human seat in are cancelled and
+the other clients of these games get an end message without winner:
+
+    host -> client  {"type": "end", "game": 0, "winner": null, "turns": 12, "cancelled": true}
+"""
+
+import asyncio
+import json
+import random
+
+from Game import Game
+from Player import Player
+
+
+class HumanPlayer(Player):
+    """
+    Seat of a human. The moves are made by GameHost with the choices
+    received from the client, so the player can't take a turn on its own.
+    """
+
+    def turn(self, board, dice_roll):
+        raise RuntimeError("Human players can only play in games hosted by Server.GameHost")
+
+
+class Seat:
+    """Connection between a human seat of a hosted game and its client"""
+
+    def __init__(self, game_id, seat, send):
+        """
+        :param send: Coroutine function that delivers a message dict to the client
+        """
+        self.game_id = game_id
+        self.seat = seat
+        self.send = send
+        self.moves = asyncio.Queue()    # state slots chosen by the client
+        self.prompt = None              # your_turn message waiting for a move, None if no move is expected
+        self.connected = True           # False once the client left
+
+
+class GameHost:
+    """
+    Runs games as coroutines in the event loop it is used in.
+    """
+
+    def __init__(self, executor=None, max_turns=1000, seed=None):
+        """
+        :param executor: Executor for the decisions of cpu heavy bots, None uses the default executor of the loop
+        :type executor: concurrent.futures.Executor
+        :param max_turns: Games are stopped without winner after this many turns
+        :type max_turns: int
+        :param seed: Seed for the random number generators of the games
+        :type seed: int or None
+        """
+        self.executor = executor
+        self.max_turns = max_turns
+        self._rng = random.Random(seed)
+        self._next_id = 0
+        self.games = {}     # game id -> Game, while it is running
+        self.tasks = {}     # game id -> asyncio.Task playing the game, while it is running
+        self.seats = {}     # (game id, seat) -> Seat of a human player
+
+    def start_game(self, seat_types, send=None):
+        """
+        Create a game and start playing it.
+        :param seat_types: Player type of every seat, "human" for seats played by the client
+        :type seat_types: sequence of str
+        :param send: Coroutine function delivering messages to the client of the human seats
+        :return: Id of the game
+        :rtype: int
+        """
+        game_id = self._next_id
+        self._next_id += 1
+        game = Game(*seat_types, rng=random.Random(self._rng.getrandbits(64)))
+        for player in game.players:
+            if isinstance(player, HumanPlayer):
+                if send is None:
+                    raise ValueError("Games with human seats need a client")
+                self.seats[game_id, player.id] = Seat(game_id, player.id, send)
+        self.games[game_id] = game
+        task = self.tasks[game_id] = asyncio.ensure_future(self._play(game_id, game))
+        # also runs for games cancelled before their first step
+        task.add_done_callback(lambda _: self._remove(game_id))
+        return game_id
+
+    def _remove(self, game_id):
+        """Forget a game that is over"""
+        for key in [key for key in self.seats if key[0] == game_id]:
+            del self.seats[key]
+        del self.games[game_id]
+        del self.tasks[game_id]
+
+    async def submit(self, game_id, seat, slot, send):
+        """
+        Hand the move of a human seat to its game
+        :param send: Send function of the client making the move
+        :raises KeyError: If there is no human seat with that id
+        :raises ValueError: If the seat belongs to another client or doesn't have to move
+        """
+        human = self.seats[game_id, seat]
+        if human.send is not send:
+            raise ValueError("Seat {} of game {} belongs to another client".format(seat, game_id))
+        if human.prompt is None:
+            raise ValueError("Seat {} of game {} doesn't have to move".format(seat, game_id))
+        await human.moves.put(slot)
+
+    def result(self, game_id):
+        """
+        Return the task of a running game, awaiting it returns the id of the
+        winner, None if the game was stopped by max_turns
+        :rtype: asyncio.Task
+        :raises KeyError: If the game doesn't exist or is already over
+        """
+        return self.tasks[game_id]
+
+    def cancel(self, game_id):
+        """
+        Stop a game without result, its clients get an end message marked as
+        cancelled. Games that are already over are ignored.
+        """
+        task = self.tasks.get(game_id)
+        if task is not None:
+            task.cancel()
+
+    def drop_client(self, send):
+        """Cancel all games a client has a human seat in, e.g. after it disconnected"""
+        game_ids = set()
+        for seat in self.seats.values():
+            if seat.send is send:
+                seat.connected = False
+                game_ids.add(seat.game_id)
+        for game_id in game_ids:
+            self.cancel(game_id)
+
+    async def _play(self, game_id, game):
+        """Play a game to the end with the turn steps of Game, like Game.run"""
+        board = game.board
+        loop = asyncio.get_running_loop()
+        clients = []    # send functions of the clients of the human seats
+        for (seat_game, _), seat in self.seats.items():
+            if seat_game == game_id and seat.send not in clients:
+                clients.append(seat.send)
+        for send in clients:
+            await send({"type": "game", "game": game_id,
+                        "seats": [s for (g, s) in self.seats if g == game_id and self.seats[g, s].send is send]})
+        try:
+            while game.game_running and game.turns < self.max_turns:
+                for player, dice_roll in game.turn_steps():
+                    if isinstance(player, HumanPlayer):
+                        await self._human_turn(self.seats[game_id, player.id], board, dice_roll)
+                    elif player.cpu_heavy:
+                        await loop.run_in_executor(self.executor, player.turn, board, dice_roll)
+                    else:
+                        player.turn(board, dice_roll)
+                # let the other games run
+                await asyncio.sleep(0)
+        except asyncio.CancelledError:
+            # clients that are still there would otherwise wait for the game forever
+            for send in clients:
+                if any(seat.connected for (g, _), seat in self.seats.items() if g == game_id and seat.send is send):
+                    await send({"type": "end", "game": game_id, "winner": None, "turns": game.turns,
+                                "cancelled": True})
+            raise
+        winner = game.winner.id if game.winner is not None else None
+        for send in clients:
+            await send({"type": "end", "game": game_id, "winner": winner, "turns": game.turns})
+        return winner
+
+    async def _human_turn(self, seat, board, dice_roll):
+        """Ask the client for a move until it sends a legal one"""
+        moves = board.legal_moves(seat.seat, dice_roll)
+        if not moves:
+            return
+        slots = [token.slot for token in moves]
+        prompt = {"type": "your_turn", "game": seat.game_id, "seat": seat.seat, "roll": dice_roll,
+                  "state": list(board.state), "moves": slots}
+        while True:
+            # moves sent before the prompt don't answer it
+            while not seat.moves.empty():
+                seat.moves.get_nowait()
+            seat.prompt = prompt
+            try:
+                await seat.send(prompt)
+                slot = await seat.moves.get()
+            finally:
+                seat.prompt = None
+            if slot in slots:
+                board.move_token(moves[slots.index(slot)], dice_roll)
+                return
+            await seat.send({"type": "error", "message": "Token {} can't be moved".format(slot)})
+
+
+class Session:
+    """
+    Message handling for one client, independent of the transport.
+    """
+
+    def __init__(self, host, send):
+        """
+        :type host: GameHost
+        :param send: Coroutine function delivering a message dict to the client
+        """
+        self.host = host
+        self.send = send
+
+    async def handle(self, message):
+        """Process one message of the client"""
+        kind = message.get("type") if isinstance(message, dict) else None
+        try:
+            if kind == "new_game":
+                # the game announces itself to the client before the first turn
+                self.host.start_game(list(message["seats"]), self.send)
+            elif kind == "move":
+                await self.host.submit(message["game"], message["seat"], message["slot"], self.send)
+            else:
+                await self.send({"type": "error", "message": "Unknown message type {}".format(kind)})
+        except KeyError as e:
+            await self.send({"type": "error", "message": "Missing or unknown {}".format(e)})
+        except (TypeError, ValueError) as e:
+            await self.send({"type": "error", "message": str(e)})
+
+    def close(self):
+        """End the session, the games the client plays in are cancelled"""
+        self.host.drop_client(self.send)
+
+
+class LocalClient:
+    """
+    Client in the same process as the host, e.g. for tests. Messages are
+    passed as dicts without any serialization.
+    """
+
+    def __init__(self, host):
+        """
+        :type host: GameHost
+        """
+        self.inbox = asyncio.Queue()
+        self.session = Session(host, self.inbox.put)
+
+    async def send(self, message):
+        await self.session.handle(message)
+
+    async def receive(self):
+        """Wait for the next message of the host"""
+        return await self.inbox.get()
+
+
+async def serve(host, address="127.0.0.1", port=0):
+    """
+    Serve the host over TCP with one json message per line.
+    :type host: GameHost
+    :return: The server, its address is in server.sockets
+    :rtype: asyncio.AbstractServer
+    """
+    async def connection(reader, writer):
+        lock = asyncio.Lock()
+
+        async def send(message):
+            if writer.is_closing():
+                # the client left, its games are cancelled
+                return
+            async with lock:
+                writer.write(json.dumps(message).encode() + b"\n")
+                await writer.drain()
+
+        session = Session(host, send)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    await send({"type": "error", "message": "Invalid json"})
+                    continue
+                await session.handle(message)
+        finally:
+            session.close()
+            writer.close()
+
+    return await asyncio.start_server(connection, address, port)
@@ -0,0 +1,237 @@
+"""
+Headless batch simulation. Plays complete games back to back without any
+terminal interaction and collects aggregate results.
+"""
+
+import random
+from Game import Game
+from Rules import compile_rules
+
+
+class SimulationResult:
+    """
+    Aggregated results of a batch of games. Results of several batches can be
+    combined with merge.
+    """
+
+    def __init__(self, player_types):
+        """
+        :param player_types: Player type string for every seat, in seat order
+        :type player_types: tuple of str
+        """
+        self.player_types = tuple(player_types)
+        self.games = 0
+        self.unfinished = 0  # games stopped by the turn limit without a winner
+        self.seat_wins = [0] * len(self.player_types)
+        self.strategy_wins = {player_type: 0 for player_type in self.player_types}
+        self.total_turns = 0
+        self.min_turns = None
+        self.max_turns = None
+        self.turn_counts = {}  # number of turns -> number of games that took that long
+        self.stats = None  # Statistics.GameStats if statistics were collected
+
+    def add_game(self, game):
+        """Add the outcome of a finished (or stopped) game to the result"""
+        self.add_outcome(game.winner.id if game.winner is not None else None, game.turns)
+
+    def add_outcome(self, winner, turns):
+        """
+        Add the outcome of one game to the result
+        :param winner: Seat of the winning player, None if the game was stopped without a winner
+        :type winner: int or None
+        :param turns: Number of turns the game took
+        :type turns: int
+        """
+        self.games += 1
+        self.total_turns += turns
+        self.turn_counts[turns] = self.turn_counts.get(turns, 0) + 1
+        if self.min_turns is None or turns < self.min_turns:
+            self.min_turns = turns
+        if self.max_turns is None or turns > self.max_turns:
+            self.max_turns = turns
+        if winner is None:
+            self.unfinished += 1
+        else:
+            self.seat_wins[winner] += 1
+            self.strategy_wins[self.player_types[winner]] += 1
+
+    def merge(self, other):
+        """
+        Add the results of another batch played with the same player types.
+        :type other: SimulationResult
+        :return: self
+        """
+        if other.player_types != self.player_types:
+            raise ValueError("Can't merge results of different player types")
+        self.games += other.games
+        self.unfinished += other.unfinished
+        self.seat_wins = [a + b for a, b in zip(self.seat_wins, other.seat_wins)]
+        for player_type, wins in other.strategy_wins.items():
+            self.strategy_wins[player_type] += wins
+        self.total_turns += other.total_turns
+        for turns, count in other.turn_counts.items():
+            self.turn_counts[turns] = self.turn_counts.get(turns, 0) + count
+        for attr, pick in (("min_turns", min), ("max_turns", max)):
+            values = [v for v in (getattr(self, attr), getattr(other, attr)) if v is not None]
+            setattr(self, attr, pick(values) if values else None)
+        if other.stats is not None:
+            if self.stats is None:
+                self.stats = other.stats
+            else:
+                self.stats.merge(other.stats)
+        return self
+
+    @property
+    def mean_turns(self):
+        """Average number of turns per game"""
+        return self.total_turns / self.games if self.games else 0.
+
+    def as_dict(self):
+        """Return the result as a dict of plain python types, e.g. for json export"""
+        result = {
+            "player_types": list(self.player_types),
+            "games": self.games,
+            "unfinished": self.unfinished,
+            "seat_wins": list(self.seat_wins),
+            "strategy_wins": dict(self.strategy_wins),
+            "mean_turns": self.mean_turns,
+            "min_turns": self.min_turns,
+            "max_turns": self.max_turns,
+            "turn_counts": {str(k): v for k, v in sorted(self.turn_counts.items())},
+        }
+        if self.stats is not None:
+            result["stats"] = self.stats.as_dict()
+        return result
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuild a result from the return value of as_dict. Statistics are not restored.
+        :type data: dict
+        :rtype: SimulationResult
+        """
+        result = cls(data["player_types"])
+        result.games = data["games"]
+        result.unfinished = data["unfinished"]
+        result.seat_wins = list(data["seat_wins"])
+        result.strategy_wins = dict(data["strategy_wins"])
+        result.min_turns = data["min_turns"]
+        result.max_turns = data["max_turns"]
+        result.turn_counts = {int(turns): count for turns, count in data["turn_counts"].items()}
+        result.total_turns = sum(turns * count for turns, count in result.turn_counts.items())
+        return result
+
+    def __eq__(self, other):
+        return isinstance(other, SimulationResult) and self.as_dict() == other.as_dict()
+
+    def __repr__(self):
+        return "SimulationResult(games={}, seat_wins={}, mean_turns={:.1f})".format(
+            self.games, self.seat_wins, self.mean_turns)
+
+
+def _derive_seeds(seed, n):
+    """Derive n independent 64 bit seeds from the master seed"""
+    master = random.Random(seed)
+    return [master.getrandbits(64) for _ in range(n)]
+
+
+def _simulate_chunk(args, recorder=None, profiler=None):
+    """
+    Play one chunk of games with its own random number generator. Runs in the
+    worker processes, so it has to be a module level function.
+    """
+    n_games, player_types, chunk_seed, max_turns, collect_stats, rules = args
+    result = SimulationResult(player_types)
+    if collect_stats:
+        from Statistics import GameStats
+        recorder = result.stats = GameStats(len(player_types), max_turns or 1000)
+    for game_seed in _derive_seeds(chunk_seed, n_games):
+        game = Game(*player_types, rng=random.Random(game_seed), recorder=recorder, profiler=profiler, rules=rules)
+        game.run(max_turns)
+        result.add_game(game)
+        if collect_stats:
+            result.stats.add_game(game)
+    return result
+
+
+def game_seed(seed, game_index, chunk_size=1000):
+    """
+    Return the seed of the random number generator of a single game of a
+    simulation. Passing it to Game via random.Random reproduces that game.
+    :param seed: Master seed of the simulation
+    :type seed: int
+    :param game_index: Index of the game in the simulation, starting at 0
+    :type game_index: int
+    :param chunk_size: Chunk size of the simulation
+    :type chunk_size: int
+    :rtype: int
+    """
+    chunk, index = divmod(game_index, chunk_size)
+    chunk_seed = _derive_seeds(seed, chunk + 1)[chunk]
+    return _derive_seeds(chunk_seed, index + 1)[index]
+
+
+def simulate(n_games, player_types, seed=None, max_turns=1000, workers=1, chunk_size=1000, recorder=None,
+             profiler=None, stats=False, rules=None):
+    """
+    Play n_games complete games with the given player types and return the
+    aggregated results. Nothing is printed and no input is required.
+
+    The games are split into chunks of chunk_size games. Every chunk gets its own
+    seed, derived from the master seed, and every game a random number generator
+    seeded from the chunk seed. So the results for a given seed and chunk_size
+    are identical regardless of the number of workers, and single games can be
+    reproduced with game_seed.
+    :param n_games: Number of games to play
+    :type n_games: int
+    :param player_types: Player type string for every seat, see Game.create_player
+    :type player_types: sequence of str
+    :param seed: Master seed. None draws a fresh one from the operating system.
+    :type seed: int or None
+    :param max_turns: Games that take more turns than this are stopped without a winner.
+    Required since strategies that don't move would never finish.
+    :type max_turns: int or None
+    :param workers: Number of worker processes. 1 plays all games in this process.
+    :type workers: int
+    :param chunk_size: Number of games per chunk
+    :type chunk_size: int
+    :param recorder: Record the events of all games. Only possible with a single worker.
+    :type recorder: EventLog.EventRecorder
+    :param profiler: Profile the phases of all games. Only possible with a single worker.
+    :type profiler: Profiling.PhaseProfiler
+    :param stats: Collect game length, capture and field occupancy statistics in
+    the stats attribute of the result, see Statistics.GameStats. Requires NumPy.
+    :type stats: bool
+    :param rules: Board geometry and house rules of the games, the default game if None.
+    Events and statistics can only be recorded for the default geometry.
+    :type rules: Rules.RuleSpec
+    :rtype: SimulationResult
+    """
+    if recorder is not None and workers != 1:
+        raise ValueError("Recording events is only possible with a single worker")
+    if profiler is not None and workers != 1:
+        raise ValueError("Profiling is only possible with a single worker")
+    if stats and recorder is not None:
+        raise ValueError("Statistics can't be collected while recording events")
+    if (stats or recorder is not None) and rules is not None and not compile_rules(rules).default_geometry:
+        raise ValueError("Events and statistics can only be recorded on the default board")
+    player_types = tuple(player_types)
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(64)
+    n_chunks = -(-n_games // chunk_size)
+    sizes = [chunk_size] * (n_games // chunk_size)
+    if n_games % chunk_size:
+        sizes.append(n_games % chunk_size)
+    chunks = [(size, player_types, chunk_seed, max_turns, stats, rules)
+              for size, chunk_seed in zip(sizes, _derive_seeds(seed, n_chunks))]
+
+    result = SimulationResult(player_types)
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            result.merge(_simulate_chunk(chunk, recorder, profiler))
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk_result in executor.map(_simulate_chunk, chunks):
+                result.merge(chunk_result)
+    return result
@@ -0,0 +1,276 @@
+"""
+Exact win probabilities for reduced games.
+
+With two players (seats 0 and 1) and only one or two tokens per player the
+number of reachable positions is small enough to solve the game exactly. The
+remaining tokens of every player start in the deepest target positions, so
+they are finished from the beginning and a real Board plays the reduced game
+with the normal rules.
+
+Every state is identified by state_key: the player to move followed by the
+sorted position codes (see Board.state) of the tokens of both players. Tokens
+of a player are interchangeable, sorting makes equal positions share one key.
+Captures send tokens back home, so the game graph has cycles and the values
+are computed by value iteration instead of a plain recursive expectimax.
+
+    solver = Solver(tokens=1)
+    solver.solve()
+    solver.save("table.json")
+
+The saved table is loaded by Player.TablePlayer. One token per player gives a
+few thousand states that are solved in a second, two tokens give about 1.5
+million states and take several minutes.
+"""
+
+import json
+from array import array
+from collections import deque
+
+from Transitions import NUM_FIELDS, TARGET_CODE, HOME_CODE, ILLEGAL, transition_table
+
+START_FIELDS = (0, 10)
+TARGET_FIELDS = (39, 9)
+WIN = -1    # successor index of a move that wins the game
+
+
+def initial_codes(tokens):
+    """
+    Position codes of the four tokens of a player at the start of a reduced game
+    :param tokens: Number of tokens in play, the others start in the target
+    :type tokens: int
+    :rtype: tuple of int
+    """
+    return (HOME_CODE,) * tokens + tuple(range(TARGET_CODE + 3, TARGET_CODE + tokens - 1, -1))
+
+
+def new_board(players, tokens):
+    """
+    Create a board for a reduced game with the tokens that are not in play
+    already in the target.
+    :param players: The two players of the game
+    :type players: list of Player
+    :param tokens: Number of tokens in play per player
+    :type tokens: int
+    :rtype: Board
+    """
+    from Board import Board
+    board = Board(players)
+    codes = initial_codes(tokens)
+    for player_tokens in board.tokens:
+        for token, code in zip(player_tokens, codes):
+            if code != HOME_CODE:
+                board._place(token, code)
+    return board
+
+
+def state_key(state, player_id):
+    """
+    Canonical key of a position.
+    :param state: Position codes of all tokens, e.g. Board.state of a two player board
+    :type state: sequence of int
+    :param player_id: Player to move
+    :type player_id: int
+    :rtype: tuple of int
+    """
+    return (player_id,) + tuple(sorted(state[0:4])) + tuple(sorted(state[4:8]))
+
+
+def key_to_string(key):
+    """Key of a state as used in the json table"""
+    return " ".join(map(str, key))
+
+
+def moves(key, roll, table=None):
+    """
+    All distinct moves of the player to move with the same rules as Board.legal_moves
+    and Board.move_token.
+    :param key: State key
+    :type key: tuple of int
+    :param roll: Dice roll
+    :type roll: int
+    :return: Position code of the moved token and key of the following state, with
+    the other player to move. Empty if the player can't move.
+    :rtype: list of (int, tuple)
+    """
+    if table is None:
+        table = transition_table(START_FIELDS, TARGET_FIELDS)
+    player = key[0]
+    own = list(key[1 + 4 * player:5 + 4 * player])
+    other = list(key[5 - 4 * player:9 - 4 * player])
+    froms = []
+    if roll == 6 and HOME_CODE in own and START_FIELDS[player] not in own:
+        # leaving the home is mandatory
+        froms.append(HOME_CODE)
+    else:
+        for code in own:
+            if code < TARGET_CODE and code not in froms:
+                new_code = table[player][code][roll]
+                if new_code != ILLEGAL and new_code not in own:
+                    froms.append(code)
+    result = []
+    for code in froms:
+        new_code = table[player][code][roll]
+        new_own = list(own)
+        new_own[new_own.index(code)] = new_code
+        new_other = [HOME_CODE if c == new_code else c for c in other] if new_code < NUM_FIELDS else other
+        codes = (new_own, new_other) if player == 0 else (new_other, new_own)
+        result.append((code, (1 - player,) + tuple(sorted(codes[0])) + tuple(sorted(codes[1]))))
+    return result
+
+
+def has_won(key, player_id):
+    """Check if all tokens of a player are in the target"""
+    return all(TARGET_CODE <= code < HOME_CODE for code in key[1 + 4 * player_id:5 + 4 * player_id])
+
+
+class Solver:
+    """
+    Value iteration over all states reachable from the start of a reduced
+    two player game.
+    """
+
+    def __init__(self, tokens=1):
+        """
+        :param tokens: Number of tokens per player, 1 or 2
+        :type tokens: int
+        """
+        if not 1 <= tokens <= 2:
+            raise ValueError("Only games with 1 or 2 tokens per player can be solved")
+        self.tokens = tokens
+        self.keys = []      # state key for every state index
+        self.index = {}     # transposition table, state key -> state index
+        # for state i and roll r the moves are stored in slots (6 * i + r - 1) * tokens ...,
+        # as code of the moved token and index of the following state. Unused slots have from code ILLEGAL.
+        self._from = array('b')
+        self._next = array('l')
+        self.values = None  # win probability of the player to move for every state
+        self._explore()
+
+    @property
+    def start_key(self):
+        """Key of the first state of a game"""
+        codes = initial_codes(self.tokens)
+        return state_key(codes + codes, 0)
+
+    def _explore(self):
+        """Find all reachable states and their moves, breadth first from the start"""
+        table = transition_table(START_FIELDS, TARGET_FIELDS)
+        index, keys = self.index, self.keys
+        index[self.start_key] = 0
+        keys.append(self.start_key)
+        queue = deque([self.start_key])
+        width = self.tokens
+        while queue:
+            key = queue.popleft()
+            player = key[0]
+            for roll in range(1, 7):
+                found = moves(key, roll, table)
+                if not found:
+                    # the player can't move, the same position with the other player to move
+                    found = [(ILLEGAL, (1 - player,) + key[1:])]
+                for code, next_key in found:
+                    if has_won(next_key, player):
+                        self._from.append(code)
+                        self._next.append(WIN)
+                        continue
+                    if next_key not in index:
+                        index[next_key] = len(keys)
+                        keys.append(next_key)
+                        queue.append(next_key)
+                    self._from.append(code)
+                    self._next.append(index[next_key])
+                for _ in range(width - len(found)):
+                    self._from.append(ILLEGAL)
+                    self._next.append(WIN)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def solve(self, tolerance=1e-12, max_sweeps=100000):
+        """
+        Compute the win probability of every state by Gauss-Seidel value iteration.
+        The player to move picks the move that maximizes his win probability, a
+        move leads to a state where the opponent is to move, so its value is one
+        minus the value of that state.
+        :param tolerance: Stop when no value changes more than this in a sweep
+        :type tolerance: float
+        :return: Number of sweeps
+        :rtype: int
+        """
+        n = len(self.keys)
+        values = self.values if self.values is not None else array('d', [0.5]) * n
+        froms, nexts = self._from, self._next
+        width = self.tokens
+        # states found last are closest to the end of the game, updating them first
+        # propagates the values back to the start within few sweeps
+        order = range(n - 1, -1, -1)
+        for sweep in range(1, max_sweeps + 1):
+            change = 0.
+            for i in order:
+                total = 0.
+                base = 6 * width * i
+                for slot in range(base, base + 6 * width, width):
+                    best = 0.
+                    for j in range(slot, slot + width):
+                        nxt = nexts[j]
+                        if nxt == WIN:
+                            if froms[j] != ILLEGAL:
+                                best = 1.
+                                break
+                            continue
+                        value = 1. - values[nxt]
+                        if value > best:
+                            best = value
+                    total += best
+                total /= 6
+                diff = abs(total - values[i])
+                if diff > change:
+                    change = diff
+                values[i] = total
+            if change < tolerance:
+                break
+        self.values = values
+        return sweep
+
+    def win_probability(self, key):
+        """Win probability of the player to move in the state with the given key"""
+        return self.values[self.index[key]]
+
+    def best_move(self, key, roll):
+        """
+        Position code of the token the player to move should move with the dice
+        roll, ILLEGAL if he can't move.
+        :rtype: int
+        """
+        width = self.tokens
+        slot = (6 * self.index[key] + roll - 1) * width
+        best_code, best = ILLEGAL, -1.
+        for j in range(slot, slot + width):
+            code = self._from[j]
+            if code == ILLEGAL:
+                continue
+            nxt = self._next[j]
+            value = 1. if nxt == WIN else 1. - self.values[nxt]
+            if value > best:
+                best_code, best = code, value
+        return best_code
+
+    def table(self):
+        """
+        Lookup table of all states as json compatible dict. Every state maps to
+        its win probability and the best move for the dice rolls 1...6.
+        :rtype: dict
+        """
+        if self.values is None:
+            raise ValueError("Call solve first")
+        return {
+            'players': len(START_FIELDS),
+            'tokens': self.tokens,
+            'states': {key_to_string(key): [self.values[i]] + [self.best_move(key, roll) for roll in range(1, 7)]
+                       for i, key in enumerate(self.keys)},
+        }
+
+    def save(self, path):
+        """Write the lookup table to a json file"""
+        with open(path, "w") as f:
+            json.dump(self.table(), f)
@@ -0,0 +1,285 @@
+"""
+Streaming statistics of many games.
+
+All accumulators can be merged, so every worker process collects its own and
+the results are combined afterwards, see Simulation.simulate(stats=True).
+
+GameStats is passed to Game as recorder (like EventLog.EventRecorder) and
+follows every token move. During a game it only updates preallocated Python
+lists, the NumPy accumulators are updated once per game by add_game.
+Times are counted in player turns (plies): a token that stands on a field
+while three players take their turns adds three to that field.
+"""
+
+import json
+import numpy as np
+
+from Board import is_capture
+from Transitions import NUM_FIELDS, HOME_CODE
+
+
+class RunningStats:
+    """
+    Count, mean, variance, minimum and maximum of a stream of numbers with
+    Welford's algorithm.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.
+        self._m2 = 0.   # sum of squared differences from the mean
+        self.min = None
+        self.max = None
+
+    def add(self, x):
+        """Add one value"""
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+        if self.min is None or x < self.min:
+            self.min = x
+        if self.max is None or x > self.max:
+            self.max = x
+
+    def merge(self, other):
+        """
+        Add the values of another accumulator
+        :type other: RunningStats
+        :return: self
+        """
+        if not other.count:
+            return self
+        if not self.count:
+            self.count, self.mean, self._m2 = other.count, other.mean, other._m2
+            self.min, self.max = other.min, other.max
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self):
+        """Sample variance, 0 for less than two values"""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.
+
+    @property
+    def std(self):
+        return self.variance ** .5
+
+    def as_dict(self):
+        return {"count": self.count, "mean": self.mean, "std": self.std, "min": self.min, "max": self.max}
+
+
+class Histogram:
+    """
+    Histogram with fixed bins of equal width. Values outside the range are
+    counted in an underflow and an overflow bin.
+    """
+
+    def __init__(self, low, high, bins):
+        """
+        :param low: Lower edge of the first bin
+        :type low: float
+        :param high: Upper edge of the last bin
+        :type high: float
+        :param bins: Number of bins
+        :type bins: int
+        """
+        self.low = low
+        self.high = high
+        self.bins = bins
+        self.counts = np.zeros(bins + 2, dtype=np.int64)  # underflow, bins, overflow
+
+    @property
+    def edges(self):
+        return np.linspace(self.low, self.high, self.bins + 1)
+
+    def _index(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        index = np.floor((values - self.low) * (self.bins / (self.high - self.low))).astype(np.int64) + 1
+        return np.clip(index, 0, self.bins + 1)
+
+    def add(self, values):
+        """
+        Add one value or an array of values
+        :type values: float or numpy.ndarray
+        """
+        np.add.at(self.counts, self._index(values), 1)
+
+    def merge(self, other):
+        """
+        Add the counts of a histogram with the same bins
+        :type other: Histogram
+        :return: self
+        """
+        if (other.low, other.high, other.bins) != (self.low, self.high, self.bins):
+            raise ValueError("Can't merge histograms with different bins")
+        self.counts += other.counts
+        return self
+
+    def as_dict(self):
+        return {"low": self.low, "high": self.high, "bins": self.bins,
+                "underflow": int(self.counts[0]), "overflow": int(self.counts[-1]),
+                "counts": self.counts[1:-1].tolist()}
+
+
+class FieldOccupancy:
+    """
+    Plies every player spent with a token on each of the 40 fields of the
+    board, in home and in the target.
+    """
+
+    def __init__(self, num_players=4):
+        self.fields = np.zeros((num_players, NUM_FIELDS), dtype=np.int64)
+        self.home = np.zeros(num_players, dtype=np.int64)
+        self.target = np.zeros(num_players, dtype=np.int64)
+
+    def merge(self, other):
+        """
+        :type other: FieldOccupancy
+        :return: self
+        """
+        self.fields += other.fields
+        self.home += other.home
+        self.target += other.target
+        return self
+
+    def heatmap(self):
+        """Share of all token plies on the board spent on every field, over all players"""
+        total = self.fields.sum()
+        return self.fields.sum(axis=0) / total if total else np.zeros(NUM_FIELDS)
+
+    def as_dict(self):
+        return {"fields": self.fields.tolist(), "home": self.home.tolist(), "target": self.target.tolist()}
+
+
+class GameStats:
+    """
+    Recorder for Game that collects game lengths, captures and token
+    positions of all games it is passed to.
+    """
+
+    def __init__(self, num_players=4, max_turns=1000):
+        """
+        :param num_players: Number of players of the games
+        :type num_players: int
+        :param max_turns: Upper end of the game length histogram
+        :type max_turns: int
+        """
+        self.num_players = num_players
+        self.games = 0
+        self.turns = RunningStats()
+        self.turn_histogram = Histogram(0, max_turns, min(max_turns, 200))
+        self.captures = np.zeros(num_players, dtype=np.int64)   # captures made by every seat
+        self.captured = np.zeros(num_players, dtype=np.int64)   # tokens of every seat that were captured
+        self.occupancy = FieldOccupancy(num_players)
+        # per game buffers, reset by new_game
+        slots = 4 * num_players
+        self._ply = 0
+        self._enter = [0] * slots                           # ply at which every token reached its position
+        self._fields = [0] * (num_players * NUM_FIELDS)     # plies per player and field
+        self._home = [0] * num_players
+        self._captures = [0] * num_players
+        self._captured = [0] * num_players
+        self._pending = 0   # captures in the current move, assigned to the player in record_turn
+
+    def new_game(self):
+        """Called by Game when it is created, returns the id of the game"""
+        for buffer in (self._enter, self._fields, self._home, self._captures, self._captured):
+            buffer[:] = [0] * len(buffer)
+        self._ply = 0
+        self._pending = 0
+        return self.games
+
+    def token_moved(self, token, old_code, new_code):
+        """Called by the board whenever a token changes its position code"""
+        slot = token.slot
+        player = slot >> 2
+        spent = self._ply - self._enter[slot]
+        if old_code < NUM_FIELDS:
+            self._fields[player * NUM_FIELDS + old_code] += spent
+        elif old_code == HOME_CODE:
+            self._home[player] += spent
+        self._enter[slot] = self._ply
+        if is_capture(new_code):
+            self._captured[player] += 1
+            self._pending += 1
+
+    def record_turn(self, turn, player_id, dice_roll):
+        """Called by Game after every player turn"""
+        self._ply += 1
+        if self._pending:
+            self._captures[player_id] += self._pending
+            self._pending = 0
+
+    def win(self, player_id):
+        """Called by Game when a player has won"""
+
+    def add_game(self, game):
+        """
+        Add the buffers of a finished or stopped game to the accumulators.
+        :type game: Game
+        """
+        self.games += 1
+        self.turns.add(game.turns)
+        self.turn_histogram.add(game.turns)
+        # close the time spans of all tokens at the end of the game
+        ply = self._ply
+        target = np.zeros(self.num_players, dtype=np.int64)
+        for slot, code in enumerate(game.board.state):
+            player = slot >> 2
+            spent = ply - self._enter[slot]
+            if code < NUM_FIELDS:
+                self._fields[player * NUM_FIELDS + code] += spent
+            elif code == HOME_CODE:
+                self._home[player] += spent
+            else:
+                target[player] += spent
+        self.occupancy.fields += np.array(self._fields, dtype=np.int64).reshape(self.num_players, NUM_FIELDS)
+        self.occupancy.home += self._home
+        self.occupancy.target += target
+        self.captures += self._captures
+        self.captured += self._captured
+
+    def merge(self, other):
+        """
+        Add the statistics of another collector, e.g. from a worker process
+        :type other: GameStats
+        :return: self
+        """
+        self.games += other.games
+        self.turns.merge(other.turns)
+        self.turn_histogram.merge(other.turn_histogram)
+        self.captures += other.captures
+        self.captured += other.captured
+        self.occupancy.merge(other.occupancy)
+        return self
+
+    def as_dict(self):
+        """Return the statistics as a dict of plain python types, e.g. for json export"""
+        return {
+            "games": self.games,
+            "turns": self.turns.as_dict(),
+            "turn_histogram": self.turn_histogram.as_dict(),
+            "captures": self.captures.tolist(),
+            "captured": self.captured.tolist(),
+            "occupancy": self.occupancy.as_dict(),
+        }
+
+    def write_json(self, path):
+        """Write the statistics to a json file"""
+        with open(path, "w") as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+    def write_npz(self, path):
+        """Write the arrays of the statistics to a NumPy .npz file"""
+        np.savez(path, turn_histogram=self.turn_histogram.counts, turn_edges=self.turn_histogram.edges,
+                 captures=self.captures, captured=self.captured, fields=self.occupancy.fields,
+                 home=self.occupancy.home, target=self.occupancy.target,
+                 turns=np.array([self.turns.count, self.turns.mean, self.turns.std]))
@@ -0,0 +1,214 @@
+"""
+Long running simulation sweeps over many strategy configurations that
+survive a crash of the process.
+
+A sweep plays n_games games for every configuration (player type per seat).
+The games of a configuration are split into work units of unit_size games,
+the same chunks simulate uses, so the merged units of a configuration are
+identical to simulate(n_games, player_types, seed, max_turns, chunk_size=unit_size).
+The result of every unit is written to an SQLite database as soon as the unit
+is done, together with the seed of its random number generator, which
+reproduces the unit on its own.
+
+Units are identified by a key built from the configuration, master seed,
+unit index and size, turn limit and the code version, a hash of the source of
+the game engine (ENGINE_MODULES) and the strategies. Running a sweep again skips the units
+already in the database, so an interrupted sweep continues where it stopped,
+and sweeps that share configurations and seeds with earlier ones reuse their
+results. Changing the code changes the version and invalidates old results.
+
+    with Sweep("sweep.sqlite", grid(["first", "last", "random"]), n_games=100000, seed=1) as sweep:
+        results = sweep.run(workers=8)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from collections import namedtuple
+from itertools import product
+
+import Registry
+from Simulation import SimulationResult, _derive_seeds, _simulate_chunk
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS units (
+    key TEXT PRIMARY KEY,
+    player_types TEXT NOT NULL,
+    seed TEXT NOT NULL,
+    unit INTEGER NOT NULL,
+    games INTEGER NOT NULL,
+    unit_seed TEXT NOT NULL,
+    max_turns INTEGER,
+    version TEXT NOT NULL,
+    result TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    finished REAL NOT NULL
+)
+"""
+
+WorkUnit = namedtuple("WorkUnit", "key player_types unit games unit_seed")
+
+# modules whose code decides the results of simulated games, e.g. the command line or the benchmarks don't
+ENGINE_MODULES = ("Board", "Game", "Hashing", "Player", "Registry", "Rules", "Simulation", "Solver", "Transitions")
+
+
+def grid(strategies, num_players=4):
+    """
+    Return all configurations of the strategies on the seats, every strategy
+    may take any number of seats
+    :type strategies: sequence of str
+    :type num_players: int
+    :rtype: list of tuple of str
+    """
+    return list(product(strategies, repeat=num_players))
+
+
+def code_version(player_types=()):
+    """
+    Return a hash of the source of the game engine, see ENGINE_MODULES, and
+    of the modules of the given strategies.
+    :param player_types: Strategies whose modules are part of the version
+    :type player_types: iterable of str
+    :rtype: str
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    paths = [os.path.join(directory, name + ".py") for name in ENGINE_MODULES]
+    for player_type in sorted(set(player_types)):
+        path = getattr(sys.modules[Registry.get_strategy(player_type).__module__], "__file__", None)
+        if path is not None and os.path.abspath(path) not in paths:
+            paths.append(os.path.abspath(path))
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def _play_unit(task):
+    """Play the games of a unit, runs in the worker processes"""
+    start = time.perf_counter()
+    result = _simulate_chunk(task)
+    return result, time.perf_counter() - start
+
+
+class Sweep:
+    """
+    Sweep over configurations with results stored in an SQLite database.
+    """
+
+    def __init__(self, path, configurations, n_games, seed=0, unit_size=1000, max_turns=1000, version=None):
+        """
+        :param path: Path of the database, created if it doesn't exist
+        :type path: str
+        :param configurations: Player type for every seat, per configuration
+        :type configurations: iterable of sequence of str
+        :param n_games: Number of games per configuration
+        :type n_games: int
+        :param seed: Master seed of every configuration
+        :type seed: int
+        :param unit_size: Number of games per work unit
+        :type unit_size: int
+        :param max_turns: Games that take more turns are stopped without a winner
+        :type max_turns: int or None
+        :param version: Code version of the results, None computes it with code_version
+        :type version: str
+        """
+        self.path = path
+        self.configurations = [tuple(c) for c in configurations]
+        self.n_games = n_games
+        self.seed = seed
+        self.unit_size = unit_size
+        self.max_turns = max_turns
+        self.version = version if version is not None else code_version(
+            {t for c in self.configurations for t in c})
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(SCHEMA)
+        self._db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._db.close()
+
+    def units(self, player_types):
+        """
+        Return the work units of a configuration
+        :type player_types: tuple of str
+        :rtype: list of WorkUnit
+        """
+        sizes = [self.unit_size] * (self.n_games // self.unit_size)
+        if self.n_games % self.unit_size:
+            sizes.append(self.n_games % self.unit_size)
+        units = []
+        for index, (size, unit_seed) in enumerate(zip(sizes, _derive_seeds(self.seed, len(sizes)))):
+            key = hashlib.sha256(json.dumps([list(player_types), str(self.seed), self.unit_size, index, size,
+                                             self.max_turns, self.version]).encode()).hexdigest()
+            units.append(WorkUnit(key, player_types, index, size, unit_seed))
+        return units
+
+    def pending(self):
+        """
+        Return the work units of all configurations that aren't in the database yet
+        :rtype: list of WorkUnit
+        """
+        done = {key for (key,) in self._db.execute("SELECT key FROM units")}
+        return [unit for config in self.configurations for unit in self.units(config) if unit.key not in done]
+
+    def run(self, workers=1, progress=None):
+        """
+        Play all pending units and return the results.
+        :param workers: Number of worker processes, 1 plays all units in this process
+        :type workers: int
+        :param progress: Called with the number of finished and of all pending units after every unit
+        :type progress: function
+        :return: Result of every configuration
+        :rtype: dict of tuple of str -> SimulationResult
+        """
+        pending = self.pending()
+        tasks = [(unit.games, unit.player_types, unit.unit_seed, self.max_turns, False, None) for unit in pending]
+        if workers == 1 or len(pending) <= 1:
+            for done, (unit, task) in enumerate(zip(pending, tasks), 1):
+                self._store(unit, *_play_unit(task))
+                if progress is not None:
+                    progress(done, len(pending))
+        else:
+            from concurrent.futures import ProcessPoolExecutor, as_completed
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(_play_unit, task): unit for unit, task in zip(pending, tasks)}
+                for done, future in enumerate(as_completed(futures), 1):
+                    self._store(futures[future], *future.result())
+                    if progress is not None:
+                        progress(done, len(pending))
+        return self.results()
+
+    def results(self):
+        """
+        Return the merged results of the finished units of every configuration.
+        Configurations that aren't finished have fewer games than n_games.
+        :rtype: dict of tuple of str -> SimulationResult
+        """
+        results = {}
+        for config in self.configurations:
+            result = results[config] = SimulationResult(config)
+            for unit in self.units(config):
+                row = self._db.execute("SELECT result FROM units WHERE key = ?", (unit.key,)).fetchone()
+                if row is not None:
+                    result.merge(SimulationResult.from_dict(json.loads(row[0])))
+        return results
+
+    def _store(self, unit, result, seconds):
+        """Write the result of a unit, committed right away so it survives a crash"""
+        self._db.execute("INSERT OR REPLACE INTO units VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         (unit.key, json.dumps(list(unit.player_types)), str(self.seed), unit.unit, unit.games,
+                          str(unit.unit_seed), self.max_turns, self.version, json.dumps(result.as_dict()),
+                          seconds, time.time()))
+        self._db.commit()
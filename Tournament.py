@@ -0,0 +1,237 @@
+"""
+Tournament between strategies.
+
+Every pair of strategies plays four player games with two seats per strategy.
+Seat order matters (players start on different fields and seat 0 moves
+first), so a pairing cycles through all six arrangements of the two
+strategies on the four seats. Games are played in rounds, after every round
+the pairing is stopped once the win rate of the first strategy is resolved:
+its confidence interval either excludes 1/2 or is narrower than the margin,
+so the strategies count as equally strong. Clearly unequal pairings are
+decided after a few rounds and only close ones use the game budget.
+
+At the end the pairwise results are turned into Elo style ratings with a
+Bradley-Terry model.
+"""
+
+import math
+import random
+from itertools import combinations, permutations
+
+from Simulation import _derive_seeds, _simulate_chunk
+
+
+def seatings(a, b):
+    """
+    Return all distinct arrangements of two strategies on four seats with two seats each
+    :type a: str
+    :type b: str
+    :rtype: list of tuple of str
+    """
+    return sorted(set(permutations((a, a, b, b))))
+
+
+class PairingResult:
+    """
+    Games between two strategies, added up over all seatings.
+    """
+
+    def __init__(self, a, b):
+        """
+        :param a: First strategy
+        :type a: str
+        :param b: Second strategy
+        :type b: str
+        """
+        self.a = a
+        self.b = b
+        self.wins_a = 0
+        self.wins_b = 0
+        self.games = 0
+        self.unfinished = 0
+        self.rounds = 0
+        self.resolved = False   # True if the pairing was stopped before the game budget was used up
+
+    def add(self, result):
+        """
+        Add the result of a simulation with both strategies
+        :type result: SimulationResult
+        """
+        self.wins_a += result.strategy_wins[self.a]
+        self.wins_b += result.strategy_wins[self.b]
+        self.games += result.games
+        self.unfinished += result.unfinished
+
+    @property
+    def score(self):
+        """Share of the decided games won by the first strategy"""
+        decided = self.wins_a + self.wins_b
+        return self.wins_a / decided if decided else .5
+
+    def interval(self, z):
+        """
+        Confidence interval of the score
+        :param z: Width of the interval in standard errors
+        :type z: float
+        :rtype: tuple of float
+        """
+        decided = self.wins_a + self.wins_b
+        if not decided:
+            return 0., 1.
+        # add one win for both sides, so a pairing that is won by one side every time has a width
+        p = (self.wins_a + 1) / (decided + 2)
+        half = z * (p * (1 - p) / decided) ** .5
+        return max(0., self.score - half), min(1., self.score + half)
+
+    def as_dict(self):
+        """Return the result as a dict of plain python types, e.g. for json export"""
+        return {
+            "a": self.a,
+            "b": self.b,
+            "wins_a": self.wins_a,
+            "wins_b": self.wins_b,
+            "games": self.games,
+            "unfinished": self.unfinished,
+            "rounds": self.rounds,
+            "resolved": self.resolved,
+            "score": self.score,
+        }
+
+    def __repr__(self):
+        return "PairingResult({} vs {}: {}-{} in {} games)".format(
+            self.a, self.b, self.wins_a, self.wins_b, self.games)
+
+
+def bradley_terry(pairings, iterations=1000, tolerance=1e-10):
+    """
+    Fit Bradley-Terry strengths to pairwise results with the minorization-
+    maximization algorithm and return them as Elo ratings with mean 0. Every
+    pairing counts half a win for both sides, so strategies that never won get a
+    finite rating.
+    :type pairings: iterable of PairingResult
+    :return: Rating per strategy
+    :rtype: dict of str -> float
+    """
+    wins = {}
+    games = {}  # (strategy, strategy) -> decided games
+    for p in pairings:
+        wins[p.a] = wins.get(p.a, 0.) + p.wins_a + .5
+        wins[p.b] = wins.get(p.b, 0.) + p.wins_b + .5
+        n = p.wins_a + p.wins_b + 1.
+        games[p.a, p.b] = games.get((p.a, p.b), 0.) + n
+        games[p.b, p.a] = games.get((p.b, p.a), 0.) + n
+    strength = {s: 1. for s in wins}
+    for _ in range(iterations):
+        new = {}
+        for s in strength:
+            denominator = sum(n / (strength[s] + strength[o]) for (x, o), n in games.items() if x == s)
+            new[s] = wins[s] / denominator
+        # normalize to a geometric mean of 1, which gives ratings with mean 0
+        log_mean = sum(math.log(v) for v in new.values()) / len(new)
+        new = {s: v / math.exp(log_mean) for s, v in new.items()}
+        change = max(abs(new[s] - strength[s]) for s in strength)
+        strength = new
+        if change < tolerance:
+            break
+    return {s: 400 * math.log10(v) for s, v in strength.items()}
+
+
+class Tournament:
+    """
+    Round robin between all pairs of strategies with sequential stopping.
+    """
+
+    def __init__(self, strategies, games_per_round=60, max_games=12000, z=3., margin=.02,
+                 max_turns=1000, workers=1, seed=None):
+        """
+        :param strategies: Player types, see Game.create_player
+        :type strategies: sequence of str
+        :param games_per_round: Games per pairing and round, spread over the six seatings
+        :type games_per_round: int
+        :param max_games: Maximum games per pairing
+        :type max_games: int
+        :param z: Width of the confidence intervals in standard errors. The
+        interval is checked after every round, a wider interval than for a single
+        test keeps the chance of stopping on a lucky streak small.
+        :type z: float
+        :param margin: A pairing whose interval is narrower than this counts as even
+        :type margin: float
+        :param max_turns: Turn limit of a game, see Simulation.simulate
+        :type max_turns: int
+        :param workers: Number of worker processes
+        :type workers: int
+        :param seed: Master seed. None draws a fresh one from the operating system.
+        :type seed: int or None
+        """
+        if len(set(strategies)) < 2:
+            raise ValueError("A tournament needs at least two different strategies")
+        self.strategies = list(dict.fromkeys(strategies))
+        self.games_per_round = games_per_round
+        self.max_games = max_games
+        self.z = z
+        self.margin = margin
+        self.max_turns = max_turns
+        self.workers = workers
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(64)
+        self.pairings = [PairingResult(a, b) for a, b in combinations(self.strategies, 2)]
+
+    def is_resolved(self, pairing):
+        """Check if the score of a pairing is known precisely enough"""
+        lower, upper = pairing.interval(self.z)
+        return lower > .5 or upper < .5 or upper - lower < self.margin
+
+    def _round_tasks(self, pairing, round_seed):
+        """Chunks of games for one round of a pairing, one per seating"""
+        arrangements = seatings(pairing.a, pairing.b)
+        per_seating = -(-self.games_per_round // len(arrangements))
+        return [(per_seating, seating, chunk_seed, self.max_turns, False, None)
+                for seating, chunk_seed in zip(arrangements, _derive_seeds(round_seed, len(arrangements)))]
+
+    def run(self):
+        """
+        Play rounds for all open pairings until every pairing is resolved or has
+        used up its games.
+        :return: Pairwise results
+        :rtype: list of PairingResult
+        """
+        streams = [random.Random(s) for s in _derive_seeds(self.seed, len(self.pairings))]
+        executor = None
+        if self.workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            executor = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            open_pairings = [(p, stream) for p, stream in zip(self.pairings, streams)
+                             if not p.resolved and p.games < self.max_games]
+            while open_pairings:
+                tasks, owners = [], []
+                for pairing, stream in open_pairings:
+                    round_tasks = self._round_tasks(pairing, stream.getrandbits(64))
+                    tasks.extend(round_tasks)
+                    owners.extend([pairing] * len(round_tasks))
+                results = executor.map(_simulate_chunk, tasks) if executor else map(_simulate_chunk, tasks)
+                for pairing, result in zip(owners, results):
+                    pairing.add(result)
+                still_open = []
+                for pairing, stream in open_pairings:
+                    pairing.rounds += 1
+                    if self.is_resolved(pairing):
+                        pairing.resolved = True
+                    elif pairing.games < self.max_games:
+                        still_open.append((pairing, stream))
+                open_pairings = still_open
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        return self.pairings
+
+    def ratings(self):
+        """Elo ratings of the strategies, see bradley_terry"""
+        return bradley_terry(self.pairings)
+
+    def as_dict(self):
+        """Return pairings and ratings as a dict of plain python types"""
+        return {
+            "seed": self.seed,
+            "pairings": [p.as_dict() for p in self.pairings],
+            "ratings": self.ratings(),
+        }
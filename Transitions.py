@@ -0,0 +1,97 @@
+"""
+Precomputed move transitions. For every player, position code and dice roll the
+table holds the position code the token moves to, or ILLEGAL if the move isn't
+possible regardless of the other tokens on the board. Whether the destination
+is blocked by an own token or occupied by another players token is not part of
+the table and has to be checked by the board.
+
+Position codes are the ones of Board.state: 0...39 fields on the board,
+TARGET_CODE...TARGET_CODE+3 target positions and HOME_CODE for the home.
+Boards with a different number of fields (see Rules) use the same layout:
+the target codes follow directly after the last field, then the home code.
+"""
+
+from functools import lru_cache
+
+NUM_FIELDS = 40
+TARGET_CODE = NUM_FIELDS        # code of the first target position
+HOME_CODE = NUM_FIELDS + 4      # code of a token in its home
+ILLEGAL = -1
+
+
+def reference_destination(player_id, code, places, start_fields, target_fields, num_fields=NUM_FIELDS):
+    """
+    Compute the destination of a move with the rule arithmetic of the board.
+    This is the reference the table is generated from and validated against.
+    :param player_id: Player owning the token
+    :type player_id: int
+    :param code: Position code of the token
+    :type code: int
+    :param places: Dice roll
+    :type places: int
+    :param start_fields: Start field of every player
+    :param target_fields: Field in front of the target of every player
+    :param num_fields: Number of fields of the board
+    :type num_fields: int
+    :return: Position code after the move or ILLEGAL
+    :rtype: int
+    """
+    target_code = num_fields
+    if code == target_code + 4:
+        # a token can only leave the home with a 6
+        return start_fields[player_id] if places == 6 else ILLEGAL
+    if code >= target_code:
+        # tokens in the target can't be moved
+        return ILLEGAL
+    target = target_fields[player_id]
+    if code <= target < code + places:
+        # the token passes the field in front of its target, so it moves into the target
+        rest_places = target - code - places
+        if rest_places < -4:
+            # the target is only 4 fields long
+            return ILLEGAL
+        return target_code - rest_places - 1
+    return (code + places) % num_fields
+
+
+@lru_cache(maxsize=None)
+def transition_table(start_fields, target_fields, num_fields=NUM_FIELDS):
+    """
+    Build the transition table for the given board layout. Tables are cached,
+    so all boards with the same layout share one table.
+    :param start_fields: Start field of every player
+    :type start_fields: tuple of int
+    :param target_fields: Field in front of the target of every player
+    :type target_fields: tuple of int
+    :param num_fields: Number of fields of the board
+    :type num_fields: int
+    :return: Nested tuples, table[player_id][code][places] is the destination
+    code. places goes from 0 to 6, a roll of 0 is always ILLEGAL.
+    :rtype: tuple
+    """
+    return tuple(
+        tuple(
+            (ILLEGAL,) + tuple(reference_destination(player_id, code, places, start_fields, target_fields, num_fields)
+                               for places in range(1, 7))
+            for code in range(num_fields + 5))
+        for player_id in range(len(start_fields)))
+
+
+def validate_transition_table(table, start_fields, target_fields, num_fields=NUM_FIELDS):
+    """
+    Check every entry of a transition table against the rule arithmetic.
+    :raises ValueError: If an entry differs, naming the first wrong entry
+    """
+    if len(table) != len(start_fields):
+        raise ValueError("Table has {} players, expected {}".format(len(table), len(start_fields)))
+    for player_id, player_table in enumerate(table):
+        if len(player_table) != num_fields + 5:
+            raise ValueError("Table of player {} has {} positions".format(player_id, len(player_table)))
+        for code, moves in enumerate(player_table):
+            if moves[0] != ILLEGAL:
+                raise ValueError("Roll 0 must be illegal for player {} position {}".format(player_id, code))
+            for places in range(1, 7):
+                expected = reference_destination(player_id, code, places, start_fields, target_fields, num_fields)
+                if moves[places] != expected:
+                    raise ValueError("Player {} position {} roll {}: table has {}, rules give {}".format(
+                        player_id, code, places, moves[places], expected))
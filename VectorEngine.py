@@ -0,0 +1,266 @@
+"""
+Vectorized game engine that plays many games in lockstep with NumPy.
+
+Token positions are counted relative to the start field of their player:
+HOME (-1) for tokens in the home, 0...39 for the steps already taken on the
+board and 40...43 for the four target positions. Every step rolls the dice for
+the player to move in all active games at once, applies the rules of
+Board.move_token as masked array operations and removes finished games from
+the active set.
+
+Rules are the same as for the scalar board. On top of that a token can only
+leave the home on a 6 and doing so is mandatory if the start field isn't
+blocked by an own token.
+
+The positions are stored as a (num_players, 4, n_games) int8 array, so that the
+tokens of the player to move are contiguous rows and all operations run along
+the long games axis. VectorGames.game_positions returns the (n_games,
+num_players, 4) view.
+"""
+
+import numpy as np
+
+HOME = -1
+NUM_FIELDS = 40
+TARGET = NUM_FIELDS     # relative position of the first target position
+LAST_TARGET = TARGET + 3
+START_FIELDS = (0, 10, 20, 30)
+NO_FIELD = 127          # destination field used for games without a move onto the board
+
+
+def _any(mask):
+    """Reduce a (4, n) boolean array along the token axis, faster than mask.any(axis=0)"""
+    return mask[0] | mask[1] | mask[2] | mask[3]
+
+
+def _all(mask):
+    """Reduce a (4, n) boolean array along the token axis, faster than mask.all(axis=0)"""
+    return mask[0] & mask[1] & mask[2] & mask[3]
+
+
+def legal_moves(own, rolls):
+    """
+    Compute which tokens the player to move can move in every game.
+    :param own: Relative positions of the tokens of the player to move, shape (4, n)
+    :type own: numpy.ndarray
+    :param rolls: Dice roll of every game, shape (n,)
+    :type rolls: numpy.ndarray
+    :return: Boolean mask of legal tokens and the relative destination of every
+    token, both of shape (4, n)
+    :rtype: tuple of numpy.ndarray
+    """
+    in_home = own == HOME
+    on_board = ~in_home
+    destination = (own + rolls) * on_board    # tokens in the home move to the start, relative position 0
+    legal = (destination <= LAST_TARGET) & (own < TARGET) & on_board
+    legal |= in_home & (rolls == 6)
+    # a token can't land on an own token, neither on the board nor in the target
+    for token in own:
+        legal &= destination != token
+    # leaving the home is mandatory if possible
+    exit_possible = _any(legal & in_home)
+    legal &= ~exit_possible | in_home
+    return legal, destination
+
+
+def random_policy(legal, own, rng):
+    """Pick a random legal token, -1 if there is none"""
+    count = legal[0] + legal[1].view(np.int8) + legal[2].view(np.int8) + legal[3].view(np.int8)
+    pick = (rng.random(legal.shape[1], dtype=np.float32) * count).astype(np.int8)
+    choice = np.full(legal.shape[1], -1, dtype=np.int8)
+    for token, token_legal in enumerate(legal):
+        np.putmask(choice, token_legal & (pick == 0), token)
+        pick -= token_legal
+    return choice
+
+
+def _pick_extreme(legal, own, better):
+    """Pick the legal token whose position is better than the others, lowest token index on ties"""
+    choice = np.full(legal.shape[1], -1, dtype=np.int8)
+    best = np.zeros(legal.shape[1], dtype=np.int8)
+    for token, (token_legal, position) in enumerate(zip(legal, own)):
+        take = token_legal & ((choice < 0) | better(position, best))
+        np.putmask(choice, take, token)
+        np.putmask(best, take, position)
+    return choice
+
+
+def first_policy(legal, own, rng):
+    """Pick the legal token that is furthest ahead, -1 if there is none"""
+    return _pick_extreme(legal, own, np.greater)
+
+
+def last_policy(legal, own, rng):
+    """Pick the legal token that is furthest behind, -1 if there is none"""
+    return _pick_extreme(legal, own, np.less)
+
+
+POLICIES = {
+    'first': first_policy,
+    'last': last_policy,
+    'random': random_policy,
+}
+
+
+class VectorGames:
+    """
+    A batch of games played in lockstep. Every call of step lets the player to
+    move act in all active games. All games start with player 0, so the player
+    to move is the same in every active game.
+    """
+
+    def __init__(self, n_games, player_types=('random',) * 4, seed=None):
+        """
+        :param n_games: Number of games in the batch
+        :type n_games: int
+        :param player_types: Policy name for every seat, see POLICIES
+        :type player_types: sequence of str
+        :param seed: Seed for the NumPy random generator
+        :type seed: int or None
+        """
+        try:
+            self.policies = [POLICIES[player_type] for player_type in player_types]
+        except KeyError as e:
+            raise TypeError("Player type {} not known".format(e.args[0]))
+        self.player_types = tuple(player_types)
+        self.num_players = len(self.player_types)
+        self.rng = np.random.default_rng(seed)
+        self.start_fields = START_FIELDS[:self.num_players]
+        self.current = 0        # player to move
+        self.turns = 0          # number of started rounds
+        # state of the active games only, finished games are removed from these
+        self.positions = np.full((self.num_players, 4, n_games), HOME, dtype=np.int8)
+        self.captures = np.zeros((self.num_players, n_games), dtype=np.int32)
+        self.active = np.arange(n_games)    # game index of every column in positions
+        self.last_choice = np.empty(0, dtype=np.int8)   # token picked in the last step, per active game
+        # outcome of every game
+        self.winner = np.full(n_games, -1, dtype=np.int8)
+        self.game_turns = np.zeros(n_games, dtype=np.int32)
+        self.final_positions = np.full((self.num_players, 4, n_games), HOME, dtype=np.int8)
+        self.final_captures = np.zeros((self.num_players, n_games), dtype=np.int32)
+
+    def step(self, rolls=None):
+        """
+        Let the player to move act in all active games.
+        :param rolls: Dice rolls for the active games. Rolled by the engine if None.
+        :type rolls: numpy.ndarray or None
+        """
+        n = len(self.active)
+        if not n:
+            return
+        if rolls is None:
+            rolls = self.rng.integers(1, 7, size=n, dtype=np.int8)
+        player = self.current
+        if player == 0:
+            self.turns += 1
+        positions = self.positions
+        own = positions[player]     # view, changes go right into positions
+
+        legal, destination = legal_moves(own, rolls)
+        choice = self.policies[player](legal, own, self.rng)
+        self.last_choice = choice
+
+        field = np.full(n, NO_FIELD, dtype=np.int8)
+        for token in range(4):
+            moved = choice == token
+            np.putmask(own[token], moved, destination[token])
+            np.putmask(field, moved & (destination[token] < TARGET), destination[token])
+        # throw other players tokens from the destination field
+        on_board = field != NO_FIELD
+        if on_board.any():
+            for other_player, start in enumerate(self.start_fields):
+                if other_player == player:
+                    continue
+                # destination field relative to the start of the other player
+                relative = field + (self.start_fields[player] - start)
+                relative[relative < 0] += NUM_FIELDS
+                relative[relative >= NUM_FIELDS] -= NUM_FIELDS
+                np.putmask(relative, ~on_board, NO_FIELD)
+                hit = positions[other_player] == relative
+                if hit.any():
+                    np.putmask(positions[other_player], hit, HOME)
+                    self.captures[player] += _any(hit)
+
+        self.current = (player + 1) % self.num_players
+        won = _all(own >= TARGET)
+        if won.any():
+            self.winner[self.active[won]] = player
+            self._remove(won)
+
+    def _remove(self, finished):
+        """Move the games selected by the boolean mask finished out of the active set"""
+        games = self.active[finished]
+        self.game_turns[games] = self.turns
+        self.final_positions[:, :, games] = self.positions[:, :, finished]
+        self.final_captures[:, games] = self.captures[:, finished]
+        keep = ~finished
+        self.active = self.active[keep]
+        # compress keeps the arrays C-contiguous, boolean indexing along the last axis would not
+        self.positions = self.positions.compress(keep, axis=2)
+        self.captures = self.captures.compress(keep, axis=1)
+
+    def run(self, max_turns=1000):
+        """
+        Step until all games are finished. Games that take more than max_turns
+        turns are stopped without a winner.
+        """
+        while len(self.active):
+            if max_turns is not None and self.turns >= max_turns and self.current == 0:
+                self._remove(np.ones(len(self.active), dtype=bool))
+                break
+            self.step()
+
+    def game_positions(self):
+        """
+        Return the current relative positions of all games, finished or not.
+        :return: Array of shape (n_games, num_players, 4)
+        :rtype: numpy.ndarray
+        """
+        positions = self.final_positions.copy()
+        positions[:, :, self.active] = self.positions
+        return positions.transpose(2, 0, 1)
+
+    def board_state(self, game):
+        """
+        Return the positions of one game as position codes in the layout of
+        Board.state, for comparison with the scalar board.
+        :param game: Index of the game
+        :type game: int
+        :rtype: list of int
+        """
+        from Board import HOME_CODE
+        positions = self.game_positions()[game]
+        state = []
+        for player, start in enumerate(self.start_fields):
+            for position in positions[player].tolist():
+                if position == HOME:
+                    state.append(HOME_CODE)
+                elif position >= TARGET:
+                    state.append(position)
+                else:
+                    state.append((start + position) % NUM_FIELDS)
+        return state
+
+    def result(self):
+        """
+        Return the outcome of all finished games as a SimulationResult
+        :rtype: Simulation.SimulationResult
+        """
+        from Simulation import SimulationResult
+        result = SimulationResult(self.player_types)
+        finished = np.ones(len(self.winner), dtype=bool)
+        finished[self.active] = False
+        for winner, turns in zip(self.winner[finished].tolist(), self.game_turns[finished].tolist()):
+            result.add_outcome(winner if winner >= 0 else None, turns)
+        return result
+
+
+def simulate_vectorized(n_games, player_types=('random',) * 4, seed=None, max_turns=1000):
+    """
+    Play n_games games with the vectorized engine and return the aggregated
+    results, see Simulation.simulate.
+    :rtype: Simulation.SimulationResult
+    """
+    games = VectorGames(n_games, player_types, seed)
+    games.run(max_turns)
+    return games.result()
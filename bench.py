@@ -0,0 +1,189 @@
+"""
+Benchmarks for the board operations and full game throughput.
+
+    python bench.py                          run all benchmarks, print json
+    python bench.py -o results.json          write the results to a file
+    python bench.py --compare baseline.json  flag regressions against stored results
+
+Microbenchmarks report the best time per call in nanoseconds, game benchmarks
+report games per second. Results contain the commit hash, so stored baselines
+can be traced back to the code they were measured on.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+
+from Board import Board
+from Player import RandomPlayer
+
+STRATEGY_MIXES = (
+    ('random', 'random', 'random', 'random'),
+    ('first', 'first', 'first', 'first'),
+    ('last', 'last', 'last', 'last'),
+    ('first', 'last', 'random', 'random'),
+)
+
+
+def commit_hash():
+    """Return the hash of the checked out commit of this file, None outside of a git repository"""
+    try:
+        # run in the directory of the code, the benchmarks may be started from anywhere
+        out = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def _new_board():
+    players = [RandomPlayer(i) for i in range(4)]
+    return Board(players), players
+
+
+def micro_benchmarks():
+    """
+    Return a dict of benchmark name -> function without arguments. Every call
+    performs the measured operation once, including the setup needed to repeat it.
+    """
+    board, players = _new_board()
+    mover = board.tokens[0][0]
+    victim = board.tokens[1][0]
+    home_leaver = board.tokens[2][0]
+    player = players[0]
+    # a few tokens spread over the board for the queries
+    board._place(board.tokens[0][1], 5)
+    board._place(board.tokens[0][2], board.target_fields[0])
+    board._place(board.tokens[3][1], 25)
+
+    def move_token():
+        board._place(mover, 10)
+        board.move_token(mover, 3)
+
+    def throw():
+        board._place(victim, 17)
+        board.throw(victim)
+
+    def move_out_of_home():
+        board.move_out_of_home(2)
+        board.throw(home_leaver)
+
+    def get_home_tokens():
+        board.get_home_tokens(1)
+
+    def has_won():
+        player.has_won(board)
+
+    def legal_moves():
+        board.legal_moves(0, 4)
+
+    def apply_undo():
+        board._place(mover, 10)
+        board._place(victim, 13)
+        board.undo(board.apply(mover, 3))
+
+    return {
+        'move_token': move_token,
+        'throw': throw,
+        'move_out_of_home': move_out_of_home,
+        'get_home_tokens': get_home_tokens,
+        'has_won': has_won,
+        'legal_moves': legal_moves,
+        'apply_undo': apply_undo,
+    }
+
+
+def run_micro(number=20000, repeat=5):
+    """Run the microbenchmarks, return dict of name -> best nanoseconds per call"""
+    results = {}
+    for name, func in micro_benchmarks().items():
+        best = min(timeit.Timer(func).repeat(repeat=repeat, number=number))
+        results[name] = best / number * 1e9
+    return results
+
+
+def run_games(n_games=200, seed=0):
+    """Play full games for every strategy mix, return dict of mix -> games per second"""
+    from Simulation import simulate
+    results = {}
+    for mix in STRATEGY_MIXES:
+        start = time.perf_counter()
+        simulate(n_games, mix, seed=seed)
+        results[",".join(mix)] = n_games / (time.perf_counter() - start)
+    return results
+
+
+def run_all(n_games=200, number=20000, repeat=5):
+    """Run all benchmarks and return the results as a json compatible dict"""
+    return {
+        'commit': commit_hash(),
+        'python': platform.python_version(),
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'micro_ns': run_micro(number, repeat),
+        'games_per_s': run_games(n_games),
+    }
+
+
+def compare(current, baseline, threshold=0.1):
+    """
+    Compare results against a baseline.
+    :param threshold: Relative slowdown that counts as regression
+    :type threshold: float
+    :return: Lines describing every benchmark and the names of the regressed benchmarks
+    :rtype: tuple of (list of str, list of str)
+    """
+    lines, regressions = [], []
+    # for microbenchmarks lower is better, for games per second higher is better
+    for section, higher_is_better in (('micro_ns', False), ('games_per_s', True)):
+        for name, value in current.get(section, {}).items():
+            old = baseline.get(section, {}).get(name)
+            if old is None:
+                lines.append("{:<12} {:<30} {:>12.1f}   (no baseline)".format(section, name, value))
+                continue
+            slowdown = (old / value - 1) if higher_is_better else (value / old - 1)
+            flag = ""
+            if slowdown > threshold:
+                flag = "REGRESSION"
+                regressions.append(name)
+            lines.append("{:<12} {:<30} {:>12.1f} {:>12.1f} {:>+8.1%} {}".format(
+                section, name, old, value, slowdown, flag).rstrip())
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark board operations and game throughput")
+    parser.add_argument("-o", "--output", help="write results as json to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="json results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="relative slowdown reported as regression (default 0.1)")
+    parser.add_argument("--games", type=int, default=200, help="games per strategy mix")
+    parser.add_argument("--number", type=int, default=20000, help="calls per microbenchmark repeat")
+    args = parser.parse_args(argv)
+
+    results = run_all(args.games, args.number)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print("comparing against {}".format(baseline.get('commit')), file=sys.stderr)
+        lines, regressions = compare(results, baseline, args.threshold)
+        for line in lines:
+            print(line, file=sys.stderr)
+        if regressions:
+            print("{} regression(s): {}".format(len(regressions), ", ".join(regressions)), file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
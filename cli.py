@@ -0,0 +1,152 @@
+"""
+Command line entry point for batch jobs.
+
+    python cli.py simulate -n 10000 -p first last random random --seed 1 --workers 4
+    python cli.py tournament first last random --seed 1
+    python cli.py bench --games 50
+    python cli.py replay -p first last random random --seed 5 --game 7 --turn 20
+    python cli.py replay --log events.bin --game 3
+
+replay --seed plays game --game of `simulate --seed` with the same seed,
+players and chunk size again, --log reads it from a binary event log written
+by EventLog.EventRecorder.
+
+Results are written as json to stdout or the file given with -o. At startup
+only the standard library modules needed to parse the arguments are imported,
+the game modules, strategies and NumPy are imported by the subcommand that
+needs them. With --timing the time spent on startup, imports of the
+subcommand and the command itself is reported on stderr.
+"""
+
+import time
+
+_START = time.perf_counter()
+
+import argparse
+import importlib
+import json
+import sys
+
+
+def _write(data, path):
+    """Write a json result to a file or stdout"""
+    if path:
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+    else:
+        json.dump(data, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+
+def cmd_simulate(args):
+    from Simulation import simulate
+    result = simulate(args.games, args.players, seed=args.seed, max_turns=args.max_turns, workers=args.workers,
+                      chunk_size=args.chunk_size, stats=args.stats)
+    _write(result.as_dict(), args.output)
+
+
+def cmd_tournament(args):
+    from Tournament import Tournament
+    tournament = Tournament(args.strategies, games_per_round=args.games_per_round, max_games=args.max_games,
+                            max_turns=args.max_turns, workers=args.workers, seed=args.seed)
+    tournament.run()
+    _write(tournament.as_dict(), args.output)
+
+
+def cmd_bench(args):
+    import bench
+    return bench.main(args.bench_args)
+
+
+def cmd_replay(args):
+    from Replay import Replay
+    from Simulation import game_seed
+    if args.log:
+        replay = Replay.from_event_log(args.log, args.game, len(args.players))
+    elif args.seed is not None:
+        replay = Replay.from_seed(args.players, game_seed(args.seed, args.game, args.chunk_size), args.max_turns)
+    else:
+        raise SystemExit("replay needs --seed or --log")
+    board = replay.seek(args.turn) if args.turn is not None else replay.seek_move(len(replay))
+    _write({
+        "moves": len(replay),
+        "turn": args.turn,
+        "state": list(board.state),
+        "board": str(board),
+        "winner": replay.game.winner.id if replay.game is not None and replay.game.winner is not None else None,
+    }, args.output)
+
+
+def build_parser():
+    """Return the argument parser of the command line"""
+    parser = argparse.ArgumentParser(prog="cli.py", description="Simulate, rate and inspect games")
+    parser.add_argument("--timing", action="store_true", help="report startup, import and run time on stderr")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.required = True
+
+    players = argparse.ArgumentParser(add_help=False)
+    players.add_argument("-p", "--players", nargs="+", default=["random"] * 4, metavar="TYPE",
+                         help="player type of every seat (default: four random players)")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--seed", type=int, help="master seed (default: random)")
+    common.add_argument("--max-turns", type=int, default=1000, help="turn limit of a game (default 1000)")
+    common.add_argument("-o", "--output", help="write the json result to this file instead of stdout")
+
+    sub = commands.add_parser("simulate", parents=[players, common], help="play many games and count the wins")
+    sub.add_argument("-n", "--games", type=int, default=1000, help="number of games (default 1000)")
+    sub.add_argument("--workers", type=int, default=1, help="number of worker processes (default 1)")
+    sub.add_argument("--chunk-size", type=int, default=1000, help="games per chunk (default 1000)")
+    sub.add_argument("--stats", action="store_true", help="collect game statistics, requires NumPy")
+    sub.set_defaults(func=cmd_simulate, modules=("Simulation",))
+
+    sub = commands.add_parser("tournament", parents=[common], help="rate strategies against each other")
+    sub.add_argument("strategies", nargs="+", help="player types to rate")
+    sub.add_argument("--games-per-round", type=int, default=60, help="games per pairing and round (default 60)")
+    sub.add_argument("--max-games", type=int, default=12000, help="maximum games per pairing (default 12000)")
+    sub.add_argument("--workers", type=int, default=1, help="number of worker processes (default 1)")
+    sub.set_defaults(func=cmd_tournament, modules=("Tournament",))
+
+    # all further arguments are passed on to bench.py, see main
+    sub = commands.add_parser("bench", add_help=False, help="run the benchmarks, arguments are passed on to bench.py")
+    sub.set_defaults(func=cmd_bench, modules=("bench",))
+
+    sub = commands.add_parser("replay", parents=[players, common], help="show the board of a recorded game")
+    sub.add_argument("--turn", type=int, help="show the board at the start of this turn (default: end of the game)")
+    sub.add_argument("--log", help="read the game from this binary event log instead of playing it again")
+    sub.add_argument("--game", type=int, default=0,
+                     help="index of the game in the simulation or id of the game in the event log (default 0)")
+    sub.add_argument("--chunk-size", type=int, default=1000,
+                     help="chunk size of the simulation the game was played in (default 1000)")
+    sub.set_defaults(func=cmd_replay, modules=("Replay", "Simulation"))
+    return parser
+
+
+def main(argv=None):
+    """
+    Run a subcommand.
+    :param argv: Command line arguments, defaults to sys.argv[1:]
+    :type argv: list of str
+    :return: Exit code
+    :rtype: int
+    """
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if args.command == "bench":
+        args.bench_args = extra
+    elif extra:
+        parser.error("unrecognized arguments: {}".format(" ".join(extra)))
+    parsed = time.perf_counter()
+    # the modules of the command are imported here, so they are part of the import time
+    for module in args.modules:
+        importlib.import_module(module)
+    imported = time.perf_counter()
+    code = args.func(args)
+    if args.timing:
+        print("startup {:.1f} ms, imports {:.1f} ms, {} {:.1f} ms".format(
+            (parsed - _START) * 1e3, (imported - parsed) * 1e3, args.command,
+            (time.perf_counter() - imported) * 1e3), file=sys.stderr)
+    return code or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
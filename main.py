@@ -1,5 +1,7 @@
 from Game import Game
+from utils import configure_output, TURN
 
 if __name__ == '__main__':
+    configure_output("stdout", TURN)
     g = Game("random", "random", "random", "random")
     g.play()
@@ -1,6 +1,7 @@
+import random
 import unittest
-from Board import Board, Token, InvalidMoveException
-from Player import RandomPlayer
+from Board import Board, Token, InvalidMoveException, HOME_CODE, TARGET_CODE, is_capture
+from Player import RandomPlayer, FirstPlayer, LastPlayer
 
 
 class TestHome(unittest.TestCase):
@@ -183,6 +184,20 @@ class TestThrowing(unittest.TestCase):
                 self.assertIn(moved_token, new_home_tokens)
                 self.assertEqual(moved_token.position, self.board.home_pos)
 
+    def test_capture_reported(self):
+        """Test if the position change of the captured token is the only one told apart by is_capture"""
+        codes = []
+
+        class Recorder:
+            def token_moved(self, token, old_code, new_code):
+                codes.append(new_code)
+
+        self.board._place(self.board.tokens[1][0], 5)
+        self.board._place(self.board.tokens[0][0], 3)
+        self.board.recorder = Recorder()
+        self.board.move_token(self.board.tokens[0][0], 2)
+        self.assertEqual([is_capture(code, self.board.home_code) for code in codes], [True, False])
+
     def test_throw_from_target_exception(self):
         """Test if throwing a token that is in a players target raises the
         InvalidMoveException"""
@@ -264,4 +279,267 @@ class TestPlayerWinChecking(unittest.TestCase):
                     # first move in front, then into the target
                     self.board._move(token, self.board.get_target_position(player.id))
                     self.board.move_token(token, places_to_move)
-                self.assertEqual(player.has_won(self.board), True)
\ No newline at end of file
+                self.assertEqual(player.has_won(self.board), True)
+
+    def test_won_on_last_token(self):
+        """Test if the board reports the win exactly when the last token enters the target"""
+        tokens = self.board.get_player_tokens(2)
+        for token, places_to_move in zip(tokens, range(1, 5)):
+            self.assertFalse(self.board.has_won(2))
+            self.board._move(token, self.board.get_target_position(2))
+            self.board.move_token(token, places_to_move)
+        self.assertTrue(self.board.has_won(2))
+        self.board.restore(self.board.snapshot())
+        self.assertTrue(self.board.has_won(2))
+        self.board._move(tokens[0], self.board.home_pos)
+        self.assertFalse(self.board.has_won(2))
+        self.assertEqual(self.board.home_token_number(2), 1)
+
+    def test_game_ends_on_winning_move(self):
+        """Test if a game stops right after the move that fills the target"""
+        from Game import Game
+        from Replay import MoveListRecorder, Replay
+        recorder = MoveListRecorder()
+        game = Game("random", "first", "last", "random", rng=random.Random(9), recorder=recorder)
+        winner = game.run()
+        self.assertIs(winner, game.winner)
+        self.assertEqual(recorder.moves[-1].player, winner.id)
+        self.assertTrue(game.board.has_won(winner.id))
+        replay = Replay(recorder.moves)
+        self.assertFalse(any(replay.seek_move(len(replay) - 1).has_won(p) for p in range(4)))
+
+
+class TestMovingBlocked(unittest.TestCase):
+    """Tests moves that are blocked by the players own tokens"""
+
+    def setUp(self):
+        self.players = [RandomPlayer(i) for i in range(4)]
+        self.board = Board(self.players)
+
+    def test_move_onto_own_token(self):
+        """Test if moving onto a field occupied by an own token raises the
+        InvalidMoveException and leaves both tokens in place"""
+        for player in self.players:
+            with self.subTest(player=player):
+                start = self.board.get_start_position(player.id)
+                first, second = self.board.get_home_tokens(player.id)[:2]
+                self.board._move(first, start)
+                self.board._move(second, start + 3)
+                with self.assertRaises(InvalidMoveException):
+                    self.board.move_token(first, 3)
+                self.assertEqual(first.position, start)
+                self.assertEqual(self.board.get_field_content(start + 3), second)
+
+    def test_move_token_in_target(self):
+        """Test if trying to move a token that is already in the target raises
+        the InvalidMoveException"""
+        for player in self.players:
+            with self.subTest(player=player):
+                token = self.board.get_home_tokens(player.id)[0]
+                self.board._move(token, self.board.get_target_position(player.id))
+                self.board.move_token(token, 1)
+                with self.assertRaises(InvalidMoveException):
+                    self.board.move_token(token, 1)
+
+
+class TestStateArray(unittest.TestCase):
+    """Tests the position codes in the state array of the board"""
+
+    def setUp(self):
+        self.players = [RandomPlayer(i) for i in range(4)]
+        self.board = Board(self.players)
+
+    def test_initial_state(self):
+        """Test if all tokens start with the home code"""
+        self.assertEqual(list(self.board.state), [HOME_CODE] * 16)
+
+    def test_positions_follow_state(self):
+        """Test if token positions and the occupancy index follow moves, target
+        entries and throws"""
+        for player in self.players:
+            with self.subTest(player=player):
+                token = self.board.get_home_tokens(player.id)[0]
+                self.board.move_out_of_home(player.id)
+                start = self.board.get_start_position(player.id)
+                self.assertEqual(self.board.state[token.slot], start)
+                self.assertIs(self.board.get_field_content(start), token)
+                self.board._move(token, self.board.get_target_position(player.id))
+                self.assertIsNone(self.board.get_field_content(start))
+                self.board.move_token(token, 2)
+                self.assertEqual(self.board.state[token.slot], TARGET_CODE + 1)
+                self.assertEqual(token.position, -2 * (player.id + 1))
+
+    def test_throw_resets_code(self):
+        """Test if a thrown token gets the home code again"""
+        self.board.move_out_of_home(1)
+        token = self.board.get_start_content(1)
+        self.board._move(token, self.board.get_start_position(2) - 1)
+        self.board.move_out_of_home(2)
+        self.board.move_token(token, 1)
+        thrown = self.board.get_player_tokens(2)
+        self.assertEqual(self.board.home_token_number(2), 4)
+        self.assertTrue(all(self.board.state[t.slot] == HOME_CODE for t in thrown))
+        self.assertIs(self.board.get_start_content(2), token)
+
+
+class TestLegalMoves(unittest.TestCase):
+    """Tests the legal move generator"""
+
+    def setUp(self):
+        self.players = [RandomPlayer(i) for i in range(4)]
+        self.board = Board(self.players)
+
+    def test_no_moves_without_six(self):
+        """Test if a player with all tokens at home can only move with a 6"""
+        for roll in range(1, 6):
+            with self.subTest(roll=roll):
+                self.assertEqual(self.board.legal_moves(0, roll), [])
+        self.assertEqual(self.board.legal_moves(0, 6), list(self.board.get_home_tokens(0)))
+
+    def test_leaving_home_mandatory(self):
+        """Test if only home tokens are returned when a token can leave the home"""
+        self.board.move_out_of_home(1)
+        self.board.move_token(self.board.get_start_content(1), 3)
+        self.assertEqual(self.board.legal_moves(1, 6), list(self.board.get_home_tokens(1)))
+
+    def test_start_blocked_by_own(self):
+        """Test if tokens on the board can move on a 6 when the start field is blocked by an own token"""
+        self.board.move_out_of_home(2)
+        start_token = self.board.get_start_content(2)
+        self.assertEqual(self.board.legal_moves(2, 6), [start_token])
+
+    def test_blocked_and_overshooting(self):
+        """Test if moves onto own tokens and past the target are not returned"""
+        first, second, third, _ = self.board.get_player_tokens(0)
+        self.board._move(first, 10)
+        self.board._move(second, 13)
+        self.board._move(third, 39)
+        self.assertEqual(self.board.legal_moves(0, 3), [second, third])
+        self.assertEqual(self.board.legal_moves(0, 5), [first, second])
+
+    def test_agrees_with_move_token(self):
+        """Play random games and check every legal move generator result with move_token"""
+        rng = random.Random(2)
+        for _ in range(4):
+            board = Board([RandomPlayer(i) for i in range(4)])
+            for turn in range(300):
+                player_id = turn % 4
+                roll = rng.randint(1, 6)
+                legal = board.legal_moves(player_id, roll)
+                for token in board.get_player_tokens(player_id):
+                    # check each token on a copy of the current state
+                    probe = Board([RandomPlayer(i) for i in range(4)])
+                    for t in (t for tokens in board.tokens for t in tokens):
+                        probe._place(probe.tokens[t.id][t.slot & 3], board.state[t.slot])
+                    probe_token = probe.tokens[player_id][token.slot & 3]
+                    try:
+                        if token in board.get_home_tokens(player_id) and roll != 6:
+                            raise InvalidMoveException
+                        probe.move_token(probe_token, roll)
+                        accepted = True
+                    except InvalidMoveException:
+                        accepted = False
+                    if token in legal:
+                        self.assertTrue(accepted)
+                    elif token not in board.get_home_tokens(player_id):
+                        # tokens on the board are only left out if leaving the home is mandatory
+                        self.assertTrue(not accepted or bool(legal) and legal[0] in board.get_home_tokens(player_id))
+                if legal:
+                    board.move_token(rng.choice(legal), roll)
+
+    def test_token_masks(self):
+        """Test if the home, board and target tuples follow moves and throws"""
+        token = self.board.get_home_tokens(3)[0]
+        self.board.move_out_of_home(3)
+        self.assertNotIn(token, self.board.get_home_tokens(3))
+        self.assertIn(token, self.board.get_player_tokens_on_board(3))
+        self.board._move(token, self.board.get_target_position(3))
+        self.board.move_token(token, 1)
+        self.assertEqual(self.board.get_target_tokens(3), (token,))
+        self.assertEqual(self.board.home_token_number(3), 3)
+        other = self.board.get_home_tokens(3)[0]
+        self.board.move_out_of_home(3)
+        self.board.throw(other)
+        self.assertIn(other, self.board.get_home_tokens(3))
+        self.assertEqual(self.board.home_token_number(3), 3)
+
+
+class TestApplyUndo(unittest.TestCase):
+    """Randomized checks of taking moves back with undo"""
+
+    def setUp(self):
+        self.players = [RandomPlayer(i) for i in range(4)]
+        self.board = Board(self.players)
+
+    def board_content(self, board):
+        # only the fields of the occupancy index, the target positions of different players share entries
+        return (board.snapshot(), [None if t is None else t.slot for t in board.board[:40]],
+                [list(m) for m in board._masks])
+
+    def test_apply_matches_move_token(self):
+        """Test if apply moves like move_token and returns the captured token"""
+        rng = random.Random(7)
+        other = Board([RandomPlayer(i) for i in range(4)])
+        for _ in range(2000):
+            player = rng.randrange(4)
+            roll = rng.randint(1, 6)
+            moves = self.board.legal_moves(player, roll)
+            if not moves:
+                continue
+            token = rng.choice(moves)
+            before = self.board.snapshot()
+            record = self.board.apply(token, roll)
+            other.move_token(other.tokens[player][token.slot & 3], roll)
+            self.assertEqual(self.board.snapshot(), other.snapshot())
+            self.assertEqual(record[:2], (token.slot, before[token.slot]))
+            if record[2] >= 0:
+                self.assertEqual(self.board.state[record[2]], HOME_CODE)
+                self.assertEqual(before[record[2]], record[3])
+
+    def test_undo_restores(self):
+        """Test if undoing sequences of moves in reverse order restores every intermediate board"""
+        rng = random.Random(8)
+        for _ in range(100):
+            history = []
+            for _ in range(rng.randint(1, 60)):
+                player = rng.randrange(4)
+                roll = rng.randint(1, 6)
+                moves = self.board.legal_moves(player, roll)
+                if moves:
+                    content = self.board_content(self.board)
+                    history.append((content, self.board.apply(rng.choice(moves), roll)))
+            for content, record in reversed(history):
+                self.board.undo(record)
+                self.assertEqual(self.board_content(self.board), content)
+            # continue from a random position in the next round
+            for _ in range(rng.randint(0, 40)):
+                player = rng.randrange(4)
+                self.players[player].turn(self.board, rng.randint(1, 6))
+
+    def test_invalid_move_unchanged(self):
+        """Test if a rejected move leaves the board unchanged"""
+        token = self.board.get_home_tokens(0)[0]
+        self.board.move_token(token, 6)
+        content = self.board_content(self.board)
+        with self.assertRaises(InvalidMoveException):
+            self.board.apply(self.board.get_home_tokens(0)[0])
+        self.assertEqual(self.board_content(self.board), content)
+
+
+class TestStrategies(unittest.TestCase):
+    """Tests the token selection of the rule based players"""
+
+    def setUp(self):
+        self.players = [FirstPlayer(0), LastPlayer(1)]
+        self.board = Board(self.players)
+
+    def test_first_and_last(self):
+        for player in self.players:
+            with self.subTest(player=player):
+                start = self.board.get_start_position(player.id)
+                back, front = self.board.get_home_tokens(player.id)[:2]
+                self.board._move(back, start + 2)
+                self.board._move(front, start + 20)
+                player.turn(self.board, 3)
+                moved = front if isinstance(player, FirstPlayer) else back
+                self.assertEqual(self.board.get_progress(moved), 23 if moved is front else 5)
@@ -0,0 +1,133 @@
+import random
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import Registry
+from Board import Board, InvalidMoveException
+from Game import Game
+from Player import RandomPlayer
+
+if np is not None:
+    from Environment import VectorEnv, PolicyPlayer, observe, action_mask
+
+
+def random_policy(rng):
+    def policy(obs, masks):
+        return np.array([rng.choice(np.flatnonzero(mask)) for mask in masks])
+    return policy
+
+
+def furthest_policy(obs, masks):
+    """Move the legal token that has come furthest, like FirstPlayer"""
+    progress = np.where(masks, obs[:, :4], -100)
+    return progress.argmax(axis=1)
+
+
+@unittest.skipIf(np is None, "NumPy not installed")
+class TestVectorEnv(unittest.TestCase):
+
+    def test_reset(self):
+        env = VectorEnv(8, seed=1)
+        obs, masks = env.reset()
+        self.assertEqual(obs.shape, (8, 17))
+        self.assertEqual(masks.shape, (8, 4))
+        self.assertTrue(masks.any(axis=1).all())
+        # the learner only has to decide when it can move, on an empty board that needs a 6
+        self.assertTrue((obs[:, -1] == 6).all())
+
+    def test_masks_match_board(self):
+        env = VectorEnv(4, ("first", "last", "random"), seat=2, seed=2)
+        obs, masks = env.reset()
+        policy = random_policy(random.Random(0))
+        for _ in range(200):
+            for k, board in enumerate(env.boards):
+                self.assertEqual(masks[k].tolist(), action_mask(board, 2, int(env.rolls[k])).tolist())
+                self.assertEqual(obs[k].tolist(), observe(board, 2, int(env.rolls[k])).tolist())
+            obs, rewards, dones, masks = env.step(policy(obs, masks))
+
+    def test_episodes(self):
+        env = VectorEnv(16, seed=3)
+        obs, masks = env.reset()
+        policy = random_policy(random.Random(1))
+        finished = []
+        for _ in range(2000):
+            obs, rewards, dones, masks = env.step(policy(obs, masks))
+            self.assertTrue(((rewards == 0) | dones).all())
+            finished.extend(rewards[dones].tolist())
+            self.assertTrue(masks.any(axis=1).all())
+        self.assertGreater(len(finished), 20)
+        self.assertTrue(set(finished) <= {-1., 0., 1.})
+        # one random learner against three random opponents wins about a quarter of the games
+        self.assertLess(abs(finished.count(1.) / len(finished) - .25), .15)
+
+    def test_illegal_action(self):
+        env = VectorEnv(2, seed=4)
+        obs, masks = env.reset()
+        while masks.all():
+            obs, rewards, dones, masks = env.step(furthest_policy(obs, masks))
+        k, action = np.argwhere(~masks)[0]
+        actions = furthest_policy(obs, masks)
+        actions[k] = action
+        snapshot = [board.snapshot() for board in env.boards]
+        with self.assertRaises(InvalidMoveException):
+            env.step(actions)
+        self.assertEqual([board.snapshot() for board in env.boards], snapshot)
+
+    def test_deterministic(self):
+        runs = []
+        for _ in range(2):
+            env = VectorEnv(4, seed=5)
+            obs, masks = env.reset()
+            observations = [obs]
+            for _ in range(100):
+                obs, rewards, dones, masks = env.step(furthest_policy(obs, masks))
+                observations.append(obs)
+            runs.append(np.stack(observations))
+        self.assertTrue((runs[0] == runs[1]).all())
+
+    def test_relative_positions(self):
+        """Test if rotated positions look the same from the rotated seat"""
+        a = Board([RandomPlayer(i) for i in range(4)])
+        b = Board([RandomPlayer(i) for i in range(4)])
+        a._place(a.tokens[0][0], 5)
+        a._place(a.tokens[1][1], 12)
+        a._place(a.tokens[3][2], 41)
+        b._place(b.tokens[2][0], 25)
+        b._place(b.tokens[3][1], 32)
+        b._place(b.tokens[1][2], 41)
+        self.assertEqual(observe(a, 0, 3).tolist(), observe(b, 2, 3).tolist())
+        self.assertEqual(observe(a, 0, 3)[:4].tolist(), [5, -1, -1, -1])
+
+
+@unittest.skipIf(np is None, "NumPy not installed")
+class TestPolicyPlayer(unittest.TestCase):
+
+    def setUp(self):
+        self.specs = dict(Registry._specs)
+
+    def tearDown(self):
+        Registry._specs.clear()
+        Registry._specs.update(self.specs)
+        Registry._classes.clear()
+
+    def test_same_as_first_player(self):
+        """Test if a policy that picks the furthest token plays like FirstPlayer"""
+        Registry.register("furthest", PolicyPlayer.bind(furthest_policy, "Furthest"))
+        for seed in range(5):
+            a = Game("furthest", "random", "last", "random", rng=random.Random(seed))
+            b = Game("first", "random", "last", "random", rng=random.Random(seed))
+            self.assertEqual(a.run(1000).id, b.run(1000).id)
+            self.assertEqual(list(a.board.state), list(b.board.state))
+            self.assertEqual(type(a.p1).__name__, "Furthest")
+
+    def test_needs_policy(self):
+        with self.assertRaises(ValueError):
+            PolicyPlayer(0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import random
+import tempfile
+import unittest
+
+from EventLog import EventRecorder, iter_events, load_events, MOVE, WIN, RECORD_SIZE, MAGIC
+from Game import Game
+from Simulation import simulate
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class TestEventLog(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".bin")
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_records_match_game(self):
+        """Test if replaying the recorded moves on a fresh board gives the final board of the game"""
+        with EventRecorder(self.path, buffer_records=16) as recorder:
+            game = Game("random", "random", "random", "random", rng=random.Random(4), recorder=recorder)
+            game.run()
+        events = list(iter_events(self.path))
+        self.assertEqual(os.path.getsize(self.path), len(MAGIC) + RECORD_SIZE * len(events))
+        self.assertEqual(events[-1].kind, WIN)
+        self.assertEqual(events[-1].player, game.winner.id)
+        moves = [e for e in events if e.kind == MOVE]
+        self.assertEqual(moves[-1].turn, game.turns)
+
+        replayed = Game("random", "random", "random", "random").board
+        for event in moves:
+            if event.captured >= 0:
+                # tokens of a player are interchangeable, the captured one is the one on the destination field
+                token = replayed.board[event.to_code]
+                self.assertEqual(token.id, event.captured // 4)
+                replayed.throw(token)
+            if event.from_code >= 0:
+                token = next(t for t in replayed.tokens[event.player] if replayed.state[t.slot] == event.from_code)
+                replayed._place(token, event.to_code)
+        self.assertEqual(sorted(replayed.state), sorted(game.board.state))
+
+    def test_simulation_game_ids(self):
+        """Test if every game of a simulation gets its own id and one win record"""
+        with EventRecorder(self.path) as recorder:
+            result = simulate(5, ("random",) * 4, seed=2, recorder=recorder)
+        wins = [e for e in iter_events(self.path) if e.kind == WIN]
+        self.assertEqual([e.game for e in wins], list(range(5)))
+        self.assertEqual(sorted(e.player for e in wins), sorted(
+            seat for seat, n in enumerate(result.seat_wins) for _ in range(n)))
+
+    @unittest.skipIf(np is None, "NumPy not installed")
+    def test_memory_map(self):
+        """Test if the memory mapped array contains the same records as the lazy reader"""
+        with EventRecorder(self.path) as recorder:
+            simulate(2, ("random",) * 4, seed=2, recorder=recorder)
+        events = load_events(self.path)
+        self.assertEqual(len(events), recorder.records)
+        self.assertEqual([tuple(e.tolist()) for e in events], [tuple(e) for e in iter_events(self.path)])
+
+    @unittest.skipIf(np is None, "NumPy not installed")
+    def test_empty_log(self):
+        EventRecorder(self.path).close()
+        self.assertEqual(len(load_events(self.path)), 0)
+        self.assertEqual(list(iter_events(self.path)), [])
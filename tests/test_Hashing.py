@@ -0,0 +1,106 @@
+import random
+import unittest
+
+from Board import Board, TARGET_CODE
+from Hashing import StateCache, full_hash
+from Player import RandomPlayer, MonteCarloPlayer
+
+
+def new_board():
+    return Board([RandomPlayer(i) for i in range(4)])
+
+
+def place(board, positions):
+    """Put tokens on position codes, positions maps player id -> list of codes"""
+    for player, codes in positions.items():
+        for token, code in zip(board.tokens[player], codes):
+            board._place(token, code)
+    return board
+
+
+class TestZobristHash(unittest.TestCase):
+
+    def test_incremental(self):
+        """Test if the hash kept by the board equals the hash computed from scratch"""
+        rng = random.Random(3)
+        board = new_board()
+        initial = board.state_hash()
+        self.assertEqual(initial, 0)
+        records = []
+        for _ in range(3000):
+            player = rng.randrange(4)
+            roll = rng.randint(1, 6)
+            moves = board.legal_moves(player, roll)
+            if moves:
+                records.append(board.apply(rng.choice(moves), roll))
+                self.assertEqual(board._hash, full_hash(board._zobrist, board.state))
+            if board.has_won(player):
+                break
+        snapshot, value = board.snapshot(), board._hash
+        for record in reversed(records):
+            board.undo(record)
+        self.assertEqual(board.state_hash(), initial)
+        board.restore(snapshot)
+        self.assertEqual(board._hash, value)
+
+    def test_interchangeable_tokens(self):
+        """Test if the hash only depends on the positions, not on which token is where"""
+        a = place(new_board(), {0: [5, 17], 2: [TARGET_CODE + 1]})
+        b = place(new_board(), {0: [17, 5], 2: [44, 44, TARGET_CODE + 1]})
+        self.assertEqual(a.state_hash(), b.state_hash())
+        self.assertNotEqual(a.state_hash(), place(new_board(), {0: [5, 18]}).state_hash())
+        self.assertNotEqual(a.state_hash(), place(new_board(), {1: [5, 17], 2: [TARGET_CODE + 1]}).state_hash())
+
+    def test_distinct(self):
+        """Test if random positions get distinct hashes"""
+        rng = random.Random(4)
+        states, hashes = set(), set()
+        for _ in range(2000):
+            board = new_board()
+            for player in range(4):
+                place(board, {player: rng.sample(range(40), rng.randint(0, 4))})
+            states.add(bytes(board.snapshot()))
+            hashes.add(board.state_hash())
+        self.assertEqual(len(hashes), len(states))
+
+    def test_rotation(self):
+        """Test if a position rotated by one seat has the same hash from the rotated seat"""
+        a = place(new_board(), {0: [5, 12, TARGET_CODE + 2], 1: [20], 3: [38]})
+        b = place(new_board(), {1: [15, 22, TARGET_CODE + 2], 2: [30], 0: [8]})
+        self.assertEqual(a.canonical_hash(0), b.canonical_hash(1))
+        self.assertEqual(a.canonical_hash(0), a.state_hash())
+        self.assertNotEqual(a.canonical_hash(0), b.canonical_hash(0))
+        self.assertNotEqual(a.canonical_hash(1), b.canonical_hash(1))
+
+
+class TestStateCache(unittest.TestCase):
+
+    def test_lru(self):
+        """Test if the least recently used entry is dropped when the cache is full"""
+        cache = StateCache(maxsize=2)
+        cache.put(1, "a")
+        cache.put(2, "b")
+        self.assertEqual(cache.get(1), "a")
+        cache.put(3, "c")
+        self.assertNotIn(2, cache)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(2))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_player_cache_shared_between_seats(self):
+        """Test if a decision cached on one seat is reused on the rotated position of another seat"""
+        cache = StateCache()
+        players = [MonteCarloPlayer(i, random.Random(i), max_rollouts=64, time_limit=None, cache=cache)
+                   for i in range(4)]
+        a = place(Board(players), {0: [5, 12]})
+        b = place(Board(players), {1: [15, 22]})
+        players[0].turn(a, 3)
+        self.assertGreater(players[0].last_rollouts, 0)
+        players[1].turn(b, 3)
+        self.assertEqual(players[1].last_rollouts, 0)
+        self.assertEqual(sorted(a.get_progress(t) for t in a.get_player_tokens_on_board(0)),
+                         sorted(b.get_progress(t) for t in b.get_player_tokens_on_board(1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import random
+import unittest
+
+from Board import Board, TARGET_CODE
+from Game import Game
+from Hashing import StateCache
+from Player import MonteCarloPlayer, RandomPlayer
+from Rules import RuleSpec
+
+
+class ScriptedDice:
+    """Random number generator that rolls the given numbers, then always the same, and picks the first choice"""
+
+    def __init__(self, rolls, then):
+        self.rolls = list(rolls)
+        self.then = then
+
+    def randint(self, a, b):
+        return self.rolls.pop(0) if self.rolls else self.then
+
+    def choice(self, seq):
+        return seq[0]
+
+
+class TestMonteCarloPlayer(unittest.TestCase):
+
+    def setUp(self):
+        self.player = MonteCarloPlayer(0, random.Random(1), max_rollouts=2000, time_limit=None)
+        self.players = [self.player] + [RandomPlayer(i) for i in range(1, 4)]
+        self.board = Board(self.players)
+        tokens = self.board.tokens[0]
+        self.board._place(tokens[0], TARGET_CODE + 3)
+        self.board._place(tokens[1], TARGET_CODE + 2)
+        self.board._place(tokens[2], 39)
+        self.board._place(tokens[3], 20)
+
+    def test_board_restored(self):
+        """Test if the rollouts leave the board as it was, except for the chosen move"""
+        others = self.board.snapshot()[4:]
+        self.player.turn(self.board, 2)
+        self.assertEqual(self.board.snapshot()[4:], others)
+        self.assertEqual(len({39, 20} & set(self.board.state[:4])), 1)
+        self.assertEqual(self.board.home_token_number(1), 4)
+
+    def test_clear_best_move_stops_early(self):
+        """Test if capturing a token that is about to win is chosen without using the whole rollout budget"""
+        opponent = self.board.tokens[1]
+        for token, code in zip(opponent, (TARGET_CODE + 1, TARGET_CODE + 2, TARGET_CODE + 3, 8)):
+            self.board._place(token, code)
+        self.board._place(self.board.tokens[0][2], 6)
+        self.player.turn(self.board, 2)
+        self.assertEqual(self.board.state[2], 8)
+        self.assertEqual(self.board.home_token_number(1), 1)
+        self.assertGreater(self.player.last_rollouts, 0)
+        self.assertLess(self.player.last_rollouts, self.player.max_rollouts)
+
+    def test_single_move_without_rollouts(self):
+        """Test if no rollouts are played when there is only one move"""
+        self.player.turn(self.board, 6)
+        self.assertEqual(self.player.last_rollouts, 0)
+        self.assertEqual(self.board.home_token_number(0), 0)
+
+    def test_rollout_budget(self):
+        """Test if a decision never uses more rollouts than allowed"""
+        self.player.max_rollouts = 20
+        self.player.z = 100.
+        self.player.turn(self.board, 2)
+        # the last batch is cut, two candidates with batches of 8 would otherwise play 32 rollouts
+        self.assertEqual(self.player.last_rollouts, 20)
+
+    def test_rollouts_follow_extra_roll(self):
+        """Test if rollouts give this player another roll after a 6 when the rules do"""
+        players = [MonteCarloPlayer(0, random.Random(1), max_rollout_turns=3)] + [RandomPlayer(i) for i in range(1, 4)]
+        board = Board(players, RuleSpec(extra_roll_on_six=True))
+        for token, code in zip(board.tokens[0], (TARGET_CODE + 3, TARGET_CODE + 2, TARGET_CODE + 1, 38)):
+            board._place(token, code)
+        # only a 2 wins and a 3 can't be moved, after a 6 the 2 is rolled by this player, otherwise by the next one
+        start = board.snapshot()
+        players[0].rollout_rng = ScriptedDice([2], then=3)
+        self.assertEqual(players[0]._house_rollout(board, 6), 1)
+        board.restore(start)
+        players[0].rollout_rng = ScriptedDice([2], then=3)
+        self.assertEqual(players[0]._house_rollout(board, 5), 0)
+
+    def test_cache_key_includes_settings(self):
+        """Test if players with other settings don't take decisions from a shared cache"""
+        cache = StateCache()
+        decided = []
+        for z in (2., 3.):
+            player = MonteCarloPlayer(0, random.Random(1), max_rollouts=64, cache=cache, z=z)
+            board = Board([player] + self.players[1:])
+            board.restore(self.board.snapshot())
+            player.turn(board, 2)
+            decided.append(player.last_rollouts)
+        self.assertTrue(all(decided))
+        self.assertEqual(len(cache), 2)
+
+    def test_in_game(self):
+        """Test if the player can play a game created by type name"""
+        game = Game('montecarlo', 'random', 'random', 'random', rng=random.Random(2))
+        self.assertIsInstance(game.p1, MonteCarloPlayer)
+        game.p1.time_limit = 0.002
+        game.run(max_turns=30)
+        self.assertEqual(len(game.board.state), 16)
+
+    def test_reproducible(self):
+        """Test if games with the player are the same for the same seed"""
+        results = []
+        for _ in range(2):
+            game = Game('montecarlo', 'random', 'random', 'random', rng=random.Random(5))
+            game.p1.max_rollouts = 48
+            game.run(max_turns=40)
+            results.append((game.turns, list(game.board.state)))
+        self.assertEqual(results[0], results[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
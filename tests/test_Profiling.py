@@ -0,0 +1,116 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+
+from Game import Game
+from Profiling import PhaseProfiler, TimedDice
+from Rules import RuleSpec
+from Simulation import simulate
+
+
+class TestPhaseProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.profiler = PhaseProfiler()
+        self.game = Game("first", "last", "random", "random", rng=random.Random(3), profiler=self.profiler)
+        self.game.run()
+
+    def test_phase_counts(self):
+        """Test if every player turn is counted once in roll, decide and win check"""
+        by_strategy = self.profiler.by_strategy()
+        self.assertEqual(set(by_strategy), {"FirstPlayer", "LastPlayer", "RandomPlayer"})
+        player_turns = 0
+        for strategy, phases in by_strategy.items():
+            with self.subTest(strategy=strategy):
+                self.assertEqual(phases["roll"]["calls"], phases["decide"]["calls"])
+                self.assertEqual(phases["roll"]["calls"], phases["win_check"]["calls"])
+                self.assertLessEqual(phases["move"]["calls"], phases["decide"]["calls"])
+                player_turns += phases["roll"]["calls"]
+        winner = self.game.winner.id
+        self.assertEqual(player_turns, 4 * (self.game.turns - 1) + winner + 1)
+
+    def test_nesting(self):
+        """Test if captures are recorded inside moves inside decisions and self times add up"""
+        stacks = self.profiler.stats
+        self.assertIn(("RandomPlayer", "decide", "move"), stacks)
+        captures = [key for key in stacks if key[-1] == "capture"]
+        self.assertTrue(captures)
+        self.assertTrue(all(key[1:] == ("decide", "move", "capture") for key in captures))
+        for key in stacks:
+            self.assertGreaterEqual(self.profiler.self_time(key), 0)
+        root = ("FirstPlayer",)
+        total = sum(self.profiler.self_time(key) for key in stacks if key[0] == root[0])
+        self.assertEqual(total, stacks[root][1])
+
+    def test_export(self):
+        """Test the json and collapsed stack files"""
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            self.profiler.write_json(path)
+            with open(path) as f:
+                data = json.load(f)
+            self.assertEqual(data["strategies"], json.loads(json.dumps(self.profiler.by_strategy())))
+            self.profiler.write_collapsed(path)
+            with open(path) as f:
+                lines = f.read().splitlines()
+            self.assertEqual(len(lines), len(self.profiler.stats))
+            stack, value = lines[0].rsplit(" ", 1)
+            self.assertEqual(stack.split(";")[0], "FirstPlayer")
+            self.assertGreaterEqual(int(value), 0)
+        finally:
+            os.remove(path)
+
+    def test_detach(self):
+        """Test if detaching restores the plain board methods and dice"""
+        self.assertIn("move_token", vars(self.game.board))
+        self.assertIsInstance(self.game.rng, TimedDice)
+        self.profiler.detach(self.game)
+        self.assertIsNone(self.game.profiler)
+        self.assertNotIsInstance(self.game.rng, TimedDice)
+        self.assertNotIn("move_token", vars(self.game.board))
+        self.assertNotIn("_place", vars(self.game.board))
+
+    def test_unprofiled_game(self):
+        """Test if games without profiler use the plain board methods"""
+        game = Game("first", "last", "random", "random")
+        self.assertIsNone(game.profiler)
+        self.assertEqual(vars(game.board).keys() & {"move_token", "_place"}, set())
+
+    def test_house_rules(self):
+        """Test if games with house rules for the rolls are profiled and play like unprofiled ones"""
+        rules = RuleSpec(rolls_when_all_home=3, extra_roll_on_six=True)
+        profiler = PhaseProfiler()
+        profiled = Game("first", "last", "random", "random", rng=random.Random(5), profiler=profiler, rules=rules)
+        plain = Game("first", "last", "random", "random", rng=random.Random(5), rules=rules)
+        self.assertEqual(profiled.run().id, plain.run().id)
+        self.assertEqual(profiled.turns, plain.turns)
+        for phases in profiler.by_strategy().values():
+            self.assertEqual(phases["roll"]["calls"], phases["decide"]["calls"])
+            self.assertEqual(phases["roll"]["calls"], phases["win_check"]["calls"])
+        # extra rolls give more decisions than player turns
+        self.assertGreater(sum(phases["roll"]["calls"] for phases in profiler.by_strategy().values()),
+                           4 * (plain.turns - 1) + plain.winner.id + 1)
+
+    def test_rollouts_are_decisions(self):
+        """Test if only the moves of the game are timed as moves, not the rollouts of a Monte Carlo player"""
+        profiler = PhaseProfiler()
+        game = Game("montecarlo", "random", "random", "random", rng=random.Random(6), profiler=profiler)
+        game.p1.max_rollouts = 16
+        game.run(30)
+        phases = profiler.by_strategy()["MonteCarloPlayer"]
+        self.assertLessEqual(phases["move"]["calls"], phases["decide"]["calls"])
+        self.assertNotIn(("MonteCarloPlayer", "decide", "capture"), profiler.stats)
+
+    def test_simulation(self):
+        """Test if a profiled simulation gives the same results as an unprofiled one"""
+        profiler = PhaseProfiler()
+        self.assertEqual(simulate(5, ("first", "random", "random", "last"), seed=2, profiler=profiler),
+                         simulate(5, ("first", "random", "random", "last"), seed=2))
+        self.assertIn("LastPlayer", profiler.by_strategy())
+
+
+if __name__ == '__main__':
+    unittest.main()
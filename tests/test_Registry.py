@@ -0,0 +1,88 @@
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+import Registry
+from Game import Game
+from Player import FirstPlayer
+
+STRATEGY_MODULE = '''
+from Player import RandomPlayer
+
+class PluginPlayer(RandomPlayer):
+    pass
+'''
+
+
+class TestRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        for name in ("registry_plugin_a", "registry_plugin_b"):
+            with open(os.path.join(self.dir, name + ".py"), "w") as f:
+                f.write(STRATEGY_MODULE)
+        sys.path.insert(0, self.dir)
+        self.specs = dict(Registry._specs)
+
+    def tearDown(self):
+        sys.path.remove(self.dir)
+        shutil.rmtree(self.dir)
+        for name in ("registry_plugin_a", "registry_plugin_b"):
+            sys.modules.pop(name, None)
+        Registry._specs.clear()
+        Registry._specs.update(self.specs)
+        Registry._classes.clear()
+        os.environ.pop(Registry.ENV_VAR, None)
+
+    def test_builtin(self):
+        """Test if the built in strategies are found by name"""
+        self.assertIs(Registry.get_strategy('first'), FirstPlayer)
+        self.assertTrue({'first', 'last', 'random'} <= set(Registry.available()))
+
+    def test_unknown(self):
+        """Test if unknown strategies raise a TypeError like before"""
+        with self.assertRaises(TypeError):
+            Game('first', 'last', 'random', 'firstbeat')
+
+    def test_lazy_import(self):
+        """Test if the module of a strategy is only imported when a player is created"""
+        Registry.register('plugin', 'registry_plugin_a:PluginPlayer')
+        self.assertNotIn('registry_plugin_a', sys.modules)
+        game = Game('plugin', 'random', 'random', 'random', rng=random.Random(1))
+        self.assertIn('registry_plugin_a', sys.modules)
+        self.assertEqual(type(game.p1).__name__, 'PluginPlayer')
+        self.assertIs(game.p1.rng, game.rng)
+
+    def test_environment_and_config(self):
+        """Test if strategies are registered from the environment variable and config files"""
+        os.environ[Registry.ENV_VAR] = "env_plugin=registry_plugin_a:PluginPlayer"
+        Registry.discover()
+        config = os.path.join(self.dir, "strategies.json")
+        with open(config, "w") as f:
+            json.dump({"strategies": {"config_plugin": "registry_plugin_b:PluginPlayer"}}, f)
+        Registry.load_config(config)
+        self.assertEqual(Registry.create_player('env_plugin', 2).id, 2)
+        self.assertEqual(Registry.get_strategy('config_plugin').__module__, 'registry_plugin_b')
+
+    def test_invalid_path(self):
+        with self.assertRaises(ValueError):
+            Registry.register('broken', 'registry_plugin_a.PluginPlayer')
+
+    def test_shared_data(self):
+        """Test if shared data is built once per process"""
+        calls = []
+        for _ in range(3):
+            data = Registry.shared_data(('test', 1), lambda: calls.append(1) or [1, 2])
+        self.assertEqual(data, [1, 2])
+        self.assertEqual(len(calls), 1)
+        Registry.clear_shared_data()
+        Registry.shared_data(('test', 1), lambda: calls.append(1))
+        self.assertEqual(len(calls), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import random
+import tempfile
+import unittest
+
+from Board import Board
+from EventLog import EventRecorder
+from Player import Player
+from Replay import Replay
+from Simulation import simulate, game_seed
+
+
+def player_codes(board):
+    """Position codes of every player, sorted since tokens of a player are interchangeable"""
+    return [sorted(board.state[4 * p:4 * p + 4]) for p in range(board.num_players)]
+
+
+class TestReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.replay = Replay.from_seed(("random", "first", "last", "random"), seed=11, snapshot_interval=10)
+
+    def test_final_state(self):
+        """Test if applying the recorded moves gives the final board of the played game"""
+        self.assertEqual(player_codes(self.replay.board), player_codes(self.replay.game.board))
+
+    def test_seek_matches_full_replay(self):
+        """Test if jumping to a turn via snapshots gives the same board as applying all moves up to it"""
+        turns = list(range(1, self.replay.game.turns + 1))
+        random.Random(1).shuffle(turns)
+        for turn in turns:
+            with self.subTest(turn=turn):
+                expected = Board([Player(i) for i in range(4)])
+                plain = Replay([], 4)
+                plain.board = expected
+                for move in self.replay.moves:
+                    if move.turn >= turn:
+                        break
+                    plain._apply(move)
+                self.assertEqual(player_codes(self.replay.seek(turn)), player_codes(expected))
+
+    def test_snapshot_restore(self):
+        """Test if restoring a snapshot resets positions, occupancy and token tuples"""
+        board = self.replay.seek(20)
+        snapshot = board.snapshot()
+        home = [len(board.get_home_tokens(p)) for p in range(4)]
+        fields = [board.get_field_content(i) for i in range(40)]
+        self.replay.seek_move(len(self.replay))
+        board.restore(snapshot)
+        self.assertEqual(board.snapshot(), snapshot)
+        self.assertEqual([len(board.get_home_tokens(p)) for p in range(4)], home)
+        self.assertEqual([board.get_field_content(i) is None for i in range(40)], [f is None for f in fields])
+
+
+class TestReproduceSimulatedGame(unittest.TestCase):
+
+    def test_seed_and_log_agree(self):
+        """Test if a game of a simulation can be reproduced from its seed and from the event log"""
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            with EventRecorder(path) as recorder:
+                simulate(6, ("random",) * 4, seed=5, chunk_size=4, recorder=recorder)
+            for game in (0, 3, 5):
+                with self.subTest(game=game):
+                    from_log = Replay.from_event_log(path, game)
+                    from_seed = Replay.from_seed(("random",) * 4, game_seed(5, game, chunk_size=4))
+                    self.assertEqual(from_log.moves, from_seed.moves)
+                    self.assertEqual(player_codes(from_log.board), player_codes(from_seed.game.board))
+            with self.assertRaises(ValueError):
+                Replay.from_event_log(path, 6)
+        finally:
+            os.remove(path)
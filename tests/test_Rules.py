@@ -0,0 +1,161 @@
+import io
+import random
+import unittest
+
+from Board import Board
+from EventLog import EventRecorder
+from Game import Game
+from Hashing import full_hash
+from Player import RandomPlayer, FirstPlayer
+from Rules import RuleSpec, DEFAULT_RULES, compile_rules
+from Simulation import simulate
+from Transitions import transition_table, validate_transition_table
+
+
+class RecordingRolls:
+    """Recorder that keeps the dice rolls of every player"""
+
+    def new_game(self):
+        self.rolls = []
+        return 0
+
+    def token_moved(self, token, old_code, new_code):
+        pass
+
+    def record_turn(self, turn, player_id, dice_roll):
+        self.rolls.append((turn, player_id, dice_roll))
+
+    def win(self, player_id):
+        pass
+
+
+class TestCompileRules(unittest.TestCase):
+
+    def test_default_geometry(self):
+        """Test if the default spec compiles to the tables of the default board"""
+        compiled = compile_rules(DEFAULT_RULES)
+        self.assertEqual(compiled.start_fields, (0, 10, 20, 30))
+        self.assertEqual(compiled.target_fields, (39, 9, 19, 29))
+        self.assertEqual((compiled.num_fields, compiled.target_code, compiled.home_code), (40, 40, 44))
+        self.assertEqual(compiled.transitions, transition_table((0, 10, 20, 30), (39, 9, 19, 29)))
+        self.assertTrue(compiled.standard_turns)
+
+    def test_cached(self):
+        """Test if specs are compiled once and boards share the tables"""
+        spec = RuleSpec(seats=6)
+        self.assertIs(compile_rules(spec), compile_rules(RuleSpec(6, 10)))
+        a = Board([RandomPlayer(i) for i in range(6)], spec)
+        b = Board([RandomPlayer(i) for i in range(3)], spec)
+        self.assertIs(a._transitions, b._transitions)
+
+    def test_six_seats(self):
+        compiled = compile_rules(RuleSpec(seats=6))
+        self.assertEqual(compiled.start_fields, (0, 10, 20, 30, 40, 50))
+        self.assertEqual(compiled.target_fields, (59, 9, 19, 29, 39, 49))
+        self.assertEqual(compiled.home_code, 64)
+        validate_transition_table(compiled.transitions, compiled.start_fields, compiled.target_fields, 60)
+        self.assertEqual(compiled.transitions[0][58][5], 63)
+        self.assertEqual(compiled.transitions[1][58][6], 4)
+
+    def test_invalid(self):
+        for spec in (RuleSpec(seats=0), RuleSpec(fields_per_seat=0), RuleSpec(seats=12, fields_per_seat=11),
+                     RuleSpec(rolls_when_all_home=0)):
+            with self.subTest(spec=spec):
+                with self.assertRaises(ValueError):
+                    compile_rules(spec)
+
+
+class TestVariantBoard(unittest.TestCase):
+
+    def test_default_unchanged(self):
+        """Test if games with the default spec are the same as games without rules"""
+        for seed in range(5):
+            a = Game("random", "first", "last", "random", rng=random.Random(seed))
+            b = Game("random", "first", "last", "random", rng=random.Random(seed), rules=RuleSpec())
+            self.assertEqual(a.run(500).id, b.run(500).id)
+            self.assertEqual(a.turns, b.turns)
+            self.assertEqual(list(a.board.state), list(b.board.state))
+
+    def test_six_player_game(self):
+        spec = RuleSpec(seats=6)
+        for seed in range(5):
+            game = Game("random", "first", "last", "random", "first", "last", rng=random.Random(seed), rules=spec)
+            self.assertEqual(len(game.board.board), 84)
+            self.assertIsNotNone(game.run(2000))
+            self.assertTrue(game.board.has_won(game.winner.id))
+            board = game.board
+            self.assertEqual(board._hash, full_hash(board._zobrist, board.state))
+
+    def test_wrap_around(self):
+        board = Board([RandomPlayer(i) for i in range(6)], RuleSpec(seats=6))
+        token = board.tokens[1][0]
+        board._place(token, 57)
+        board.move_token(token, 5)
+        self.assertEqual(token.position, 2)
+        self.assertIs(board.get_field_content(2), token)
+        self.assertEqual(board.get_progress(token), 52)
+
+    def test_recorder_needs_default_geometry(self):
+        """Test if recorders, which only know the default position codes, are refused on other boards"""
+        with self.assertRaises(ValueError):
+            Game("random", "random", "random", "random", recorder=EventRecorder(io.BytesIO()),
+                 rules=RuleSpec(seats=6))
+        with self.assertRaises(ValueError):
+            simulate(2, ["random"] * 4, seed=1, recorder=EventRecorder(io.BytesIO()), rules=RuleSpec(seats=6))
+        # house rules on the default board can be recorded
+        Game("random", "random", "random", "random", recorder=RecordingRolls(),
+             rules=RuleSpec(extra_roll_on_six=True, mandatory_capture=True))
+
+    def test_too_many_players(self):
+        with self.assertRaises(ValueError):
+            Game("random", "random", "random", "random", "random")
+
+    def test_mandatory_capture(self):
+        players = [FirstPlayer(i) for i in range(2)]
+        plain = Board(players)
+        capturing = Board(players, RuleSpec(mandatory_capture=True))
+        for board in (plain, capturing):
+            # token 0 is further ahead, token 1 can capture the opponent on field 7
+            board._place(board.tokens[0][0], 20)
+            board._place(board.tokens[0][1], 4)
+            board._place(board.tokens[1][0], 7)
+        self.assertEqual(len(plain.legal_moves(0, 3)), 2)
+        self.assertEqual(capturing.legal_moves(0, 3), [capturing.tokens[0][1]])
+        capturing.players[0].turn(capturing, 3)
+        self.assertEqual(capturing.tokens[1][0].position, 'h')
+        # without a capture all moves stay legal
+        self.assertEqual(len(capturing.legal_moves(0, 2)), 2)
+
+    def test_three_rolls_when_all_home(self):
+        recorder = RecordingRolls()
+        game = Game("first", "first", "first", "first", rng=random.Random(1), recorder=recorder,
+                    rules=RuleSpec(rolls_when_all_home=3))
+        game.turn()
+        rolls = {}
+        for _, player_id, roll in recorder.rolls:
+            rolls.setdefault(player_id, []).append(roll)
+        for player_id, player_rolls in rolls.items():
+            # players roll until they rolled a 6 or used up their three tries
+            self.assertTrue(len(player_rolls) == 3 or player_rolls[-1] == 6, player_rolls)
+            self.assertNotIn(6, player_rolls[:-1])
+
+    def test_extra_roll_on_six(self):
+        recorder = RecordingRolls()
+        game = Game("random", "random", "random", "random", rng=random.Random(4), recorder=recorder,
+                    rules=RuleSpec(extra_roll_on_six=True))
+        game.run(30)
+        rolls = recorder.rolls
+        sixes = [i for i, (_, _, roll) in enumerate(rolls) if roll == 6]
+        self.assertTrue(sixes)
+        for i in sixes:
+            if i + 1 < len(rolls):
+                self.assertEqual(rolls[i + 1][:2], rolls[i][:2])
+
+    def test_house_rules_shorten_games(self):
+        plain = simulate(200, ["first"] * 4, seed=1)
+        house = simulate(200, ["first"] * 4, seed=1, rules=RuleSpec(rolls_when_all_home=3, extra_roll_on_six=True))
+        self.assertLess(house.mean_turns, plain.mean_turns)
+
+
+if __name__ == '__main__':
+    unittest.main()
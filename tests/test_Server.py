@@ -0,0 +1,214 @@
+import asyncio
+import json
+import unittest
+
+from Server import GameHost, LocalClient, serve
+
+
+async def play_human(client, pick=min):
+    """Answer every prompt of the host with a legal move until the game ends, return the end message"""
+    while True:
+        message = await client.receive()
+        if message["type"] == "your_turn":
+            await client.send({"type": "move", "game": message["game"], "seat": message["seat"],
+                               "slot": pick(message["moves"])})
+        elif message["type"] == "end":
+            return message
+
+
+class TestGameHost(unittest.IsolatedAsyncioTestCase):
+
+    async def test_many_bot_games(self):
+        """Test if many bot games run concurrently to the end"""
+        host = GameHost(seed=1)
+        ids = [host.start_game(("first", "last", "random", "random")) for _ in range(300)]
+        games = [host.games[i] for i in ids]
+        winners = await asyncio.gather(*(host.result(i) for i in ids))
+        self.assertTrue(all(w in range(4) for w in winners))
+        self.assertTrue(all(game.board.has_won(w) for game, w in zip(games, winners)))
+        # finished games are forgotten
+        await asyncio.sleep(0)
+        self.assertEqual((host.games, host.tasks, host.seats), ({}, {}, {}))
+
+    async def test_human_game(self):
+        """Test if a human seat is prompted and its moves are applied while bot games go on"""
+        host = GameHost(seed=2)
+        client = LocalClient(host)
+        await client.send({"type": "new_game", "seats": ["random", "human", "first", "random"]})
+        started = await client.receive()
+        self.assertEqual(started, {"type": "game", "game": 0, "seats": [1]})
+        game, result = host.games[0], host.result(0)
+        bots = [host.result(host.start_game(("random",) * 4)) for _ in range(20)]
+        prompts = 0
+        while True:
+            message = await client.receive()
+            if message["type"] == "end":
+                break
+            self.assertEqual(message["type"], "your_turn")
+            self.assertTrue(message["moves"])
+            prompts += 1
+            await client.send({"type": "move", "game": 0, "seat": 1, "slot": message["moves"][0]})
+        self.assertGreater(prompts, 0)
+        self.assertEqual(message["winner"], await result)
+        self.assertTrue(game.board.has_won(message["winner"]))
+        self.assertEqual(game.turns, message["turns"])
+        await asyncio.gather(*bots)
+
+    async def test_bots_not_blocked_by_waiting_human(self):
+        """Test if bot games finish while a human takes his time"""
+        host = GameHost(seed=3)
+        client = LocalClient(host)
+        await client.send({"type": "new_game", "seats": ["human", "random", "random", "random"]})
+        bot = host.start_game(("random",) * 4)
+        task = host.result(0)
+        await host.result(bot)
+        self.assertFalse(task.done())
+        await play_human(client)
+        await task
+
+    async def test_invalid_messages(self):
+        """Test if illegal moves and unknown messages are answered with errors"""
+        host = GameHost(seed=4)
+        client = LocalClient(host)
+        await client.send({"type": "dance"})
+        self.assertEqual((await client.receive())["type"], "error")
+        await client.send({"type": "move", "game": 7, "seat": 0, "slot": 0})
+        self.assertEqual((await client.receive())["type"], "error")
+        await client.send({"type": "new_game", "seats": ["human", "unknown", "random", "random"]})
+        self.assertEqual((await client.receive())["type"], "error")
+        await client.send({"type": "new_game", "seats": ["human", "random", "random", "random"]})
+        await client.receive()
+        while True:
+            prompt = await client.receive()
+            if prompt["type"] == "your_turn":
+                break
+        await client.send({"type": "move", "game": prompt["game"], "seat": 0, "slot": 15})
+        self.assertEqual((await client.receive())["type"], "error")
+        self.assertEqual(await client.receive(), prompt)
+
+    async def test_cpu_heavy_bot_in_executor(self):
+        """Test if games with Monte Carlo players finish, their decisions running in the executor"""
+        host = GameHost(seed=5, max_turns=15)
+        game_id = host.start_game(("montecarlo", "random", "random", "random"))
+        game = host.games[game_id]
+        game.p1.time_limit = 0.001
+        await host.result(game_id)
+        self.assertEqual(game.turns, 15)
+
+    async def test_client_leaves(self):
+        """Test if the games of a client are cancelled and forgotten when its session ends"""
+        host = GameHost(seed=7)
+        client = LocalClient(host)
+        await client.send({"type": "new_game", "seats": ["human", "random", "random", "random"]})
+        await client.send({"type": "new_game", "seats": ["random", "human", "human", "random"]})
+        bot = host.start_game(("random",) * 4)
+        tasks = [host.result(0), host.result(1)]
+        await client.receive()
+        client.session.close()
+        for task in tasks:
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+        self.assertIn(await host.result(bot), range(4))
+        # the client that left isn't told about the cancelled games
+        while not client.inbox.empty():
+            self.assertNotEqual(client.inbox.get_nowait()["type"], "end")
+        await asyncio.sleep(0)
+        self.assertEqual((host.games, host.tasks, host.seats), ({}, {}, {}))
+
+    async def test_foreign_seat(self):
+        """Test if a client can't move the seat of another client"""
+        host = GameHost(seed=9)
+        owner, intruder = LocalClient(host), LocalClient(host)
+        await owner.send({"type": "new_game", "seats": ["human", "random", "random", "random"]})
+        await owner.receive()
+        prompt = await owner.receive()
+        self.assertEqual(prompt["type"], "your_turn")
+        await intruder.send({"type": "move", "game": 0, "seat": 0, "slot": prompt["moves"][0]})
+        self.assertEqual((await intruder.receive())["type"], "error")
+        self.assertTrue(host.seats[0, 0].moves.empty())
+        host.cancel(0)
+
+    async def test_move_without_prompt(self):
+        """Test if moves are only accepted while the seat has to move"""
+        host = GameHost(seed=10)
+        client = LocalClient(host)
+        await client.send({"type": "new_game", "seats": ["random", "human", "random", "random"]})
+        await client.receive()
+        self.assertIsNone(host.seats[0, 1].prompt)
+        await client.send({"type": "move", "game": 0, "seat": 1, "slot": 4})
+        self.assertEqual((await client.receive())["type"], "error")
+        self.assertTrue(host.seats[0, 1].moves.empty())
+        # an early move queued before the prompt is discarded
+        await host.seats[0, 1].moves.put(7)
+        prompt = await client.receive()
+        self.assertEqual(prompt["type"], "your_turn")
+        self.assertTrue(host.seats[0, 1].moves.empty())
+        host.cancel(0)
+
+    async def test_cancel_notifies_clients(self):
+        """Test if the clients of a cancelled game are told that it ended"""
+        host = GameHost(seed=11)
+        client = LocalClient(host)
+        await client.send({"type": "new_game", "seats": ["human", "random", "random", "random"]})
+        await client.receive()
+        self.assertEqual((await client.receive())["type"], "your_turn")
+        task = host.result(0)
+        host.cancel(0)
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        end = await client.receive()
+        self.assertEqual((end["type"], end["winner"], end["cancelled"]), ("end", None, True))
+
+
+class TestTcpServer(unittest.IsolatedAsyncioTestCase):
+
+    async def test_json_lines(self):
+        """Test a game with a human seat over a socket"""
+        host = GameHost(seed=6)
+        server = await serve(host)
+        address, port = server.sockets[0].getsockname()[:2]
+        reader, writer = await asyncio.open_connection(address, port)
+        try:
+            writer.write(b'{"type": "new_game", "seats": ["human", "first", "last", "random"]}\n')
+            await writer.drain()
+            while True:
+                message = json.loads(await reader.readline())
+                if message["type"] == "your_turn":
+                    answer = {"type": "move", "game": message["game"], "seat": 0, "slot": max(message["moves"])}
+                    writer.write(json.dumps(answer).encode() + b"\n")
+                    await writer.drain()
+                elif message["type"] == "end":
+                    break
+            self.assertIn(message["winner"], range(4))
+            writer.write(b"not json\n")
+            await writer.drain()
+            self.assertEqual(json.loads(await reader.readline())["type"], "error")
+        finally:
+            writer.close()
+            server.close()
+            await server.wait_closed()
+
+    async def test_disconnect(self):
+        """Test if the game of a client waiting for its move is cancelled when the connection closes"""
+        host = GameHost(seed=8)
+        server = await serve(host)
+        address, port = server.sockets[0].getsockname()[:2]
+        reader, writer = await asyncio.open_connection(address, port)
+        try:
+            writer.write(b'{"type": "new_game", "seats": ["human", "first", "last", "random"]}\n')
+            await writer.drain()
+            while json.loads(await reader.readline())["type"] != "your_turn":
+                pass
+            task = host.result(0)
+            writer.close()
+            with self.assertRaises(asyncio.CancelledError):
+                await asyncio.wait_for(task, 5)
+            await asyncio.sleep(0)
+            self.assertEqual((host.games, host.tasks, host.seats), ({}, {}, {}))
+        finally:
+            server.close()
+            await server.wait_closed()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+
+import Registry
+from Player import Player
+from Simulation import simulate, SimulationResult
+
+
+class IdlePlayer(Player):
+    """Player that never moves a token"""
+
+    def turn(self, board, dice_roll):
+        pass
+
+
+class TestSimulate(unittest.TestCase):
+
+    def test_games_finish(self):
+        """Test if all simulated random games are played until one player has won"""
+        result = simulate(20, ("random",) * 4, seed=1)
+        self.assertEqual(result.games, 20)
+        self.assertEqual(result.unfinished, 0)
+        self.assertEqual(sum(result.seat_wins), 20)
+        self.assertEqual(result.strategy_wins["random"], 20)
+        self.assertEqual(sum(result.turn_counts.values()), 20)
+
+    def test_no_output(self):
+        """Test if simulating games doesn't print anything"""
+        import io
+        from contextlib import redirect_stdout
+        out = io.StringIO()
+        with redirect_stdout(out):
+            simulate(2, ("random",) * 4, seed=1)
+        self.assertEqual(out.getvalue(), "")
+
+    def test_seed_reproducible(self):
+        """Test if the same seed gives the same results"""
+        self.assertEqual(simulate(10, ("random",) * 4, seed=3), simulate(10, ("random",) * 4, seed=3))
+
+    def test_turn_limit(self):
+        """Test if games of players that never move are stopped by the turn limit"""
+        specs = dict(Registry._specs)
+        self.addCleanup(Registry._classes.clear)
+        self.addCleanup(Registry._specs.update, specs)
+        self.addCleanup(Registry._specs.clear)
+        Registry.register("idle", IdlePlayer)
+        result = simulate(2, ("idle",) * 4, seed=1, max_turns=10)
+        self.assertEqual(result.unfinished, 2)
+        self.assertEqual(result.max_turns, 10)
+        self.assertEqual(result.total_turns, 20)
+
+    def test_merge(self):
+        """Test if merging two results adds up the counts"""
+        a = simulate(5, ("random",) * 4, seed=1)
+        b = simulate(7, ("random",) * 4, seed=2)
+        merged = SimulationResult(("random",) * 4).merge(a).merge(b)
+        self.assertEqual(merged.games, 12)
+        self.assertEqual(merged.total_turns, a.total_turns + b.total_turns)
+        self.assertEqual(merged.seat_wins, [x + y for x, y in zip(a.seat_wins, b.seat_wins)])
+
+    def test_from_dict(self):
+        """Test if a result rebuilt from its dict equals the original"""
+        result = simulate(10, ("random", "first", "random", "last"), seed=4)
+        self.assertEqual(SimulationResult.from_dict(result.as_dict()), result)
+        self.assertEqual(SimulationResult.from_dict(result.as_dict()).total_turns, result.total_turns)
+
+
+class TestParallelSimulate(unittest.TestCase):
+
+    def test_worker_count_independent(self):
+        """Test if the results for a seed are identical for any number of workers"""
+        serial = simulate(40, ("random",) * 4, seed=7, chunk_size=10)
+        parallel = simulate(40, ("random",) * 4, seed=7, chunk_size=10, workers=3)
+        self.assertEqual(serial, parallel)
+        self.assertEqual(parallel.games, 40)
+
+    def test_uneven_chunks(self):
+        """Test if a number of games that isn't a multiple of the chunk size is played completely"""
+        result = simulate(25, ("random",) * 4, seed=7, chunk_size=10, workers=2)
+        self.assertEqual(result.games, 25)
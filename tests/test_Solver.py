@@ -0,0 +1,145 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+
+import Registry
+from Board import HOME_CODE, TARGET_CODE
+from Game import Game
+from Player import RandomPlayer, TablePlayer, log as player_log
+from Solver import Solver, moves, new_board, state_key, has_won
+from Transitions import ILLEGAL
+
+
+def play(board, players, rng):
+    """Play a reduced game to the end like Game.turn, return the winner id"""
+    while True:
+        for player in players:
+            player.turn(board, rng.randint(1, 6))
+            if player.has_won(board):
+                return player.id
+
+
+class TestMoves(unittest.TestCase):
+
+    def test_against_board(self):
+        """Test if the solver moves agree with Board.legal_moves and Board.move_token"""
+        rng = random.Random(2)
+        players = [RandomPlayer(0), RandomPlayer(1)]
+        board = new_board(players, 2)
+        for _ in range(500):
+            player = rng.randrange(2)
+            roll = rng.randint(1, 6)
+            key = state_key(board.state, player)
+            expected = set()
+            snapshot = board.snapshot()
+            for token in board.legal_moves(player, roll):
+                code = board.state[token.slot]
+                board.move_token(token, roll)
+                expected.add((code, state_key(board.state, 1 - player)))
+                board.restore(snapshot)
+            with self.subTest(key=key, roll=roll):
+                self.assertEqual(set(moves(key, roll)), expected)
+            players[player].turn(board, roll)
+            if players[player].has_won(board):
+                board = new_board(players, 2)
+
+
+class TestSolver(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.solver = Solver(tokens=1)
+        cls.solver.solve()
+
+    def test_states(self):
+        """Test if the transposition table holds every state once"""
+        self.assertEqual(len(self.solver.index), len(self.solver))
+        self.assertEqual(self.solver.index[self.solver.start_key], 0)
+        self.assertFalse(any(has_won(key, 0) or has_won(key, 1) for key in self.solver.keys))
+
+    def test_bellman(self):
+        """Test if every value is the average over the rolls of the best move"""
+        solver = self.solver
+        for key in random.Random(1).sample(solver.keys, 200):
+            total = 0.
+            for roll in range(1, 7):
+                found = moves(key, roll) or [(ILLEGAL, (1 - key[0],) + key[1:])]
+                total += max(1. if has_won(k, key[0]) else 1. - solver.win_probability(k) for _, k in found)
+            self.assertAlmostEqual(solver.win_probability(key), total / 6, places=9)
+
+    def test_one_step_from_target(self):
+        """Test if a token in front of the target wins with a 1 or faster"""
+        key = (0, 39, 41, 42, 43, 41, 42, 43, 44)
+        self.assertGreaterEqual(self.solver.win_probability(key), 1 / 6)
+        self.assertEqual(self.solver.best_move(key, 1), 39)
+        self.assertEqual(self.solver.best_move(key, 2), ILLEGAL)
+
+    def test_matches_played_games(self):
+        """Test if the win probability of the first player matches played games"""
+        rng = random.Random(4)
+        players = [RandomPlayer(0, rng), RandomPlayer(1, rng)]
+        n = 3000
+        wins = sum(play(new_board(players, 1), players, rng) == 0 for _ in range(n))
+        p = self.solver.win_probability(self.solver.start_key)
+        self.assertLess(abs(wins / n - p), 4 * (p * (1 - p) / n) ** .5)
+
+
+class TestTablePlayer(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".json")
+        os.close(handle)
+        solver = Solver(tokens=1)
+        solver.solve()
+        solver.save(self.path)
+
+    def tearDown(self):
+        Registry.clear_shared_data()
+        os.remove(self.path)
+
+    def test_table(self):
+        """Test if the saved table holds the value and a move per roll for every state"""
+        with open(self.path) as f:
+            table = json.load(f)
+        self.assertEqual(table['tokens'], 1)
+        start = table['states']["0 41 42 43 44 41 42 43 44"]
+        self.assertEqual(len(start), 7)
+        self.assertEqual(start[1:], [ILLEGAL] * 5 + [HOME_CODE])
+
+    def test_plays_reduced_game(self):
+        """Test if the table player finishes games and loads the table only once"""
+        rng = random.Random(3)
+        players = [TablePlayer(0, table_path=self.path), RandomPlayer(1, rng)]
+        for _ in range(20):
+            board = new_board(players, 1)
+            winner = play(board, players, rng)
+            self.assertTrue(all(code >= TARGET_CODE for code in board.state[4 * winner:4 * winner + 4]))
+        self.assertIs(players[0].table, TablePlayer(1, table_path=self.path).table)
+        self.assertGreater(players[0].hits, 0)
+        self.assertEqual(players[0].misses, 0)
+
+    def test_needs_table(self):
+        """Test if the player refuses to play without a table and isn't a built in type"""
+        with self.assertRaises(ValueError):
+            TablePlayer(0)
+        self.assertNotIn("table", Registry.available())
+
+    def test_registered_falls_back_visibly(self):
+        """Test if a bound table player plays full games and warns that the table doesn't cover them"""
+        specs = dict(Registry._specs)
+        self.addCleanup(Registry._classes.clear)
+        self.addCleanup(Registry._specs.update, specs)
+        self.addCleanup(Registry._specs.clear)
+        Registry.register("table", TablePlayer.bind(self.path))
+        game = Game("table", "random", rng=random.Random(1))
+        with self.assertLogs(player_log, "WARNING") as logs:
+            game.run(1000)
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(game.p1.hits, 0)
+        self.assertGreater(game.p1.misses, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
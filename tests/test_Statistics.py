@@ -0,0 +1,100 @@
+import json
+import os
+import random
+import statistics
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from Simulation import simulate
+
+if np is not None:
+    from Statistics import RunningStats, Histogram, GameStats
+
+
+@unittest.skipIf(np is None, "NumPy not installed")
+class TestAccumulators(unittest.TestCase):
+
+    def test_running_stats_merge(self):
+        """Test if merged accumulators give the same mean and variance as one over all values"""
+        rng = random.Random(1)
+        values = [rng.gauss(50, 10) for _ in range(1000)]
+        parts = [RunningStats() for _ in range(3)]
+        for i, x in enumerate(values):
+            parts[i % 7 % 3].add(x)
+        merged = RunningStats()
+        for part in parts:
+            merged.merge(part)
+        self.assertEqual(merged.count, 1000)
+        self.assertAlmostEqual(merged.mean, statistics.mean(values), places=9)
+        self.assertAlmostEqual(merged.variance, statistics.variance(values), places=6)
+        self.assertEqual((merged.min, merged.max), (min(values), max(values)))
+
+    def test_histogram(self):
+        """Test if values are counted in the right bins, outside values in under- and overflow"""
+        histogram = Histogram(0, 10, 5)
+        histogram.add(np.array([-1, 0, 1.9, 2, 9.99, 10, 12]))
+        other = Histogram(0, 10, 5)
+        other.add(3)
+        histogram.merge(other)
+        self.assertEqual(histogram.counts.tolist(), [1, 2, 2, 0, 0, 1, 2])
+        with self.assertRaises(ValueError):
+            histogram.merge(Histogram(0, 10, 4))
+
+
+@unittest.skipIf(np is None, "NumPy not installed")
+class TestGameStats(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.result = simulate(40, ("first", "last", "random", "random"), seed=6, chunk_size=15, stats=True)
+        cls.stats = cls.result.stats
+
+    def test_plies_add_up(self):
+        """Test if every token spends every ply somewhere"""
+        plies = sum(t * c for t, c in self.result.turn_counts.items()) * 4
+        # the winner ends the last turn early
+        plies -= sum(3 - w for w in range(4) for _ in range(self.result.seat_wins[w]))
+        occupancy = self.stats.occupancy
+        per_player = occupancy.fields.sum(axis=1) + occupancy.home + occupancy.target
+        self.assertEqual(per_player.tolist(), [4 * plies] * 4)
+        self.assertAlmostEqual(occupancy.heatmap().sum(), 1.)
+
+    def test_counts(self):
+        self.assertEqual(self.stats.games, 40)
+        self.assertEqual(self.stats.turns.count, 40)
+        self.assertAlmostEqual(self.stats.turns.mean, self.result.mean_turns)
+        self.assertEqual(self.stats.turn_histogram.counts.sum(), 40)
+        self.assertEqual(self.stats.captures.sum(), self.stats.captured.sum())
+        self.assertGreater(self.stats.captures.sum(), 0)
+
+    def test_workers(self):
+        """Test if statistics of worker processes merge to the same result"""
+        parallel = simulate(40, ("first", "last", "random", "random"), seed=6, chunk_size=15, stats=True, workers=2)
+        self.assertEqual(parallel.as_dict(), self.result.as_dict())
+
+    def test_export(self):
+        handle, path = tempfile.mkstemp(suffix=".npz")
+        os.close(handle)
+        try:
+            self.stats.write_npz(path)
+            with np.load(path) as data:
+                self.assertEqual(data["fields"].tolist(), self.stats.occupancy.fields.tolist())
+                self.assertEqual(len(data["turn_edges"]), self.stats.turn_histogram.bins + 1)
+            self.stats.write_json(path)
+            with open(path) as f:
+                self.assertEqual(json.load(f)["captures"], self.stats.captures.tolist())
+        finally:
+            os.remove(path)
+
+    def test_recorder_conflict(self):
+        with self.assertRaises(ValueError):
+            simulate(1, ("first",) * 4, stats=True, recorder=GameStats())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+from Simulation import simulate
+from Sweep import Sweep, grid, code_version, ENGINE_MODULES
+
+CONFIGS = [("random", "first", "random", "last"), ("first",) * 4]
+
+
+class Crash(Exception):
+    pass
+
+
+class TestSweep(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "sweep.sqlite")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def sweep(self, n_games=25, **kwargs):
+        return Sweep(self.path, CONFIGS, n_games, seed=7, unit_size=10, max_turns=50, **kwargs)
+
+    def test_same_as_simulate(self):
+        with self.sweep() as sweep:
+            results = sweep.run()
+        for config in CONFIGS:
+            self.assertEqual(results[config], simulate(25, config, seed=7, max_turns=50, chunk_size=10))
+
+    def test_resume(self):
+        """Test if a sweep that died continues with the unfinished units"""
+        def crash_after_two(done, total):
+            if done == 2:
+                raise Crash()
+        with self.sweep() as sweep:
+            self.assertEqual(len(sweep.pending()), 6)
+            with self.assertRaises(Crash):
+                sweep.run(progress=crash_after_two)
+        calls = []
+        with self.sweep() as sweep:
+            self.assertEqual(len(sweep.pending()), 4)
+            results = sweep.run(progress=lambda done, total: calls.append((done, total)))
+            self.assertEqual(sweep.pending(), [])
+        self.assertEqual(calls[-1], (4, 4))
+        for config in CONFIGS:
+            self.assertEqual(results[config], simulate(25, config, seed=7, max_turns=50, chunk_size=10))
+
+    def test_cache(self):
+        """Test if sweeps reuse the units of earlier sweeps with the same seeds and code"""
+        with self.sweep() as sweep:
+            sweep.run()
+        with self.sweep(n_games=40) as sweep:
+            # the two full units of every configuration are reused, the last one has a different size
+            self.assertEqual([unit.unit for unit in sweep.pending()], [2, 3, 2, 3])
+        with self.sweep(version="other") as sweep:
+            self.assertEqual(len(sweep.pending()), 6)
+
+    def test_stored_units(self):
+        with self.sweep() as sweep:
+            sweep.run()
+        with sqlite3.connect(self.path) as db:
+            rows = db.execute("SELECT unit, games, unit_seed FROM units ORDER BY player_types, unit").fetchall()
+        self.assertEqual([games for _, games, _ in rows], [10, 10, 5] * 2)
+        self.assertTrue(all(int(seed) >= 0 for _, _, seed in rows))
+
+    def test_parallel(self):
+        with self.sweep() as sweep:
+            results = sweep.run(workers=2)
+        for config in CONFIGS:
+            self.assertEqual(results[config], simulate(25, config, seed=7, max_turns=50, chunk_size=10))
+
+    def test_grid(self):
+        configs = grid(["first", "last"], 4)
+        self.assertEqual(len(configs), 16)
+        self.assertIn(("first", "last", "last", "first"), configs)
+
+    def test_code_version(self):
+        self.assertEqual(code_version(["first"]), code_version(["first", "random"]))
+        self.assertEqual(len(code_version()), 16)
+
+    def test_code_version_engine_only(self):
+        """Test if the version covers the modules of the game engine, but not e.g. the command line"""
+        directory = os.path.dirname(os.path.abspath(sys.modules[Sweep.__module__].__file__))
+        for name in ENGINE_MODULES:
+            self.assertTrue(os.path.exists(os.path.join(directory, name + ".py")), name)
+        self.assertTrue({"Board", "Game", "Player", "Simulation"} <= set(ENGINE_MODULES))
+        self.assertFalse({"cli", "bench", "Sweep", "Server"} & set(ENGINE_MODULES))
+
+
+if __name__ == '__main__':
+    unittest.main()
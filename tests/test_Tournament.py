@@ -0,0 +1,69 @@
+import unittest
+
+from Tournament import Tournament, PairingResult, seatings, bradley_terry
+
+
+class TestSeatings(unittest.TestCase):
+
+    def test_all_arrangements(self):
+        """Test if every seat is taken equally often by both strategies"""
+        arrangements = seatings('first', 'last')
+        self.assertEqual(len(arrangements), 6)
+        for seat in range(4):
+            self.assertEqual(sum(s[seat] == 'first' for s in arrangements), 3)
+
+
+class TestRatings(unittest.TestCase):
+
+    def pairing(self, a, b, wins_a, wins_b):
+        p = PairingResult(a, b)
+        p.wins_a, p.wins_b = wins_a, wins_b
+        return p
+
+    def test_two_strategies(self):
+        """Test if the rating difference matches the observed odds"""
+        ratings = bradley_terry([self.pairing('a', 'b', 749.5, 249.5)])
+        self.assertAlmostEqual(ratings['a'] - ratings['b'], 400 * 0.47712125, places=3)
+        self.assertAlmostEqual(ratings['a'] + ratings['b'], 0., places=6)
+
+    def test_order(self):
+        """Test if ratings follow the pairwise results"""
+        ratings = bradley_terry([self.pairing('a', 'b', 70, 30), self.pairing('b', 'c', 60, 40),
+                                 self.pairing('a', 'c', 80, 20)])
+        self.assertGreater(ratings['a'], ratings['b'])
+        self.assertGreater(ratings['b'], ratings['c'])
+
+
+class TestTournament(unittest.TestCase):
+
+    def test_unequal_pairings_stop_early(self):
+        """Test if clearly unequal pairings stop long before the game budget"""
+        tournament = Tournament(['first', 'last', 'random'], games_per_round=60, max_games=6000, seed=1)
+        pairings = tournament.run()
+        self.assertEqual(len(pairings), 3)
+        for pairing in pairings:
+            with self.subTest(pairing=pairing):
+                self.assertTrue(pairing.resolved)
+                self.assertLess(pairing.games, 1000)
+                self.assertEqual(pairing.wins_a + pairing.wins_b + pairing.unfinished, pairing.games)
+        ratings = tournament.ratings()
+        self.assertEqual(max(ratings, key=ratings.get), 'first')
+        self.assertEqual(min(ratings, key=ratings.get), 'last')
+
+    def test_game_budget(self):
+        """Test if a pairing that can't be resolved stops at the game budget"""
+        tournament = Tournament(['first', 'last'], games_per_round=6, max_games=12, z=100., seed=1)
+        pairing, = tournament.run()
+        self.assertFalse(pairing.resolved)
+        self.assertEqual(pairing.games, 12)
+        self.assertEqual(pairing.rounds, 2)
+
+    def test_workers_reproducible(self):
+        """Test if the results don't depend on the number of workers"""
+        results = [Tournament(['first', 'random'], games_per_round=12, max_games=24, z=100., seed=3,
+                              workers=workers).run()[0].as_dict() for workers in (1, 2)]
+        self.assertEqual(results[0], results[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
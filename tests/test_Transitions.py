@@ -0,0 +1,94 @@
+import unittest
+from Board import Board, InvalidMoveException
+from Player import RandomPlayer
+from Transitions import transition_table, validate_transition_table, ILLEGAL, HOME_CODE, TARGET_CODE
+
+START_FIELDS = (0, 10, 20, 30)
+TARGET_FIELDS = (39, 9, 19, 29)
+
+
+def frozen_move_token(player_id, position, places):
+    """
+    Destination of a move by the branching of Board.move_token before the
+    transition table, frozen here as an independent reference. Works on the
+    public positions (field, -1...-4 times (player_id + 1) in the target, 'h'
+    for the home) of a single token on an otherwise empty board.
+    :return: Position after the move or None if the move is illegal, ILLEGAL
+    can't be used as it is also the first target position of player 0
+    """
+    home_pos = 'h'
+    if position == home_pos:
+        # the players left the home only with a 6, move_token itself didn't check the roll
+        return START_FIELDS[player_id] if places == 6 else None
+    elif position < 0:
+        # token is in target, move_token raised NotImplementedError
+        return None
+    elif position >= 0:
+        new_pos = (position + places) % 40
+        if position <= TARGET_FIELDS[player_id] < position + places:
+            rest_places = TARGET_FIELDS[player_id] - position - places
+            if rest_places < -4:
+                return None
+            rest_places *= player_id + 1  # the last 16 fields of the board are the target fields
+            return rest_places
+        return new_pos
+
+
+class TestTransitionTable(unittest.TestCase):
+
+    def setUp(self):
+        self.table = transition_table(START_FIELDS, TARGET_FIELDS)
+
+    def test_validate(self):
+        """Test if the generated table agrees with the rule arithmetic"""
+        validate_transition_table(self.table, START_FIELDS, TARGET_FIELDS)
+
+    def test_validate_detects_wrong_entry(self):
+        """Test if a changed entry is reported by the validator"""
+        broken = [list(list(moves) for moves in player_table) for player_table in self.table]
+        broken[2][5][3] = 9
+        with self.assertRaises(ValueError):
+            validate_transition_table(broken, START_FIELDS, TARGET_FIELDS)
+
+    def test_matches_old_move_token(self):
+        """Test every entry against the branching of move_token before the table, not the generator of the table"""
+        board = Board([RandomPlayer(i) for i in range(4)])
+        for player_id in range(4):
+            decode = board._decode[player_id]
+            for code in range(HOME_CODE + 1):
+                for places in range(1, 7):
+                    with self.subTest(player_id=player_id, code=code, places=places):
+                        expected = frozen_move_token(player_id, decode[code], places)
+                        destination = self.table[player_id][code][places]
+                        self.assertEqual(decode[destination] if destination != ILLEGAL else None, expected)
+
+    def test_table_is_shared(self):
+        """Test if boards with the same layout share one table"""
+        boards = [Board([RandomPlayer(i) for i in range(4)]) for _ in range(2)]
+        self.assertIs(boards[0]._transitions, boards[1]._transitions)
+
+    def test_home_and_target(self):
+        """Test if tokens leave the home only on a 6 and never move in the target"""
+        for player_id, start in enumerate(START_FIELDS):
+            with self.subTest(player_id=player_id):
+                self.assertEqual(self.table[player_id][HOME_CODE][1:6], (ILLEGAL,) * 5)
+                self.assertEqual(self.table[player_id][HOME_CODE][6], start)
+                for code in range(TARGET_CODE, TARGET_CODE + 4):
+                    self.assertEqual(self.table[player_id][code], (ILLEGAL,) * 7)
+
+    def test_move_token_matches_table(self):
+        """Test every move of a single token on an otherwise empty board against the table"""
+        for player_id in range(4):
+            for code in range(TARGET_CODE):
+                for places in range(1, 7):
+                    with self.subTest(player_id=player_id, code=code, places=places):
+                        board = Board([RandomPlayer(i) for i in range(4)])
+                        token = board.tokens[player_id][0]
+                        board._place(token, code)
+                        expected = self.table[player_id][code][places]
+                        if expected == ILLEGAL:
+                            with self.assertRaises(InvalidMoveException):
+                                board.move_token(token, places)
+                        else:
+                            board.move_token(token, places)
+                            self.assertEqual(board.state[token.slot], expected)
@@ -0,0 +1,109 @@
+import random
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from Board import Board, InvalidMoveException, HOME_CODE, TARGET_CODE
+from Player import RandomPlayer
+
+if np is not None:
+    import VectorEngine
+    from VectorEngine import VectorGames, HOME, TARGET
+
+
+def relative_to_code(position, start):
+    """Convert a relative engine position to a position code of the scalar board"""
+    if position == HOME:
+        return HOME_CODE
+    if position >= TARGET:
+        return position
+    return (start + position) % 40
+
+
+def scalar_board(state):
+    """Create a scalar board with the given position codes"""
+    board = Board([RandomPlayer(i) for i in range(len(state) // 4)])
+    for player_tokens in board.tokens:
+        for token in player_tokens:
+            board._place(token, state[token.slot])
+    return board
+
+
+@unittest.skipIf(np is None, "NumPy not installed")
+class TestLegalMoves(unittest.TestCase):
+    """Cross check the vectorized move rules against Board.move_token"""
+
+    def test_against_scalar_board(self):
+        rng = random.Random(1)
+        for _ in range(300):
+            player = rng.randrange(4)
+            roll = rng.randint(1, 6)
+            own = [HOME] * 4
+            # put a random number of tokens on distinct positions
+            for token, position in enumerate(rng.sample(range(TARGET + 4), rng.randint(0, 4))):
+                own[token] = position
+            state = [HOME_CODE] * 16
+            for token, position in enumerate(own):
+                state[4 * player + token] = relative_to_code(position, 10 * player)
+
+            legal, destination = VectorEngine.legal_moves(
+                np.array(own, dtype=np.int8)[:, None], np.array([roll], dtype=np.int8))
+            with self.subTest(own=own, player=player, roll=roll):
+                accepted = []
+                for token in range(4):
+                    board = scalar_board(state)
+                    try:
+                        if own[token] == HOME and roll != 6:
+                            raise InvalidMoveException
+                        board.move_token(board.tokens[player][token], roll)
+                    except InvalidMoveException:
+                        accepted.append(False)
+                        continue
+                    accepted.append(True)
+                    self.assertEqual(board.state[4 * player + token],
+                                     relative_to_code(int(destination[token, 0]), 10 * player))
+                exit_possible = any(a and p == HOME for a, p in zip(accepted, own))
+                expected = [a and (p == HOME or not exit_possible) for a, p in zip(accepted, own)]
+                self.assertEqual(legal[:, 0].tolist(), expected)
+
+
+@unittest.skipIf(np is None, "NumPy not installed")
+class TestLockstep(unittest.TestCase):
+    """Play vectorized games and the same moves on scalar boards side by side"""
+
+    def test_games_match_scalar_boards(self):
+        n_games = 25
+        games = VectorGames(n_games, ('first', 'last', 'random', 'random'), seed=3)
+        boards = [scalar_board([HOME_CODE] * 16) for _ in range(n_games)]
+        rng = np.random.default_rng(5)
+        steps = 0
+        while len(games.active) and steps < 2000:
+            active = games.active.copy()
+            player = games.current
+            rolls = rng.integers(1, 7, size=len(active), dtype=np.int8)
+            games.step(rolls)
+            for game, roll, choice in zip(active.tolist(), rolls.tolist(), games.last_choice.tolist()):
+                if choice >= 0:
+                    boards[game].move_token(boards[game].tokens[player][choice], roll)
+                self.assertEqual(list(boards[game].state), games.board_state(game))
+            steps += 1
+        self.assertEqual(len(games.active), 0)
+        for game, board in enumerate(boards):
+            winner = int(games.winner[game])
+            self.assertTrue(all(board.state[4 * winner + t] >= TARGET_CODE for t in range(4)))
+
+    def test_result(self):
+        """Test if all games finish and are counted in the result"""
+        result = VectorEngine.simulate_vectorized(200, seed=1)
+        self.assertEqual(result.games, 200)
+        self.assertEqual(result.unfinished, 0)
+        self.assertEqual(sum(result.seat_wins), 200)
+
+    def test_turn_limit(self):
+        """Test if games that exceed the turn limit are stopped without a winner"""
+        result = VectorEngine.simulate_vectorized(50, seed=1, max_turns=5)
+        self.assertEqual(result.unfinished, 50)
+        self.assertEqual(result.max_turns, 5)
@@ -0,0 +1,48 @@
+import os
+import subprocess
+import tempfile
+import unittest
+import bench
+
+
+class TestCompare(unittest.TestCase):
+
+    def test_regressions_flagged(self):
+        """Test if slower microbenchmarks and fewer games per second are flagged"""
+        baseline = {'micro_ns': {'move_token': 100., 'throw': 100.}, 'games_per_s': {'a': 1000., 'b': 1000.}}
+        current = {'micro_ns': {'move_token': 120., 'throw': 105.}, 'games_per_s': {'a': 800., 'b': 1100.}}
+        lines, regressions = bench.compare(current, baseline, threshold=0.1)
+        self.assertEqual(regressions, ['move_token', 'a'])
+        self.assertEqual(len(lines), 4)
+
+    def test_missing_baseline_entry(self):
+        """Test if benchmarks without baseline value are reported but not flagged"""
+        lines, regressions = bench.compare({'micro_ns': {'new': 1.}}, {}, threshold=0.1)
+        self.assertEqual(regressions, [])
+        self.assertIn("no baseline", lines[0])
+
+    def test_micro_benchmarks_run(self):
+        """Test if every microbenchmark can be called repeatedly"""
+        for name, func in bench.micro_benchmarks().items():
+            with self.subTest(name=name):
+                for _ in range(3):
+                    func()
+
+
+class TestCommitHash(unittest.TestCase):
+
+    def test_other_working_directory(self):
+        """Test if the commit hash is found when started from outside of the repository"""
+        directory = os.path.dirname(os.path.abspath(bench.__file__))
+        try:
+            expected = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                                      cwd=directory).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            self.skipTest("not a git checkout")
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as other:
+            os.chdir(other)
+            try:
+                self.assertEqual(bench.commit_hash(), expected)
+            finally:
+                os.chdir(cwd)
@@ -0,0 +1,92 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+import unittest
+from contextlib import redirect_stdout, redirect_stderr
+
+import cli
+from Replay import Replay
+from Simulation import simulate, game_seed
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# wall time of a cold `cli.py --help`, including interpreter startup
+STARTUP_BUDGET = 0.5
+
+
+def run_cli(*args):
+    out = io.StringIO()
+    with redirect_stdout(out):
+        code = cli.main(list(args))
+    return code, out.getvalue()
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_help_budget(self):
+        """Test if --help starts fast and doesn't import NumPy or the game modules"""
+        times = []
+        for _ in range(3):
+            start = time.perf_counter()
+            proc = subprocess.run([sys.executable, "-X", "importtime", "cli.py", "--help"], cwd=ROOT,
+                                  capture_output=True, text=True)
+            times.append(time.perf_counter() - start)
+            self.assertEqual(proc.returncode, 0, proc.stderr)
+        self.assertIn("simulate", proc.stdout)
+        imported = {line.split("|")[-1].strip() for line in proc.stderr.splitlines() if "|" in line}
+        for module in ("numpy", "Game", "Board", "Player", "Simulation"):
+            self.assertNotIn(module, imported)
+        self.assertLess(min(times), STARTUP_BUDGET)
+
+
+class TestCommands(unittest.TestCase):
+
+    def test_simulate(self):
+        code, out = run_cli("simulate", "-n", "20", "--seed", "3", "-p", "first", "last", "random", "random")
+        self.assertEqual(code, 0)
+        expected = simulate(20, ("first", "last", "random", "random"), seed=3).as_dict()
+        self.assertEqual(json.loads(out), json.loads(json.dumps(expected)))
+
+    def test_timing(self):
+        err = io.StringIO()
+        with redirect_stderr(err):
+            run_cli("--timing", "simulate", "-n", "2", "--seed", "1")
+        self.assertRegex(err.getvalue(), r"startup [\d.]+ ms, imports [\d.]+ ms, simulate [\d.]+ ms")
+
+    def test_tournament(self):
+        code, out = run_cli("tournament", "first", "last", "--seed", "1", "--games-per-round", "12",
+                            "--max-games", "24")
+        result = json.loads(out)
+        self.assertEqual(set(result["ratings"]), {"first", "last"})
+
+    def test_replay(self):
+        code, out = run_cli("replay", "--seed", "5", "-p", "first", "last", "random", "random", "--turn", "1")
+        result = json.loads(out)
+        self.assertEqual(result["state"], [44] * 16)
+        self.assertGreater(result["moves"], 0)
+
+    def test_replay_simulated_game(self):
+        """Test if replay --seed plays the game of simulate --seed with the same index again"""
+        players = ("first", "last", "random", "random")
+        _, out = run_cli("simulate", "-n", "5", "--seed", "5", "--chunk-size", "2", "-p", *players)
+        turn_counts = json.loads(out)["turn_counts"]
+        replayed = {}
+        for game in range(5):
+            _, out = run_cli("replay", "--seed", "5", "--game", str(game), "--chunk-size", "2", "-p", *players)
+            result = json.loads(out)
+            self.assertIsNotNone(result["winner"])
+            replay = Replay.from_seed(players, game_seed(5, game, 2))
+            self.assertEqual(result["moves"], len(replay))
+            replayed[str(replay.game.turns)] = replayed.get(str(replay.game.turns), 0) + 1
+        self.assertEqual(replayed, turn_counts)
+
+    def test_unknown_argument(self):
+        with redirect_stderr(io.StringIO()):
+            with self.assertRaises(SystemExit):
+                cli.main(["simulate", "--bogus"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import random
+import tempfile
+import unittest
+
+from Game import Game
+from utils import configure_output, get_logger, GAME, TURN, MOVE
+
+
+class TestOutput(unittest.TestCase):
+
+    def tearDown(self):
+        configure_output("null")
+
+    def test_silent_by_default(self):
+        """Test if games don't build messages when no output is configured"""
+        game = Game("random", "random", "random", "random", rng=random.Random(1))
+        self.assertFalse(game._log_game)
+        self.assertFalse(game._log_turns)
+        self.assertFalse(game.board._log_moves)
+
+    def test_captures(self):
+        """Test if captures are logged on boards created after the MOVE level was enabled"""
+        stream = configure_output("memory", MOVE)
+        game = Game("random", "random", "random", "random", rng=random.Random(3))
+        self.assertTrue(game.board._log_moves)
+        game.run()
+        self.assertTrue(any("captures a token" in line for line in stream.getvalue().splitlines()))
+
+    def test_memory(self):
+        """Test if turn messages and the board are written to a memory buffer"""
+        stream = configure_output("memory", TURN)
+        game = Game("random", "random", "random", "random", rng=random.Random(1))
+        game.turn()
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(lines[0], "Starting game with 4 players.")
+        self.assertEqual(sum("has rolled a" in line for line in lines), 4)
+        self.assertEqual(lines[-1], str(game.board))
+
+    def test_level(self):
+        """Test if messages below the configured level are skipped"""
+        stream = configure_output("memory", GAME)
+        game = Game("random", "random", "random", "random", rng=random.Random(2))
+        game.run()
+        lines = stream.getvalue().splitlines()
+        self.assertFalse(any("has rolled" in line for line in lines))
+        self.assertEqual(lines[-1], "Player {} has won after {} turns".format(game.winner.id, game.turns))
+
+    def test_file_and_null(self):
+        """Test if output can be written to a file and switched off again"""
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            configure_output(path, MOVE)
+            get_logger("test").log(MOVE, "detail %d", 1)
+            self.assertIsNone(configure_output("null"))
+            get_logger("test").log(GAME, "dropped")
+            with open(path) as f:
+                self.assertEqual(f.read(), "detail 1\n")
+        finally:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,2 +1,70 @@
-def mprint(msg):
-    print(msg)
\ No newline at end of file
+"""
+Output of the game. All modules log through loggers below LOGGER_NAME, which
+by default print nothing. configure_output routes the messages to the
+terminal, a file, a memory buffer or nowhere.
+
+Messages for every turn are expensive compared to the turn itself, so code on
+the hot path checks once whether a level is enabled, e.g. when a game is
+created, and skips building the message entirely otherwise. Changing the
+level therefore only affects games created afterwards.
+"""
+
+import io
+import logging
+import sys
+
+LOGGER_NAME = "mensch"
+
+# levels of the messages: game start and end, every turn, details of moves and decisions
+GAME, TURN, MOVE = logging.WARNING, logging.INFO, logging.DEBUG
+
+_root = logging.getLogger(LOGGER_NAME)
+_root.setLevel(logging.CRITICAL + 1)    # silent until configure_output is called
+_root.propagate = False
+_root.addHandler(logging.NullHandler())
+
+
+def get_logger(name):
+    """
+    Return the logger of a module
+    :param name: Module name, e.g. "Game"
+    :type name: str
+    :rtype: logging.Logger
+    """
+    return _root.getChild(name)
+
+
+def configure_output(target="stdout", level=TURN, fmt="%(message)s"):
+    """
+    Route the game output to a target.
+    :param target: "stdout", "stderr", "memory" for a new text buffer, "null" to
+    discard everything, a file path or an open text stream
+    :type target: str or file
+    :param level: Lowest level that is written, e.g. GAME, TURN or MOVE
+    :type level: int
+    :param fmt: Format of the messages, see logging.Formatter
+    :type fmt: str
+    :return: The stream the messages are written to, None for "null"
+    :rtype: file or None
+    """
+    for handler in list(_root.handlers):
+        _root.removeHandler(handler)
+        handler.close()
+    if target == "null":
+        _root.setLevel(logging.CRITICAL + 1)
+        _root.addHandler(logging.NullHandler())
+        return None
+    if target == "stdout":
+        handler = logging.StreamHandler(sys.stdout)
+    elif target == "stderr":
+        handler = logging.StreamHandler(sys.stderr)
+    elif target == "memory":
+        handler = logging.StreamHandler(io.StringIO())
+    elif isinstance(target, str):
+        handler = logging.FileHandler(target)
+    else:
+        handler = logging.StreamHandler(target)
+    handler.setFormatter(logging.Formatter(fmt))
+    _root.addHandler(handler)
+    _root.setLevel(level)
+    return handler.stream